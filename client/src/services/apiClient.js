@@ -10,3 +10,13 @@ async function request(path) {
 export function getQuote(symbol) {
   return request(`/api/quote/${encodeURIComponent(symbol)}`);
 }
+
+export function getMetricRange(metric, { start, end, days, downsample } = {}) {
+  const params = new URLSearchParams();
+  if (start) params.set("start", start);
+  if (end) params.set("end", end);
+  if (days) params.set("days", String(days));
+  if (downsample) params.set("downsample", String(downsample));
+  const qs = params.toString();
+  return request(`/api/metrics/${encodeURIComponent(metric)}${qs ? `?${qs}` : ""}`);
+}
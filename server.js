@@ -1,10 +1,13 @@
 const express = require("express");
 const fs = require("fs");
+const http = require("http");
 const path = require("path");
 const marked = require("marked");
 
 const app = express();
 const PORT = process.env.PORT || 3000;
+// server/src/metric_query.py serve
+const METRICS_API = process.env.SRM_QUERY_URL || "http://127.0.0.1:5055";
 
 // Serve client
 app.use(express.static(path.join(__dirname, "client")));
@@ -30,6 +33,25 @@ function loadSummary() {
   };
 }
 
+// Latest metric records, written atomically by server/src/metrics_snapshot.py;
+// parsed again only when the file is replaced
+const SNAPSHOT = path.join(__dirname, "server", "src", "metrics-snapshot.json");
+let snapshotCache = { key: null, doc: null };
+
+function loadSnapshot() {
+  let st;
+  try {
+    st = fs.statSync(SNAPSHOT);
+  } catch {
+    return null;
+  }
+  const key = `${st.ino}:${st.mtimeMs}`;
+  if (key !== snapshotCache.key) {
+    snapshotCache = { key, doc: JSON.parse(fs.readFileSync(SNAPSHOT, "utf8")) };
+  }
+  return snapshotCache.doc;
+}
+
 // Load daily report markdown if present else use sample
 function loadReport() {
   const p = path.join(__dirname, "reports", "daily-report.md");
@@ -49,7 +71,13 @@ function loadSettings() {
 }
 
 app.get("/api/summary", (req, res) => {
-  res.json(loadSummary());
+  const summary = loadSummary();
+  const snap = loadSnapshot();
+  if (snap) {
+    summary.metrics = snap.metrics;
+    summary.snapshot = { version: snap.version, built_at: snap.built_at };
+  }
+  res.json(summary);
 });
 
 app.get("/api/report", (req, res) => {
@@ -61,6 +89,20 @@ app.get("/api/settings", (req, res) => {
   res.type("text/plain").send(loadSettings());
 });
 
+// Time-range metric rows (?start=&end=&days=&downsample=), answered by the
+// Python query service
+app.get(["/api/metrics", "/api/metrics/:metric"], (req, res) => {
+  const url = new URL(req.originalUrl, METRICS_API);
+  http
+    .get(url, (upstream) => {
+      res.status(upstream.statusCode).type("application/json");
+      upstream.pipe(res);
+    })
+    .on("error", () => {
+      res.status(502).json({ error: "metric query service unavailable" });
+    });
+});
+
 app.listen(PORT, () => {
   console.log(`SRM Financial running on port ${PORT}`);
 });
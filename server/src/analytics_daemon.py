@@ -0,0 +1,198 @@
+# server/src/analytics_daemon.py
+# Resident worker for the pipeline stages. Scripts are imported once and
+# their main() re-run in this process, so the memory-mapped return and
+# price columns (returns_cache / price_store) and the tail_reader cache stay
+# warm between runs. Every stage input is polled; when one changes, only the
+# stages reading it and everything downstream are recomputed.
+#
+# A Unix socket takes one-line commands:
+#   status            -> JSON with per-stage last run, timing and errors
+#   run [stage ...]   -> queue a recompute (all stages if none given)
+#   stop              -> exit after the current batch
+#   python server/src/analytics_daemon.py                 # start
+#   python server/src/analytics_daemon.py --send status   # talk to it
+
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+import pipeline
+
+ROOT = Path("server/src")
+SOCKET_PATH = Path(os.getenv("SRM_DAEMON_SOCKET", "server/src/analytics-daemon.sock"))
+POLL = float(os.getenv("SRM_DAEMON_POLL", "0.5"))
+
+def signature(path: Path):
+    # what "changed" means for an input: identity, size and mtime; for a
+    # directory (the price store) the same over the files beneath it
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if not os.path.isdir(path):
+        return st.st_ino, st.st_size, st.st_mtime_ns
+    sig = []
+    for dirpath, _, files in os.walk(path):
+        for name in sorted(files):
+            try:
+                s = os.stat(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                continue
+            sig.append((name, s.st_size, s.st_mtime_ns))
+    return tuple(sig)
+
+class Daemon:
+    def __init__(self, stages=pipeline.STAGES, poll=POLL):
+        self.stages = list(stages)
+        self.poll = poll
+        self.inputs = sorted({i for s in self.stages for i in s.inputs})
+        self.readers = {i: [s.name for s in self.stages if i in s.inputs] for i in self.inputs}
+        self.seen = {}
+        self.commands = queue.Queue()
+        self.running = True
+        self.started = datetime.utcnow().isoformat()
+        self.batches = 0
+        self.last = {}     # stage -> {"at", "wall_s"} or {"at", "error"}
+        self.lock = threading.Lock()
+
+    def snapshot(self, names):
+        return {i: signature(ROOT / i) for i in names}
+
+    def changed_stages(self):
+        current = self.snapshot(self.inputs)
+        changed = [i for i, sig in current.items() if sig != self.seen.get(i)]
+        self.seen.update(current)
+        return sorted({name for i in changed for name in self.readers[i]})
+
+    def recompute(self, names):
+        stages = pipeline.select(self.stages, names)
+        order, deps, timings, failed = pipeline.run(stages, jobs=1)
+        now = datetime.utcnow().isoformat()
+        with self.lock:
+            self.batches += 1
+            for name, wall in timings.items():
+                self.last[name] = {"at": now, "wall_s": round(wall, 6)}
+            for name, err in failed.items():
+                self.last[name] = {"at": now, "error": err}
+        # our own writes are not news: re-baseline what the batch produced
+        produced = {o for s in stages for o in s.outputs if o in self.readers}
+        self.seen.update(self.snapshot(produced))
+        total = sum(timings.values())
+        print(f"[{now}] recomputed {len(timings)} stage(s) in {total:.4f}s"
+              + (f", {len(failed)} failed" if failed else "") + f": {', '.join(order)}")
+        for name, err in failed.items():
+            print(f"  {name}: {err}")
+
+    def status(self):
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "started": self.started,
+                "batches": self.batches,
+                "poll_s": self.poll,
+                "watched": len(self.inputs),
+                "stages": dict(self.last),
+            }
+
+    def handle(self, line: str):
+        cmd, *args = line.split()
+        if cmd == "status":
+            return self.status()
+        if cmd == "run":
+            try:
+                pipeline.select(self.stages, args)
+            except ValueError as e:
+                return {"error": str(e)}
+            self.commands.put(args)
+            return {"queued": args or "all"}
+        if cmd == "stop":
+            self.running = False
+            return {"stopping": True}
+        return {"error": f"unknown command: {cmd}"}
+
+    def loop(self):
+        self.seen = self.snapshot(self.inputs)
+        while self.running:
+            forced = []
+            try:
+                forced.append(self.commands.get(timeout=self.poll))
+                while True:
+                    forced.append(self.commands.get_nowait())
+            except queue.Empty:
+                pass
+            names = set(self.changed_stages())
+            for args in forced:
+                names.update(args or (s.name for s in self.stages))
+            if names:
+                self.recompute(sorted(names))
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline().decode("utf-8").strip()
+        reply = self.server.analytics.handle(line) if line else {"error": "empty command"}
+        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+def serve_control(daemon: Daemon, path: Path = SOCKET_PATH):
+    if path.exists():
+        path.unlink()
+    server = socketserver.ThreadingUnixStreamServer(str(path), _Handler)
+    server.analytics = daemon
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def send(command: str, path: Path = SOCKET_PATH, timeout: float = 30.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(str(path))
+        s.sendall((command.strip() + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data.decode("utf-8"))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Keep the analytics stages resident and recompute on input changes.")
+    ap.add_argument("--poll", type=float, default=POLL, help="seconds between input checks")
+    ap.add_argument("--socket", default=str(SOCKET_PATH), help="control socket path")
+    ap.add_argument("--run-now", action="store_true", help="recompute every stage once at startup")
+    ap.add_argument("--send", metavar="COMMAND", help="send a command to a running daemon and print the reply")
+    args = ap.parse_args(argv)
+
+    if args.send:
+        try:
+            print(json.dumps(send(args.send, Path(args.socket)), indent=2))
+        except OSError as e:
+            print(f"No daemon on {args.socket}: {e}")
+            return 1
+        return 0
+
+    daemon = Daemon(poll=args.poll)
+    server = serve_control(daemon, Path(args.socket))
+    if args.run_now:
+        daemon.commands.put([])
+    print(f"Watching {len(daemon.inputs)} inputs every {args.poll}s; control socket {args.socket}")
+    try:
+        daemon.loop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        Path(args.socket).unlink(missing_ok=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# server/src/backtest.py
+# Full-history backtests of the signal scripts. Each rule computes its
+# position for every bar in one vectorized pass with the same windows and
+# thresholds as the live script (ma_crossover_signal, trend_state,
+# vol_regime, position_hint), the position at bar i is applied to the
+# return into bar i + 1 (no look-ahead), and the strategy is scored with
+# the formulas of win_rate.py, profit_factor.py and drawdown_table.py.
+# Writes backtest-summary.csv (one row per rule) and, with --curves, the
+# strategy equity curve of each rule to backtest-<rule>.log.
+#
+#   python server/src/backtest.py [--ma 5:20,10:50] [--curves]
+
+from pathlib import Path
+import argparse
+import numpy as np
+import drawdown_table
+import log_writer
+import ma_sweep
+import profit_factor
+import returns_cache
+import rolling_avg_return
+import rolling_volatility_returns
+import settings
+import trend_state
+import vol_regime
+import win_rate
+import instrument
+
+RET_PATH = Path("server/src/daily-returns.log")
+OUT_PATH = Path("server/src/backtest-summary.csv")
+
+START_CAPITAL = 1000.0
+MA_PAIRS = "5:20,10:50,20:100,50:200"
+# position_hint labels as portfolio weights
+HINT_WEIGHTS = {"OVERWEIGHT": 1.0, "NEUTRAL": 0.5, "UNDERWEIGHT": 0.0}
+
+HEADER = "rule,bars,exposure,entries,win_rate,profit_factor,max_drawdown,total_return,equity"
+
+def curve_path(rule: str) -> Path:
+    return OUT_PATH.with_name(f"backtest-{rule}.log")
+
+class Signals:
+    # rolling inputs shared by the rules, each computed once per run
+    def __init__(self, rets):
+        self.r = rets
+        self.n = len(rets)
+        self._cache = {}
+
+    def _memo(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def rolling_mean(self, w):
+        # NaN until the window is full, like the rolling scripts' first row
+        def calc():
+            out = np.full(self.n, np.nan)
+            if self.n >= w:
+                out[w - 1:] = ma_sweep.sma(self._memo("prefix", lambda: ma_sweep.prefix(self.r)), w)
+            return out
+        return self._memo(("mean", w), calc)
+
+    def rolling_std(self, w):
+        def calc():
+            out = np.full(self.n, np.nan)
+            if self.n >= w:
+                mean = ma_sweep.sma(ma_sweep.prefix(self.r), w)
+                sq = ma_sweep.sma(ma_sweep.prefix(self.r * self.r), w)
+                out[w - 1:] = np.sqrt(np.maximum(sq - mean * mean, 0.0))
+            return out
+        return self._memo(("std", w), calc)
+
+    def price(self):
+        # equity-curve.log is the price proxy of ma_crossover_signal.py
+        return self._memo("price", lambda: START_CAPITAL * np.cumprod(1.0 + self.r))
+
+    def price_prefix(self):
+        return self._memo("price_prefix", lambda: ma_sweep.prefix(self.price()))
+
+    def trend(self):
+        # +1 UPTREND, -1 DOWNTREND, 0 SIDEWAYS (NaN before the first window)
+        def calc():
+            # the live script sees the value rounded as logged
+            avg = np.round(self.rolling_mean(rolling_avg_return.WINDOW), 6)
+            out = np.where(avg > trend_state.UP, 1.0, np.where(avg < trend_state.DOWN, -1.0, 0.0))
+            out[np.isnan(avg)] = np.nan
+            return out
+        return self._memo("trend", calc)
+
+    def regime(self):
+        # 0 CALM, 1 NORMAL, 2 VOLATILE (NaN before the first window)
+        def calc():
+            vol = np.round(self.rolling_std(rolling_volatility_returns.WINDOW), 6)
+            out = np.where(vol < vol_regime.CALM, 0.0, np.where(vol < vol_regime.VOLATILE, 1.0, 2.0))
+            out[np.isnan(vol)] = np.nan
+            return out
+        return self._memo("regime", calc)
+
+def rule_buy_hold(sig):
+    return np.ones(sig.n)
+
+def rule_trend(sig):
+    return (sig.trend() > 0).astype(np.float64)
+
+def rule_vol_regime(sig):
+    return (sig.regime() < 2).astype(np.float64)
+
+def rule_position_hint(sig):
+    trend, reg = sig.trend(), sig.regime()
+    over = (trend == 1) & (reg < 2)
+    under = (trend == -1) & (reg == 2)
+    pos = np.where(over, HINT_WEIGHTS["OVERWEIGHT"], np.where(under, HINT_WEIGHTS["UNDERWEIGHT"], HINT_WEIGHTS["NEUTRAL"]))
+    pos[np.isnan(trend) | np.isnan(reg)] = 0.0
+    return pos
+
+def ma_rule(short, long):
+    def rule(sig):
+        pos = np.zeros(sig.n)
+        if sig.n >= long:
+            pos[long - 1:] = ma_sweep.states(sig.price_prefix(), short, long) > 0
+        return pos
+    return rule
+
+def rules(ma_pairs):
+    out = {
+        "buy_hold": rule_buy_hold,
+        "trend_state": rule_trend,
+        "vol_regime": rule_vol_regime,
+        "position_hint": rule_position_hint,
+    }
+    for s, l in ma_pairs:
+        out[f"ma_{s}_{l}"] = ma_rule(s, l)
+    return out
+
+def parse_pairs(spec):
+    return [tuple(int(x) for x in p.split(":")) for p in spec.split(",") if p]
+
+def run(pos, r):
+    # strategy returns and equity; pos[i] earns the return into bar i + 1
+    strat = pos[:-1] * r[1:]
+    return strat, START_CAPITAL * np.cumprod(1.0 + strat)
+
+def score(pos, strat, equity):
+    held = pos[:-1] > 0
+    traded = strat[held]
+    wins = int(np.count_nonzero(traded > 0))
+    gross_profit = float(traded[traded > 0].sum())
+    gross_loss = -float(traded[traded < 0].sum())
+    entries = int(np.count_nonzero(held[1:] & ~held[:-1])) + int(held[0]) if len(held) else 0
+    _, dd = drawdown_table.underwater(equity) if len(equity) else (None, np.zeros(1))
+    final = float(equity[-1]) if len(equity) else START_CAPITAL
+    return {
+        "bars": len(strat),
+        "exposure": float(pos[:-1].mean()) if len(strat) else 0.0,
+        "entries": entries,
+        "win_rate": win_rate.win_rate(wins, len(traded)),
+        "profit_factor": profit_factor.profit_factor(gross_profit, gross_loss),
+        "max_drawdown": float(dd.min()),
+        "total_return": final / START_CAPITAL - 1.0,
+        "equity": final,
+    }
+
+@instrument.instrumented
+def main(ma_pairs=None, curves=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or len(cols) < 2:
+        print("Not enough daily-returns.log for a backtest.")
+        return
+
+    r = np.frombuffer(cols.rets, dtype=np.float64)
+    pairs = parse_pairs(ma_pairs or settings.analytics("backtest_ma_pairs", MA_PAIRS))
+    short, long = int(settings.analytics("ma_short", 5)), int(settings.analytics("ma_long", 20))
+    if (short, long) not in pairs:
+        pairs.insert(0, (short, long))
+
+    sig = Signals(r)
+    rows = [HEADER]
+    stamps = cols.stamps(1) if curves else None
+    for name, rule in rules(pairs).items():
+        pos = rule(sig)
+        strat, equity = run(pos, r)
+        m = score(pos, strat, equity)
+        rows.append(f"{name},{m['bars']},{m['exposure']:.4f},{m['entries']},{m['win_rate']:.4f},"
+                    f"{m['profit_factor']:.4f},{m['max_drawdown']:.4f},{m['total_return']:.4f},{m['equity']:.2f}")
+        if curves:
+            _, dd = drawdown_table.underwater(equity)
+            log_writer.replace_rows(curve_path(name), [f"{t},equity={e:.2f},drawdown={d:.4f}"
+                                                       for t, e, d in zip(stamps, equity.tolist(), dd.tolist())])
+    instrument.rows(parsed=len(r), emitted=len(rows) - 1)
+
+    log_writer.replace_rows(OUT_PATH, rows)
+    print(f"Backtested {len(rows) - 1} rules over {len(r) - 1} bars:")
+    print("\n".join(rows))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest the signal rules over the full return history.")
+    ap.add_argument("--ma", help="MA crossover pairs to test, e.g. 5:20,10:50")
+    ap.add_argument("--curves", action="store_true", help="also write each rule's equity curve")
+    args = ap.parse_args()
+    main(args.ma, args.curves)
@@ -0,0 +1,205 @@
+# server/src/benchmark.py
+# Scaling benchmark for the analytics stages. For each size it generates
+# synthetic inputs in the exact formats the scripts parse (daily-price.log
+# plus the price store, daily-returns.log, equity-curve.log and the MA /
+# volatility logs), runs every selected stage from scratch in a fresh
+# process, and records wall time, rows per second and peak RSS to a JSON
+# results file. --compare flags stages that got slower than a baseline.
+
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+import pipeline
+
+SYMBOL = "BENCH"
+OUT_PATH = Path("server/src/bench-results.json")
+DEFAULT_SIZES = "1e3,1e4,1e5"
+DEFAULT_STAGES = [
+    "equity_curve",
+    "equity_changes_cumsum",
+    "drawdown_table",
+    "time_since_peak",
+    "rolling_avg_return",
+    "rolling_volatility_returns",
+    "rolling_median_return",
+    "rolling_zscore_returns",
+    "up_down_counts",
+    "win_rate",
+    "profit_factor",
+    "returns_percentiles",
+    "monte_carlo_equity",
+    "ma_crossover_signal",
+    "correlation_snapshot",
+    "daily_returns",
+    "daily_volatility",
+]
+CHUNK = 200_000
+
+def _write_lines(path: Path, stamps, fmt, *cols):
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(0, len(stamps), CHUNK):
+            part = zip(stamps[i : i + CHUNK], *(c[i : i + CHUNK] for c in cols))
+            f.write("".join(fmt.format(*row) for row in part))
+
+def generate(root: Path, rows: int, seed: int = 7):
+    # synthetic inputs under root/server/src for `rows` 5-minute bars
+    import price_store
+
+    src = root / "server" / "src"
+    src.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2015-01-01T00:00:00")
+    ts = start + np.arange(rows, dtype=np.int64) * np.timedelta64(300, "s")
+    stamps = np.datetime_as_string(ts, unit="s").tolist()
+
+    rets = rng.normal(0.0002, 0.01, rows)
+    equity = 1000.0 * np.cumprod(1.0 + rets)
+    close = 100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.002, rows))
+
+    _write_lines(src / "daily-returns.log", stamps, "{},ret={:.6f}\n", rets.tolist())
+    _write_lines(src / "equity-curve.log", stamps, "{},equity={:.2f}\n", equity.tolist())
+    _write_lines(src / "daily-price.log", stamps, "{},symbol=" + SYMBOL + ",raw_keys=['Meta Data', 'Time Series (5min)']\n")
+    _write_lines(src / "daily-moving-average.log", stamps, "{},window=5,sma={:.2f}\n", close.tolist())
+    _write_lines(src / "daily-volatility.log", stamps, "{},window=5,vol={:.4f}\n", np.abs(rets * 100).tolist())
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        epochs = (ts - np.datetime64("1970-01-01T00:00:00")).astype(np.int64).tolist()
+        vol = rng.integers(1_000, 500_000, rows).tolist()
+        c = close.tolist()
+        price_store.append_bars(SYMBOL, list(zip(epochs, c, c, c, c, vol)))
+    finally:
+        os.chdir(cwd)
+
+def _child(root, stage, conn):
+    try:
+        os.chdir(root)
+        sys.path.insert(0, str(HERE))
+        with open(os.devnull, "w") as quiet:
+            sys.stdout = quiet
+            t0 = time.perf_counter()
+            pipeline.run_stage(stage)
+            wall = time.perf_counter() - t0
+        conn.send({"wall_s": wall, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss})
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+
+def _clean_outputs(src: Path, stage):
+    for out in stage.outputs:
+        for p in src.glob(out + "*"):
+            if p.is_file():
+                p.unlink()
+
+def run_stage(root: Path, stage, timeout: float):
+    # one stage, from scratch, in a fresh interpreter so RSS is its own
+    _clean_outputs(root / "server" / "src", stage)
+    ctx = mp.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(str(root), stage, child))
+    proc.start()
+    if not parent.poll(timeout):
+        proc.kill()
+        proc.join()
+        return {"error": f"timeout after {timeout:.0f}s"}
+    result = parent.recv()
+    proc.join()
+    return result
+
+def benchmark(sizes, stage_names, timeout=300.0, workdir=None):
+    by_name = {s.name: s for s in pipeline.STAGES}
+    results = []
+    for rows in sizes:
+        root = Path(tempfile.mkdtemp(prefix=f"srm-bench-{rows}-", dir=workdir))
+        try:
+            t0 = time.perf_counter()
+            generate(root, rows)
+            print(f"[{rows:>9}] generated inputs in {time.perf_counter() - t0:.2f}s")
+            for name in stage_names:
+                res = run_stage(root, by_name[name], timeout)
+                res.update(stage=name, rows=rows)
+                if "wall_s" in res:
+                    res["rows_per_s"] = rows / res["wall_s"] if res["wall_s"] else None
+                    print(f"[{rows:>9}] {name:<28} {res['wall_s']:>9.4f}s  {res['peak_rss_kb'] / 1024:>8.1f} MiB")
+                else:
+                    print(f"[{rows:>9}] {name:<28} {res['error']}")
+                results.append(res)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    # (stage, rows) entries at least `tolerance` slower than the baseline
+    base = {(r["stage"], r["rows"]): r for r in baseline.get("results", []) if "wall_s" in r}
+    flagged = []
+    for r in results:
+        b = base.get((r["stage"], r["rows"]))
+        if b is None:
+            continue
+        if "wall_s" not in r:
+            flagged.append((r["stage"], r["rows"], b["wall_s"], None))
+        elif r["wall_s"] > b["wall_s"] * (1 + tolerance):
+            flagged.append((r["stage"], r["rows"], b["wall_s"], r["wall_s"]))
+    return flagged
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the analytics stages on synthetic logs.")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts, e.g. 1e3,1e5,1e7")
+    ap.add_argument("--stages", default=",".join(DEFAULT_STAGES), help="comma-separated stage names")
+    ap.add_argument("--out", default=str(OUT_PATH), help="results JSON")
+    ap.add_argument("--compare", metavar="BASELINE", help="flag regressions against this results file")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--timeout", type=float, default=300.0, help="per-stage timeout in seconds")
+    ap.add_argument("--workdir", help="where to generate inputs (default: system temp)")
+    args = ap.parse_args(argv)
+
+    sizes = [int(float(s)) for s in args.sizes.split(",") if s]
+    names = [s for s in args.stages.split(",") if s]
+    known = {s.name for s in pipeline.STAGES}
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    os.environ["SRM_WATCH_SYMBOL"] = SYMBOL
+    os.environ.setdefault("SRM_MC_SEED", "7")
+    results = benchmark(sizes, names, args.timeout, args.workdir)
+
+    doc = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    print("Wrote", out)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        flagged = compare(results, baseline, args.tolerance)
+        for stage, rows, before, after in flagged:
+            now = "failed" if after is None else f"{after:.4f}s ({after / before:.2f}x)"
+            print(f"REGRESSION {stage} @ {rows} rows: {before:.4f}s -> {now}")
+        if flagged:
+            return 1
+        print("No regressions against", args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+# server/src/binlog.py
+# Fixed-width binary form of the metric logs. A `<log>.bin` file is a small
+# JSON header (the log's schema) followed by one packed little-endian record
+# per line: the timestamp as int64 epoch microseconds, then one typed field
+# per key. Because every record has the same size, row i sits at a known
+# offset (O(1) random access), and the record area can be wrapped without a
+# copy by memoryview / struct or numpy.frombuffer (Records.array()).
+#
+# Field kinds in a schema:
+#   .Nf      float64, written back to text with that format (".6f", ".2f")
+#   d        int64
+#   ts       timestamp, int64 epoch microseconds ("" is stored as MISSING)
+#   bool     True / False
+#   A|B|C    enum of those labels, stored as uint8
+# Logs listed in SCHEMAS use the pinned schema; any other log gets one
+# inferred from its lines. pack() refuses a log whose lines would not come
+# back byte-for-byte from the binary form, so to_text(to_binary(log)) is
+# always the original text.
+#
+#   python server/src/binlog.py pack daily-returns.log [...] | --all
+#   python server/src/binlog.py unpack daily-returns.log.bin [-o out.log]
+#   python server/src/binlog.py show daily-returns.log.bin [--rows -5:]
+
+from pathlib import Path
+from datetime import datetime, timedelta
+import argparse
+import json
+import mmap
+import re
+import struct
+import sys
+import log_writer
+import returns_cache
+
+ROOT = Path("server/src")
+
+MAGIC = b"SRMBIN1\n"
+VERSION = 1
+MISSING = -(1 << 63)
+# stamps are written back naive, as the scripts log them (parsed as UTC)
+EPOCH = datetime(1970, 1, 1)
+
+# log -> "name:kind ..." (csv logs list their columns after the timestamp)
+SCHEMAS = {
+    "daily-returns.log": "ret:.6f",
+    "equity-curve.log": "equity:.2f",
+    "equity-changes-cumsum.log": "delta:.2f cum_delta:.2f",
+    "drawdown-table.csv": "equity:.2f peak:.2f drawdown:.4f",
+    "max-drawdown.log": "max_drawdown:.4f current_drawdown:.4f peak_ts:ts trough_ts:ts bars_since_peak:d",
+    "time-since-peak.log": "days_since_peak:d",
+    "rolling-avg-return.log": "window:d avg_ret:.6f",
+    "rolling-volatility-returns.log": "window:d vol:.6f",
+    "rolling-median-return.log": "window:d median:.6f",
+    "rolling-zscore-returns.log": "window:d z:.4f",
+    "up-down-counts.log": "window:d ups:d downs:d",
+    "downside-deviation.log": "downside_dev:.6f",
+    "trend-state.log": "avg_ret:.6f state:UPTREND|DOWNTREND|SIDEWAYS",
+    "vol-regime.log": "vol:.6f regime:CALM|NORMAL|VOLATILE",
+    "ma-crossover-signal.log": "short:d long:d state:LONG|FLAT|NEUTRAL",
+    "position-hint.log": "trend:UPTREND|DOWNTREND|SIDEWAYS regime:CALM|NORMAL|VOLATILE position:OVERWEIGHT|NEUTRAL|UNDERWEIGHT",
+    "zscore-anomalies.log": "z:.4f anomaly:bool",
+    "win-rate.log": "trades:d win_rate:.4f",
+    "profit-factor.log": "profit_factor:.4f",
+    "risk-score.log": "score:.4f",
+}
+
+CODES = {"d": "q", "ts": "q", "bool": "?"}
+# struct code -> numpy field type
+NP_TYPES = {"q": "<i8", "d": "<f8", "?": "?", "B": "u1"}
+INT_RE = re.compile(r"-?\d+$")
+FLOAT_RE = re.compile(r"-?\d+\.(\d+)$")
+
+def bin_path(log: Path) -> Path:
+    return log.with_name(log.name + ".bin")
+
+def parse_spec(spec: str):
+    return [tuple(f.split(":", 1)) for f in spec.split()]
+
+def code_of(kind: str) -> str:
+    if kind in CODES:
+        return CODES[kind]
+    return "d" if kind.startswith(".") else "B"
+
+def record_format(fields) -> str:
+    return "<q" + "".join(code_of(kind) for _, kind in fields)
+
+def numpy_dtype(fields):
+    # the packed structured dtype matching record_format()
+    import numpy as np
+    return np.dtype([("ts", "<i8")] + [(name, NP_TYPES[code_of(kind)]) for name, kind in fields])
+
+def stamp_us(stamp: str) -> int:
+    return returns_cache.to_epoch_us(stamp) if stamp else MISSING
+
+def stamp_text(us: int) -> str:
+    if us == MISSING:
+        return ""
+    return (EPOCH + timedelta(microseconds=us)).isoformat()
+
+def split_line(line: str, style: str):
+    stamp, rest = line.split(",", 1)
+    if style == "csv":
+        return stamp, rest.split(",")
+    pairs = [p.split("=", 1) for p in rest.split(",")]
+    return stamp, pairs
+
+def encode_value(kind: str, text: str):
+    if kind.startswith("."):
+        return float(text)
+    if kind == "d":
+        return int(text)
+    if kind == "ts":
+        return stamp_us(text)
+    if kind == "bool":
+        if text not in ("True", "False"):
+            raise ValueError(f"not a bool: {text!r}")
+        return text == "True"
+    labels = kind.split("|")
+    if text not in labels:
+        raise ValueError(f"{text!r} is not one of {kind}")
+    return labels.index(text)
+
+def decode_value(kind: str, v) -> str:
+    if kind.startswith("."):
+        return format(v, kind)
+    if kind == "d":
+        return str(v)
+    if kind == "ts":
+        return stamp_text(v)
+    if kind == "bool":
+        return str(bool(v))
+    return kind.split("|")[v]
+
+def to_values(line: str, header):
+    stamp, parts = split_line(line, header["style"])
+    fields = header["fields"]
+    if len(parts) != len(fields):
+        raise ValueError(f"expected {len(fields)} fields, got {len(parts)}")
+    vals = [stamp_us(stamp)]
+    for (name, kind), part in zip(fields, parts):
+        if header["style"] == "kv":
+            if part[0] != name or len(part) != 2:
+                raise ValueError(f"expected {name}=, got {'='.join(part)!r}")
+            part = part[1]
+        vals.append(encode_value(kind, part))
+    return vals
+
+def to_line(vals, header) -> str:
+    texts = [decode_value(kind, v) for (_, kind), v in zip(header["fields"], vals[1:])]
+    if header["style"] == "kv":
+        texts = [f"{name}={t}" for (name, _), t in zip(header["fields"], texts)]
+    return ",".join([stamp_text(vals[0])] + texts)
+
+def infer_kind(values):
+    vals = [v for v in values if v != ""]
+    if not vals or all(returns_cache.to_epoch_us(v) and "T" in v for v in vals):
+        return "ts"
+    # numbers have no "missing" encoding, so a column with gaps is not one
+    if len(vals) == len(values):
+        if all(INT_RE.match(v) for v in vals):
+            return "d"
+        decimals = {len(m.group(1)) if m else None for m in map(FLOAT_RE.match, vals)}
+        if len(decimals) == 1 and None not in decimals:
+            return f".{decimals.pop()}f"
+    if set(vals) <= {"True", "False"} and len(vals) == len(values):
+        return "bool"
+    labels = sorted(set(values))
+    if len(labels) > 255 or any("|" in l or " " in l for l in labels):
+        raise ValueError("field is neither numeric nor a small label set")
+    return "|".join(labels)
+
+def infer(lines, style: str, csv_header: str = None):
+    if any("," not in l for l in lines):
+        raise ValueError("not a ts,... log")
+    rows = [split_line(l, style)[1] for l in lines]
+    if style == "kv":
+        names = [p[0] for p in rows[0]]
+        columns = [[p[1] if len(p) == 2 else "" for p in r] for r in rows]
+    else:
+        names = csv_header.split(",")[1:] if csv_header else [f"col{i}" for i in range(1, len(rows[0]) + 1)]
+        columns = rows
+    width = len(rows[0])
+    if any(len(r) != width for r in columns):
+        raise ValueError("lines do not share one set of fields")
+    kinds = [infer_kind([r[i] for r in columns]) for i in range(width)]
+    return list(zip(names, kinds))
+
+def read_text(log: Path):
+    with log.open("r", encoding="utf-8") as f:
+        lines = [l.rstrip("\n") for l in f]
+    lines = [l for l in lines if l.strip()]
+    header = lines.pop(0) if log.suffix == ".csv" and lines else None
+    return header, lines
+
+def make_header(log: Path, fields, csv_header=None):
+    return {
+        "version": VERSION,
+        "log": log.name,
+        "style": "csv" if log.suffix == ".csv" else "kv",
+        "csv_header": csv_header,
+        "fields": [list(f) for f in fields],
+        "format": record_format(fields),
+    }
+
+def header_bytes(header) -> bytes:
+    body = json.dumps(header).encode("utf-8")
+    # pad so the first record starts 8-byte aligned
+    size = len(MAGIC) + 4 + len(body)
+    body += b" " * (-size % 8)
+    return MAGIC + struct.pack("<I", len(body)) + body
+
+def pack(log: Path):
+    # (header, bytes) of the binary form of a text log
+    csv_header, lines = read_text(log)
+    style = "csv" if log.suffix == ".csv" else "kv"
+    if log.name in SCHEMAS:
+        fields = parse_spec(SCHEMAS[log.name])
+    elif lines:
+        try:
+            fields = infer(lines, style, csv_header)
+        except ValueError as e:
+            raise ValueError(f"{log}: {e}") from None
+    else:
+        raise ValueError(f"{log}: empty and no pinned schema")
+    header = make_header(log, fields, csv_header)
+    rec = struct.Struct(header["format"])
+    out = bytearray(header_bytes(header))
+    for i, line in enumerate(lines, 2 if csv_header else 1):
+        try:
+            vals = to_values(line, header)
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"{log}:{i}: {e}") from None
+        if to_line(vals, header) != line:
+            raise ValueError(f"{log}:{i}: {line!r} does not round-trip")
+        out += rec.pack(*vals)
+    return header, bytes(out)
+
+def to_binary(log: Path, out: Path = None) -> int:
+    header, data = pack(Path(log))
+    log_writer.replace(out or bin_path(Path(log)), data)
+    return (len(data) - len(header_bytes(header))) // struct.calcsize(header["format"])
+
+def to_text(path: Path, out: Path) -> int:
+    with Records(path) as recs:
+        lines = [recs.header["csv_header"]] if recs.header["csv_header"] else []
+        lines += recs.lines()
+        n = len(recs)
+    log_writer.replace_rows(out, lines)
+    return n
+
+def create(path: Path, log: str, csv_header: str = None):
+    # an empty .bin with the pinned schema, for producers that write records
+    fields = parse_spec(SCHEMAS[log])
+    log_writer.replace(path, header_bytes(make_header(Path(log), fields, csv_header)))
+
+def append(path: Path, rows):
+    # rows are (ts_us, field, ...) tuples in schema order; floats keep full
+    # precision (text only rounds them on export)
+    with Records(path) as recs:
+        rec = recs.struct
+        data = b"".join(rec.pack(*row) for row in rows)
+    log_writer.append(path, data)
+
+class Records:
+    # read-only, memory-mapped view of a .bin log
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path}: not a binary metric log")
+        (size,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._map[start:start + size])
+        if self.header.get("version") != VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: unsupported version {self.header.get('version')}")
+        self.fields = [tuple(f) for f in self.header["fields"]]
+        self.struct = struct.Struct(self.header["format"])
+        self.offset = start + size
+        # a record still being appended is left out until it is complete
+        self.n = (len(self._map) - self.offset) // self.struct.size
+        self.buf = memoryview(self._map)[self.offset:self.offset + self.n * self.struct.size]
+
+    def __len__(self):
+        return self.n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            self.buf.release()
+            self._map.close()
+        except BufferError:
+            # a view from array() / column() is still alive; the mapping is
+            # unmapped once the last such view is garbage collected
+            pass
+
+    def row(self, i: int):
+        # raw values of record i: (ts_us, field, ...)
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return self.struct.unpack_from(self.buf, i * self.struct.size)
+
+    def rows(self, start: int = 0, stop: int = None):
+        stop = self.n if stop is None else stop
+        size = self.struct.size
+        return list(self.struct.iter_unpack(self.buf[start * size:stop * size]))
+
+    def line(self, i: int) -> str:
+        return to_line(self.row(i), self.header)
+
+    def lines(self, start: int = 0, stop: int = None):
+        return [to_line(vals, self.header) for vals in self.rows(start, stop)]
+
+    def array(self):
+        # zero-copy numpy structured array over the record area; it stays
+        # valid after close(), which then leaves the unmapping to the GC
+        import numpy as np
+        return np.frombuffer(self.buf, dtype=numpy_dtype(self.fields))
+
+    def column(self, name: str):
+        return self.array()[name]
+
+def known_logs():
+    return [ROOT / name for name in SCHEMAS if (ROOT / name).exists()]
+
+def parse_rows(spec: str, n: int):
+    start, _, stop = spec.partition(":")
+    if not _:
+        i = int(start)
+        return slice(i, i + 1 if i != -1 else None).indices(n)[:2]
+    return slice(int(start) if start else None, int(stop) if stop else None).indices(n)[:2]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert metric logs to and from fixed-width binary records.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="text log -> <log>.bin")
+    p.add_argument("logs", nargs="*", type=Path)
+    p.add_argument("--all", action="store_true", help="every log with a pinned schema")
+    u = sub.add_parser("unpack", help="<log>.bin -> text log")
+    u.add_argument("bin", type=Path)
+    u.add_argument("-o", "--out", type=Path, help="write here instead of stdout")
+    s = sub.add_parser("show", help="print the schema and some records")
+    s.add_argument("bin", type=Path)
+    s.add_argument("--rows", default="-5:", help="row or start:stop, e.g. 0, -1, 100:110")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "pack":
+        logs = args.logs + (known_logs() if args.all else [])
+        if not logs:
+            ap.error("name logs to pack or pass --all")
+        failed = 0
+        for log in logs:
+            try:
+                n = to_binary(log)
+            except (OSError, ValueError) as e:
+                print(f"skipped {e}")
+                failed += 1
+                continue
+            before, after = log.stat().st_size, bin_path(log).stat().st_size
+            print(f"{log} -> {bin_path(log)}: {n} records, {before} -> {after} bytes")
+        if failed:
+            sys.exit(1)
+    elif args.cmd == "unpack":
+        if args.out:
+            n = to_text(args.bin, args.out)
+            print(f"{args.bin} -> {args.out}: {n} lines")
+        else:
+            with Records(args.bin) as recs:
+                if recs.header["csv_header"]:
+                    print(recs.header["csv_header"])
+                for line in recs.lines():
+                    print(line)
+    else:
+        with Records(args.bin) as recs:
+            print(f"{args.bin}: {recs.header['log']}, {len(recs)} records of {recs.struct.size} bytes")
+            print("fields: ts:ts " + " ".join(f"{name}:{kind}" for name, kind in recs.fields))
+            start, stop = parse_rows(args.rows, len(recs))
+            for line in recs.lines(start, stop):
+                print(line)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
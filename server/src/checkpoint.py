@@ -0,0 +1,85 @@
+# server/src/checkpoint.py
+# Resume points for the scripts that used to rebuild their whole output on
+# every run. A checkpoint sits next to the output (<name>.ckpt) and records
+# how far into the input we got, the state the script carries between rows
+# (window buffer, running equity, cumulative sum...) and the output size it
+# matches. If either side changed underneath us the caller starts over, so
+# an incremental run always produces the same bytes as a full rebuild.
+
+from pathlib import Path
+import json
+import os
+import log_writer
+
+def ckpt_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".ckpt")
+
+def load(out_path: Path):
+    try:
+        ck = json.loads(ckpt_path(out_path).read_text(encoding="utf-8"))
+        size = out_path.stat().st_size
+    except (OSError, ValueError):
+        return None
+    if ck.get("out_size") != size:
+        return None
+    return ck
+
+def save(out_path: Path, pos, state, anchor):
+    # buffered appends must be on disk before we record the output size
+    log_writer.flush()
+    ck = {"pos": pos, "state": state, "anchor": anchor, "out_size": out_path.stat().st_size}
+    log_writer.replace(ckpt_path(out_path), json.dumps(ck))
+
+def write_rows(out_path: Path, rows, append: bool):
+    # appends are locked O(1) writes; a rebuild replaces the file atomically
+    if not append:
+        log_writer.replace_rows(out_path, rows)
+    else:
+        log_writer.append_rows(out_path, rows)
+
+# --- inputs read through returns_cache: position is a row index ---
+
+def _row_anchor(cols, pos):
+    return [cols.ts[pos - 1], cols.rets[pos - 1]] if pos else None
+
+def _matches(state, match):
+    return not match or all(state.get(k) == v for k, v in match.items())
+
+def resume_returns(out_path: Path, cols, full=False, match=None):
+    # (first row still to process, saved state); (0, None) means rebuild.
+    # `match` lists state fields (engine kind, window...) that must agree.
+    ck = None if full else load(out_path)
+    if ck and 0 < ck["pos"] <= len(cols) and _row_anchor(cols, ck["pos"]) == ck["anchor"]:
+        if _matches(ck["state"], match):
+            return ck["pos"], ck["state"]
+    return 0, None
+
+def save_returns(out_path: Path, cols, state):
+    save(out_path, len(cols), state, _row_anchor(cols, len(cols)))
+
+# --- plain text inputs: position is a byte offset ---
+
+def resume_text(out_path: Path, in_path: Path, full=False):
+    ck = None if full else load(out_path)
+    if not ck or not ck["pos"]:
+        return 0, None
+    pos, tail = ck["pos"], ck["anchor"].encode("utf-8") + b"\n"
+    if in_path.stat().st_size < pos or pos < len(tail):
+        return 0, None
+    with in_path.open("rb") as f:
+        f.seek(pos - len(tail))
+        if f.read(len(tail)) != tail:
+            return 0, None
+    return pos, ck["state"]
+
+def read_lines_from(in_path: Path, pos: int):
+    # complete, non-empty lines after byte offset pos, and the new offset
+    with in_path.open("rb") as f:
+        f.seek(pos)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    lines = [l.strip() for l in data[:end].decode("utf-8").splitlines()]
+    return [l for l in lines if l], pos + end
+
+def save_text(out_path: Path, pos: int, state, last_line: str):
+    save(out_path, pos, state, last_line)
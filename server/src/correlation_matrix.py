@@ -0,0 +1,188 @@
+# server/src/correlation_matrix.py
+# Rolling N x N covariance and correlation of bar returns across the symbol
+# universe in the price store. Closes are joined on the timestamps every
+# symbol has, and the window is kept as running sums and cross-products
+# (sum r, sum r r^T), so new bars cost one matrix multiply however many
+# pairs there are. State is checkpointed next to the output; the latest
+# matrices go to a binary snapshot (see read_snapshot).
+
+from pathlib import Path
+from functools import reduce
+import os
+import struct
+import sys
+import numpy as np
+import price_store
+import settings
+import log_writer
+import instrument
+
+OUT_PATH = Path("server/src/correlation-matrix.bin")
+STATE_PATH = Path("server/src/correlation-matrix.state.npz")
+
+WINDOW = 60
+# rebuild the running sums from the window every this many bars
+RESYNC_EVERY = 10_000
+
+MAGIC = b"SRMCORR1"
+# magic, symbols, window, rows in window, last bar (epoch seconds)
+HEADER = struct.Struct("<8sIIIq")
+
+def universe():
+    names = os.getenv("SRM_WATCHLIST") or settings.analytics("correlation_symbols")
+    if isinstance(names, str):
+        names = [s.strip() for s in names.split(",")]
+    return sorted({s.upper() for s in names if s}) if names else price_store.symbols()
+
+def joined_closes(symbols, since=None):
+    # (ts, closes[T, N]) on the timestamps all symbols share, from `since` on
+    cols = []
+    for sym in symbols:
+        bars = price_store.load(sym)
+        if bars is None or not len(bars):
+            return np.empty(0, np.int64), np.empty((0, len(symbols)))
+        ts = np.frombuffer(bars.ts, dtype=np.int64)
+        close = np.frombuffer(bars.close, dtype=np.float64)
+        start = int(np.searchsorted(ts, since)) if since is not None else 0
+        cols.append((ts[start:], close[start:]))
+    common = reduce(np.intersect1d, (ts for ts, _ in cols))
+    closes = np.column_stack([close[np.searchsorted(ts, common)] for ts, close in cols])
+    return common, closes
+
+def simple_returns(closes):
+    prev, curr = closes[:-1], closes[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev != 0, (curr - prev) / np.where(prev != 0, prev, 1.0), 0.0)
+
+class RollingCrossMoments:
+    # running sum and cross-product of the last `window` return vectors
+    def __init__(self, n, window, state=None):
+        self.window = window
+        if state is None:
+            self.buf = np.empty((0, n))
+            self.sums = np.zeros(n)
+            self.cross = np.zeros((n, n))
+            self.steps = 0
+        else:
+            self.buf = state["buf"]
+            self.sums = state["sums"]
+            self.cross = state["cross"]
+            self.steps = int(state["steps"])
+
+    def push(self, rows):
+        if not len(rows):
+            return
+        merged = np.vstack([self.buf, rows])
+        n_drop = max(0, len(merged) - self.window)
+        dropped = self.buf[: min(n_drop, len(self.buf))]
+        # new rows that already fell out of the window never enter the sums
+        added = rows[max(0, n_drop - len(self.buf)):]
+        self.buf = merged[n_drop:]
+        self.steps += len(rows)
+        if self.steps >= RESYNC_EVERY:
+            self.resync()
+            return
+        self.sums += added.sum(axis=0) - dropped.sum(axis=0)
+        self.cross += added.T @ added - dropped.T @ dropped
+
+    def resync(self):
+        self.sums = self.buf.sum(axis=0)
+        self.cross = self.buf.T @ self.buf
+        self.steps = 0
+
+    def matrices(self):
+        # sample covariance and correlation (NaN where a series is flat)
+        m = len(self.buf)
+        if m < 2:
+            return None, None
+        mean = self.sums / m
+        cov = (self.cross - m * np.outer(mean, mean)) / (m - 1)
+        cov = (cov + cov.T) / 2
+        sd = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(sd, sd)
+        corr[np.outer(sd, sd) == 0] = np.nan
+        return cov, np.clip(corr, -1.0, 1.0)
+
+    def state(self):
+        return {"buf": self.buf, "sums": self.sums, "cross": self.cross, "steps": self.steps}
+
+def load_state(symbols, window, full=False):
+    if full or not STATE_PATH.exists():
+        return None, None
+    with np.load(STATE_PATH) as z:
+        if list(z["symbols"]) != symbols or int(z["window"]) != window:
+            return None, None
+        return int(z["last_ts"]), {k: z[k] for k in ("buf", "sums", "cross", "steps")}
+
+def save_state(symbols, window, last_ts, engine):
+    tmp = STATE_PATH.with_name(STATE_PATH.name + ".tmp.npz")
+    np.savez(tmp, symbols=np.array(symbols), window=window, last_ts=last_ts, **engine.state())
+    os.replace(tmp, STATE_PATH)
+
+def write_snapshot(path: Path, symbols, window, rows, last_ts, cov, corr):
+    # header, symbol names, then the upper triangles of cov and corr as float32
+    iu = np.triu_indices(len(symbols))
+    names = "\n".join(symbols).encode("utf-8")
+    log_writer.replace(path, b"".join([
+        HEADER.pack(MAGIC, len(symbols), window, rows, last_ts),
+        struct.pack("<I", len(names)),
+        names,
+        cov[iu].astype("<f4").tobytes(),
+        corr[iu].astype("<f4").tobytes(),
+    ]))
+
+def read_snapshot(path: Path = OUT_PATH):
+    # -> {"symbols", "window", "rows", "ts", "cov", "corr"}; None if missing
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    magic, n, window, rows, last_ts = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a correlation snapshot")
+    pos = HEADER.size
+    (size,) = struct.unpack_from("<I", data, pos)
+    pos += 4
+    symbols = data[pos : pos + size].decode("utf-8").split("\n") if n else []
+    pos += size
+    iu = np.triu_indices(n)
+    k = len(iu[0])
+    out = {"symbols": symbols, "window": window, "rows": rows, "ts": last_ts}
+    for name in ("cov", "corr"):
+        tri = np.frombuffer(data, dtype="<f4", count=k, offset=pos).astype(np.float64)
+        pos += 4 * k
+        full = np.zeros((n, n))
+        full[iu] = tri
+        full.T[iu] = tri
+        out[name] = full
+    return out
+
+@instrument.instrumented
+def main(full=False):
+    symbols = universe()
+    if len(symbols) < 2:
+        print("Need at least two symbols in the price store for a correlation matrix.")
+        return
+    window = int(settings.analytics("correlation_window", WINDOW))
+    last_ts, state = load_state(symbols, window, full)
+    ts, closes = joined_closes(symbols, last_ts)
+    if len(ts) < 2:
+        print("No new shared bars for the correlation matrix.")
+        return
+
+    engine = RollingCrossMoments(len(symbols), window, state)
+    engine.push(simple_returns(closes))
+    instrument.rows(parsed=(len(ts) - 1) * len(symbols), emitted=1)
+    cov, corr = engine.matrices()
+    save_state(symbols, window, int(ts[-1]), engine)
+    if cov is None:
+        print("Not enough shared bars for the correlation matrix yet.")
+        return
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    write_snapshot(OUT_PATH, symbols, window, len(engine.buf), int(ts[-1]), cov, corr)
+    print(f"Wrote {len(symbols)}x{len(symbols)} correlation matrix over {len(engine.buf)} bars "
+          f"({len(ts) - 1} new).")
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
@@ -1,19 +1,26 @@
 # server/src/correlation_snapshot.py
 # Correlates recent moving-average and volatility values as a toy metric.
+# The two logs are joined on timestamp; correlation_matrix.py does the
+# symbol-universe version.
 
 from pathlib import Path
 import math
 from datetime import datetime
+import log_writer
+import instrument
+import tail_reader
 
 MA_PATH = Path("server/src/daily-moving-average.log")
 VOL_PATH = Path("server/src/daily-volatility.log")
 OUT_PATH = Path("server/src/correlation-snapshot.log")
 
+WINDOW = 10
+# lines read from the end of each log to find WINDOW shared timestamps
+TAIL = 50 * WINDOW
+
 def load_values(p: Path, key: str):
-    if not p.exists():
-        return []
     vals = []
-    for line in p.read_text(encoding="utf-8").strip().splitlines():
+    for line in tail_reader.last_lines(p, TAIL):
         parts = line.split(",")
         ts = parts[0]
         kv = {k.split("=")[0]: k.split("=")[1] for k in parts[1:] if "=" in k}
@@ -34,24 +41,24 @@ def pearson(xs, ys):
         return None
     return cov / (sx * sy)
 
+@instrument.instrumented
 def main():
-    ma = load_values(MA_PATH, "sma")
+    ma = dict(load_values(MA_PATH, "sma"))
     vol = load_values(VOL_PATH, "vol")
-    # align by index (they are both daily series)
-    n = min(len(ma), len(vol), 10)
+    pairs = [(ma[ts], v) for ts, v in vol if ts in ma][-WINDOW:]
+    n = len(pairs)
     if n < 3:
         print("Not enough data for correlation.")
         return
-    xs = [v for _, v in ma[-n:]]
-    ys = [v for _, v in vol[-n:]]
+    xs = [x for x, _ in pairs]
+    ys = [y for _, y in pairs]
     r = pearson(xs, ys)
     if r is None:
         print("Correlation undefined.")
         return
     ts = datetime.utcnow().isoformat()
     line = f"{ts},n={n},corr={r:.4f}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text(OUT_PATH.read_text(encoding="utf-8") + line if OUT_PATH.exists() else line, encoding="utf-8")
+    log_writer.append(OUT_PATH, line)
     print("Appended correlation snapshot:", line.strip())
 
 if __name__ == "__main__":
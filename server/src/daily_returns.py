@@ -1,33 +1,51 @@
 from pathlib import Path
-from datetime import datetime
+import os
+import numpy as np
+import price_store
+import returns_cache
+import tail_reader
+import log_writer
+import instrument
 
-LOG_PATH = Path("server/src/daily-price.log")
+SYMBOL = os.getenv("SRM_WATCH_SYMBOL", "AAPL")
 OUT_PATH = Path("server/src/daily-returns.log")
 
+def simple_returns(close):
+    # rets[i - 1] is the return into bar i; a zero previous close gives 0.0
+    prev, curr = close[:-1], close[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev != 0, (curr - prev) / np.where(prev != 0, prev, 1.0), 0.0)
+
+@instrument.instrumented
 def main():
-    if not LOG_PATH.exists():
-        print("No daily-price.log yet.")
+    bars = price_store.load(SYMBOL)
+    if bars is None:
+        print(f"No price store for {SYMBOL} yet.")
         return
 
-    lines = LOG_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < 2:
+    if len(bars) < 2:
         print("Not enough data for returns.")
         return
 
-    values = [len(l) for l in lines]  # toy price proxy
-    rets = []
-    for i in range(1, len(values)):
-        prev, curr = values[i - 1], values[i]
-        r = (curr - prev) / prev if prev != 0 else 0.0
-        ts = lines[i].split(",")[0]
-        rets.append((ts, r))
-
-    last_ts, last_r = rets[-1]
-    line = f"{last_ts},ret={last_r:.6f}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(line)
-    print("Appended daily return:", line.strip())
+    ts = np.frombuffer(bars.ts, dtype=np.int64)
+    rets = simple_returns(np.frombuffer(bars.close, dtype=np.float64))
+
+    # the whole history is computed in one pass; only bars after the last
+    # logged return are appended
+    start = 1
+    last = tail_reader.last_record(OUT_PATH)
+    if last:
+        last_epoch = returns_cache.to_epoch_us(last[0]) // 1_000_000
+        start = max(start, int(np.searchsorted(ts, last_epoch, side="right")))
+
+    lines = [f"{bars.stamp(i)},ret={rets[i - 1]:.6f}\n" for i in range(start, len(bars))]
+    if not lines:
+        print("No new bars for returns.")
+        return
+
+    instrument.rows(parsed=len(bars), emitted=len(lines))
+    log_writer.append(OUT_PATH, "".join(lines))
+    print("Appended", len(lines), "daily returns, last:", lines[-1].strip())
 
 if __name__ == "__main__":
     main()
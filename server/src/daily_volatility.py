@@ -1,25 +1,24 @@
 # server/src/daily_volatility.py
-# Uses the lengths of daily-price.log entries as a toy price proxy
-# and computes rolling standard deviation as "volatility".
+# Rolling standard deviation of the last WINDOW closes in the price store
+# as "volatility".
 
 from pathlib import Path
-from datetime import datetime
 import math
+import os
+import price_store
+import log_writer
+import instrument
 
-LOG_PATH = Path("server/src/daily-price.log")
+SYMBOL = os.getenv("SRM_WATCH_SYMBOL", "AAPL")
 OUT_PATH = Path("server/src/daily-volatility.log")
 WINDOW = 5  # last 5 entries
 
-def load_series():
-    if not LOG_PATH.exists():
+def load_series(window):
+    bars = price_store.load(SYMBOL)
+    if bars is None:
         return []
-    lines = LOG_PATH.read_text(encoding="utf-8").strip().splitlines()
-    series = []
-    for line in lines:
-        ts = line.split(",")[0]
-        value = len(line)
-        series.append((ts, value))
-    return series
+    n = len(bars)
+    return [(bars.stamp(i), bars.close[i]) for i in range(max(0, n - window), n)]
 
 def rolling_volatility(series, window):
     if len(series) < window:
@@ -29,17 +28,16 @@ def rolling_volatility(series, window):
     var = sum((x - mean) ** 2 for x in window_data) / window
     return math.sqrt(var)
 
+@instrument.instrumented
 def main():
-    series = load_series()
+    series = load_series(WINDOW)
     vol = rolling_volatility(series, WINDOW)
     if vol is None:
         print("Not enough data for volatility yet.")
         return
     ts = series[-1][0]
     line = f"{ts},window={WINDOW},vol={vol:.4f}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(line)
+    log_writer.append(OUT_PATH, line)
     print("Appended volatility:", line.strip())
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 from pathlib import Path
 from datetime import datetime
+import log_writer
+import instrument
 
 ROOT = Path("server/src")
 OUT = ROOT / "data-quality.log"
@@ -11,6 +13,28 @@ LOGS = [
     "sharpe-ratio.log",
 ]
 
+SLOWEST = 5
+GROWTH_RUNS = 5
+
+def stage_timings(records, top=SLOWEST, runs=GROWTH_RUNS):
+    # slowest stages by their latest run, with growth = mean wall time of the
+    # last `runs` runs over the first `runs` runs still in the metrics log
+    by_stage = {}
+    for r in records:
+        if r.get("status") == "ok":
+            by_stage.setdefault(r["stage"], []).append(r["wall_s"])
+    rows = []
+    for stage, walls in by_stage.items():
+        growth = None
+        if len(walls) >= 2 * runs:
+            first = sum(walls[:runs]) / runs
+            last = sum(walls[-runs:]) / runs
+            growth = last / first if first else None
+        rows.append((stage, walls[-1], len(walls), growth))
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows[:top]
+
+@instrument.instrumented
 def main():
     lines = [f"Data quality check at {datetime.utcnow().isoformat()}", ""]
     for name in LOGS:
@@ -22,10 +46,16 @@ def main():
         status = "OK" if content else "EMPTY"
         lines.append(f"{name}: {status}, count={len(content)}")
 
+    slowest = stage_timings(instrument.load_records())
+    if slowest:
+        lines.append("")
+        lines.append(f"Slowest stages (latest run, growth = last {GROWTH_RUNS} vs first {GROWTH_RUNS} runs):")
+        for stage, wall, runs, growth in slowest:
+            trend = f"growth={growth:.2f}x" if growth is not None else "growth=n/a"
+            lines.append(f"{stage}: wall_s={wall:.4f}, runs={runs}, {trend}")
+
     lines.append("")
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    with OUT.open("a", encoding="utf-8") as f:
-        f.write("\n".join(lines) + "\n")
+    log_writer.append(OUT, "\n".join(lines) + "\n")
     print("Appended data-quality entry")
 
 if __name__ == "__main__":
@@ -1,18 +1,22 @@
 from pathlib import Path
+import returns_cache
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/down-streak.log")
 
+@instrument.instrumented
 def main():
-    if not RET_PATH.exists():
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if not lines:
+    if not len(cols):
         return
 
-    rets = [float(l.split("ret=")[1]) for l in lines]
+    rets = cols.rets
     streak = 0
     for r in reversed(rets):
         if r < 0:
@@ -20,10 +24,9 @@ def main():
         else:
             break
 
-    ts = lines[-1].split(",")[0]
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},down_streak_days={streak}\n")
+    ts = cols.stamp(-1)
+    instrument.rows(parsed=len(cols), emitted=1)
+    log_writer.append(OUT_PATH, f"{ts},down_streak_days={streak}\n")
     print("Appended down streak:", streak)
 
 if __name__ == "__main__":
@@ -1,31 +1,33 @@
+# server/src/downside_deviation.py
+# Kept for cron entries and callers that still run this script on its own:
+# sharpe_ratio.py now writes downside-deviation.log in its combined pass.
+# This appends only the downside-deviation.log line, computed with the same
+# totals and formula, and leaves the Sharpe logs and checkpoint alone.
+
 from pathlib import Path
-import math
+import numpy as np
+import returns_cache
+import sharpe_ratio
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
-OUT_PATH = Path("server/src/downside-deviation.log")
+OUT_PATH = sharpe_ratio.DOWNSIDE_PATH
 
+@instrument.instrumented
 def main():
-    if not RET_PATH.exists():
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or not len(cols):
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    rets = [float(l.split("ret=")[1]) for l in lines]
-    negatives = [min(r, 0.0) for r in rets]
-    if not negatives:
-        print("No negative returns.")
-        return
-
-    mean = sum(negatives) / len(negatives)
-    var = sum((x - mean) ** 2 for x in negatives) / len(negatives)
-    dd = math.sqrt(var)
-
-    ts = lines[-1].split(",")[0]
-    out = f"{ts},downside_dev={dd:.6f}\n"
+    totals = sharpe_ratio.totals_of(np.frombuffer(cols.rets, dtype=np.float64))
+    _, _, down = sharpe_ratio.ratios(*totals[1:], totals[0])
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(out)
+    ts = cols.stamp(-1)
+    instrument.rows(parsed=len(cols), emitted=1)
+    out = f"{ts},downside_dev={float(down):.6f}\n"
+    log_writer.append(OUT_PATH, out)
     print("Appended downside deviation:", out.strip())
 
 if __name__ == "__main__":
@@ -1,14 +1,100 @@
+# server/src/drawdown_table.py
+# Drawdown analytics from one pass over equity-curve.log: the per-row
+# underwater table (drawdown-table.csv), the latest max drawdown and time
+# since the last peak (max-drawdown.log), and one row per drawdown episode
+# with peak, trough and recovery (drawdown-episodes.csv). The running peak
+# and any open episode are checkpointed, so each run only parses the new
+# equity points.
+
 from pathlib import Path
+import sys
+import numpy as np
+import checkpoint
+import log_writer
+import instrument
 
 EQ_PATH = Path("server/src/equity-curve.log")
 OUT_PATH = Path("server/src/drawdown-table.csv")
+MDD_PATH = Path("server/src/max-drawdown.log")
+EPISODES_PATH = Path("server/src/drawdown-episodes.csv")
+
+TABLE_HEADER = "timestamp,equity,peak,drawdown"
+EPISODES_HEADER = "peak_ts,trough_ts,recovery_ts,peak,trough,depth,duration_bars,recovery_bars\n"
+
+def underwater(eq, peak=None):
+    # running peak and drawdown of eq, continuing from a previous peak
+    start = eq[0] if peak is None else peak
+    runmax = np.maximum.accumulate(np.concatenate(([start], eq)))[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(runmax != 0, (eq - runmax) / np.where(runmax != 0, runmax, 1.0), 0.0)
+    return runmax, dd
+
+def episode_row(ep, recovery_ts=None, recovery_idx=None, last_idx=None):
+    depth = (ep["trough"] - ep["peak"]) / ep["peak"] if ep["peak"] else 0.0
+    end = recovery_idx if recovery_idx is not None else last_idx
+    recover = "" if recovery_idx is None else str(recovery_idx - ep["trough_idx"])
+    return (f"{ep['peak_ts']},{ep['trough_ts']},{recovery_ts or ''},{ep['peak']:.2f},{ep['trough']:.2f},"
+            f"{depth:.4f},{end - ep['peak_idx']},{recover}\n")
+
+def scan(ts, eq, state):
+    # Walk the underwater runs of this chunk. Returns table rows, finished
+    # episode rows and the updated state (running peak, open episode, max dd).
+    runmax, dd = underwater(eq, state["peak"])
+    base = state["rows"]
+    under = dd < 0
+    edges = np.diff(np.concatenate(([0], under.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    done = []
+    ep = state["open"]
+    if ep is not None and len(eq) and not under[0]:
+        # the carried episode recovered on this chunk's first row
+        done.append(episode_row(ep, ts[0], base))
+        ep = None
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        if s > 0 or ep is None:
+            # a new episode from the peak row just before it (or the carried peak)
+            p_idx = base + s - 1 if s > 0 else state["peak_idx"]
+            p_ts = ts[s - 1] if s > 0 else state["peak_ts"]
+            ep = {"peak": float(runmax[s]), "peak_ts": p_ts, "peak_idx": p_idx,
+                  "trough": float("inf"), "trough_ts": None, "trough_idx": None}
+        t = s + int(np.argmin(eq[s:e]))
+        if eq[t] < ep["trough"]:
+            ep.update(trough=float(eq[t]), trough_ts=ts[t], trough_idx=base + t)
+        depth = (ep["trough"] - ep["peak"]) / ep["peak"] if ep["peak"] else 0.0
+        if depth < state["max_dd"]:
+            state.update(max_dd=depth, max_peak_ts=ep["peak_ts"], max_trough_ts=ep["trough_ts"])
+        if e < len(eq):
+            done.append(episode_row(ep, ts[e], base + e))
+            ep = None
+
+    at_peak = np.flatnonzero(~under)
+    if len(at_peak):
+        last = int(at_peak[-1])
+        state.update(peak_ts=ts[last], peak_idx=base + last)
+    state.update(peak=float(runmax[-1]), open=ep, rows=base + len(eq), current_dd=float(dd[-1]))
+    rows = [f"{t},{v:.2f},{p:.2f},{d:.4f}" for t, v, p, d in zip(ts, eq.tolist(), runmax.tolist(), dd.tolist())]
+    return rows, done, state
 
-def main():
+def new_state():
+    return {"peak": None, "peak_ts": None, "peak_idx": 0, "rows": 0, "open": None, "current_dd": 0.0,
+            "max_dd": 0.0, "max_peak_ts": None, "max_trough_ts": None, "episodes_size": 0}
+
+def episodes_ok(state) -> bool:
+    try:
+        return EPISODES_PATH.stat().st_size >= state["episodes_size"]
+    except FileNotFoundError:
+        return False
+
+@instrument.instrumented
+def main(full=False):
     if not EQ_PATH.exists():
         print("No equity-curve.log.")
         return
 
-    lines = EQ_PATH.read_text(encoding="utf-8").strip().splitlines()
+    start, state = checkpoint.resume_text(OUT_PATH, EQ_PATH, full)
+    if start and not episodes_ok(state):
+        start, state = 0, None
+    lines, pos = checkpoint.read_lines_from(EQ_PATH, start)
     if not lines:
         return
 
@@ -19,15 +105,35 @@ def main():
         ts.append(t)
         eq.append(float(rest.split("equity=")[1]))
 
-    peak = eq[0]
-    rows = ["timestamp,equity,peak,drawdown"]
-    for t, v in zip(ts, eq):
-        peak = max(peak, v)
-        dd = (v - peak) / peak if peak != 0 else 0.0
-        rows.append(f"{t},{v:.2f},{peak:.2f},{dd:.4f}")
+    state = state or new_state()
+    rows, done, state = scan(ts, np.array(eq), state)
+    instrument.rows(parsed=len(lines), emitted=len(rows))
+
+    checkpoint.write_rows(OUT_PATH, rows if start else [TABLE_HEADER] + rows, append=start > 0)
+
+    open_row = episode_row(state["open"], last_idx=state["rows"] - 1) if state["open"] else ""
+    if start:
+        closed = "".join(done).encode("utf-8")
+        with log_writer.locked(EPISODES_PATH) as f:
+            # the open episode (if any) is always the last row; rewrite it.
+            # The file is in append mode, so writes land at the new end but
+            # tell() would not follow the truncate; count the bytes instead.
+            f.truncate(state["episodes_size"])
+            f.write(closed + open_row.encode("utf-8"))
+        state["episodes_size"] += len(closed)
+    else:
+        body = EPISODES_HEADER + "".join(done)
+        state["episodes_size"] = len(body.encode("utf-8"))
+        log_writer.replace(EPISODES_PATH, body + open_row)
+
+    since = state["rows"] - 1 - state["peak_idx"]
+    log_writer.append(MDD_PATH, f"{ts[-1]},max_drawdown={state['max_dd']:.4f},current_drawdown={state['current_dd']:.4f},"
+                                f"peak_ts={state['max_peak_ts'] or ''},trough_ts={state['max_trough_ts'] or ''},"
+                                f"bars_since_peak={since}\n")
 
-    OUT_PATH.write_text("\n".join(rows) + "\n", encoding="utf-8")
-    print("Wrote drawdown-table.csv")
+    checkpoint.save_text(OUT_PATH, pos, state, lines[-1])
+    print(f"Updated drawdown-table.csv (+{len(rows)} rows), max drawdown {state['max_dd']:.4f}, "
+          f"{len(done)} episode(s) closed")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
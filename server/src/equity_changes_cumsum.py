@@ -1,33 +1,39 @@
 from pathlib import Path
+import sys
+import checkpoint
+import instrument
 
 EQ_PATH = Path("server/src/equity-curve.log")
 OUT_PATH = Path("server/src/equity-changes-cumsum.log")
 
-def main():
+@instrument.instrumented
+def main(full=False):
     if not EQ_PATH.exists():
         print("No equity-curve.log.")
         return
 
-    lines = EQ_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < 2:
+    start, state = checkpoint.resume_text(OUT_PATH, EQ_PATH, full)
+    lines, pos = checkpoint.read_lines_from(EQ_PATH, start)
+    if not start and len(lines) < 2:
         return
 
-    eq = []
-    ts = []
+    prev = state["prev"] if state else None
+    cum = state["cum"] if state else 0.0
+    out_lines = []
     for line in lines:
         t, rest = line.split(",", 1)
-        ts.append(t)
-        eq.append(float(rest.split("equity=")[1]))
-
-    deltas = [eq[i] - eq[i - 1] for i in range(1, len(eq))]
-    cum = 0.0
-    out_lines = []
-    for t, d in zip(ts[1:], deltas):
-        cum += d
-        out_lines.append(f"{t},delta={d:.2f},cum_delta={cum:.2f}")
+        eq = float(rest.split("equity=")[1])
+        if prev is not None:
+            d = eq - prev
+            cum += d
+            out_lines.append(f"{t},delta={d:.2f},cum_delta={cum:.2f}")
+        prev = eq
 
-    OUT_PATH.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    instrument.rows(parsed=len(lines), emitted=len(out_lines))
+    checkpoint.write_rows(OUT_PATH, out_lines, append=start > 0)
+    if lines:
+        checkpoint.save_text(OUT_PATH, pos, {"prev": prev, "cum": cum}, lines[-1])
     print("Updated equity-changes-cumsum.log")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
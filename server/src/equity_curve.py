@@ -1,28 +1,36 @@
 from pathlib import Path
+import sys
+import checkpoint
+import returns_cache
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/equity-curve.log")
 
 START_CAPITAL = 1000.0
 
-def main():
-    if not RET_PATH.exists():
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log yet.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    equity = START_CAPITAL
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full)
+    equity = state["equity"] if state else START_CAPITAL
     out_lines = []
 
-    for line in lines:
-        ts, rest = line.split(",", 1)
-        r = float(rest.split("ret=")[1])
+    for ts, r in zip(cols.stamps(start), cols.rets[start:]):
         equity *= (1.0 + r)
         out_lines.append(f"{ts},equity={equity:.2f}")
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
-    print("Rebuilt equity-curve.log with", len(out_lines), "points.")
+    instrument.rows(parsed=len(cols) - start, emitted=len(out_lines))
+    checkpoint.write_rows(OUT_PATH, out_lines, append=start > 0)
+    checkpoint.save_returns(OUT_PATH, cols, {"equity": equity})
+    if start:
+        print("Appended", len(out_lines), "points to equity-curve.log.")
+    else:
+        print("Rebuilt equity-curve.log with", len(out_lines), "points.")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
@@ -1,21 +1,23 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 SHAPE_PATH = Path("server/src/shape-stats.log")
 OUT_PATH = Path("server/src/fat-tail-flag.log")
 
+@instrument.instrumented
 def main():
-    if not SHAPE_PATH.exists():
+    rec = tail_reader.last_record(SHAPE_PATH)
+    if rec is None:
         print("No shape-stats.log.")
         return
 
-    line = SHAPE_PATH.read_text(encoding="utf-8").strip().splitlines()[-1]
-    ts, rest = line.split(",", 1)
-    kurt = float(rest.split("kurtosis=")[1])
+    ts, fields = rec
+    kurt = float(fields["kurtosis"])
     flag = kurt > 3.0  # crude threshold vs normal
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},kurtosis={kurt:.4f},fat_tails={flag}\n")
+    log_writer.append(OUT_PATH, f"{ts},kurtosis={kurt:.4f},fat_tails={flag}\n")
     print("Appended fat-tail flag.")
 
 if __name__ == "__main__":
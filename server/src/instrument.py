@@ -0,0 +1,147 @@
+# server/src/instrument.py
+# Per-stage run metrics for the server/src scripts. Wrap main() with
+# @instrument.instrumented (or use `with instrument.stage(name)`) and every run
+# appends one JSON record to run-metrics.log: wall and CPU time, bytes read
+# and written, rows parsed / emitted, and the peak RSS while the stage ran.
+# The peak comes from Linux's VmHWM, reset at the start of each stage via
+# /proc/self/clear_refs, so stages sharing a process (pipeline -j 1, the
+# daemon) each get their own; where that is unavailable the record carries
+# process_peak_rss_kb (ru_maxrss, the peak over the process lifetime)
+# instead. Scripts report row counts with instrument.rows(); outside a
+# stage it is a no-op.
+# SRM_PROFILE=1 (or a comma-separated list of stage names) also dumps a
+# cProfile file per run under server/src/profiles/.
+
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+import functools
+import json
+import os
+import resource
+import time
+import log_writer
+
+METRICS_PATH = Path("server/src/run-metrics.log")
+PROFILE_DIR = Path("server/src/profiles")
+
+_current = []
+
+class StageRecord:
+    def __init__(self, name: str):
+        self.stage = name
+        self.rows_parsed = 0
+        self.rows_emitted = 0
+        self.peak_rss_kb = 0
+
+def rows(parsed: int = 0, emitted: int = 0):
+    if _current:
+        _current[-1].rows_parsed += parsed
+        _current[-1].rows_emitted += emitted
+
+def _io_counters():
+    # (bytes read, bytes written) by this process, from /proc where available
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+def _peak_rss_kb():
+    # VmHWM: peak resident set since the last reset, or None off Linux
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _profiling(name: str) -> bool:
+    flag = os.getenv("SRM_PROFILE", "")
+    return flag in ("1", "all") or name in flag.split(",")
+
+@contextmanager
+def stage(name: str):
+    rec = StageRecord(name)
+    if _current:
+        # an enclosing stage keeps the peak it reached before this reset
+        _current[-1].peak_rss_kb = max(_current[-1].peak_rss_kb, _peak_rss_kb() or 0)
+    per_stage = _reset_peak_rss()
+    _current.append(rec)
+    profiler = None
+    if _profiling(name):
+        import cProfile
+        profiler = cProfile.Profile()
+    read0, written0 = _io_counters()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    status = "ok"
+    if profiler:
+        profiler.enable()
+    try:
+        yield rec
+    except BaseException as e:
+        status = f"error:{type(e).__name__}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        read1, written1 = _io_counters()
+        peak = _peak_rss_kb()
+        _current.pop()
+        entry = {
+            "ts": datetime.utcnow().isoformat(),
+            "stage": name,
+            "status": status,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "read_bytes": read1 - read0,
+            "write_bytes": written1 - written0,
+            "rows_parsed": rec.rows_parsed,
+            "rows_emitted": rec.rows_emitted,
+            "pid": os.getpid(),
+        }
+        if per_stage and peak is not None:
+            entry["peak_rss_kb"] = max(rec.peak_rss_kb, peak)
+        else:
+            entry["process_peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        log_writer.append(METRICS_PATH, json.dumps(entry) + "\n")
+        if profiler:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+            profiler.dump_stats(str(PROFILE_DIR / f"{name}-{stamp}-{os.getpid()}.prof"))
+
+def stage_name(func) -> str:
+    # the script's file name, so pipeline-loaded and direct runs match
+    return Path(func.__code__.co_filename).name.split(".")[0].replace("-", "_")
+
+def instrumented(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(stage_name(func)):
+            return func(*args, **kwargs)
+    return wrapper
+
+def load_records(limit: int = 5000):
+    # the most recent metric records, oldest first
+    import tail_reader
+    out = []
+    for line in tail_reader.last_lines(METRICS_PATH, limit, use_cache=False):
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
@@ -0,0 +1,122 @@
+# server/src/log_writer.py
+# The one way scripts write their outputs.
+#   append(path, text)   O(1) append under an exclusive flock on the file,
+#                        as a single write, so concurrent stages never
+#                        interleave half lines.
+#   replace(path, text)  rebuilt files are written to a temp file next to
+#                        the target and renamed over it; readers see either
+#                        the old or the new file, never a truncated one.
+#   batch()              group commit: appends inside the block are buffered
+#                        per file and written (and fsynced) once at the end.
+# A writer that was waiting on the lock of a file that has meanwhile been
+# renamed away (seglog.roll, replace) notices the inode change and reopens
+# the path. SRM_FSYNC=1 makes every commit durable before returning; with
+# batch() that is one fsync per file per batch instead of one per line.
+
+from contextlib import contextmanager
+from pathlib import Path
+import fcntl
+import os
+
+FSYNC = os.getenv("SRM_FSYNC", "0") not in ("", "0")
+# a batch flushes early once this much is buffered
+BATCH_BYTES = 1 << 20
+
+_pending = None
+
+@contextmanager
+def locked(path: Path, create: bool = True):
+    # the file at `path`, opened for appending and exclusively flocked
+    path = Path(path)
+    if create:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        f = open(path, "ab" if create else "r+b")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            same = os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            same = False
+        if same:
+            break
+        f.close()
+        if not create and not path.exists():
+            raise FileNotFoundError(path)
+    try:
+        yield f
+    finally:
+        f.close()
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+def _write(path: Path, data: bytes, fsync: bool):
+    with locked(path) as f:
+        f.seek(0, os.SEEK_END)
+        f.write(data)
+        if fsync:
+            _sync(f)
+
+def append(path: Path, text, fsync: bool = None):
+    # text is a str, or bytes for binary logs (see binlog.py)
+    if not text:
+        return
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    if _pending is not None:
+        _pending["files"].setdefault(str(path), []).append(data)
+        _pending["size"] += len(data)
+        if _pending["size"] >= BATCH_BYTES:
+            _flush(_pending)
+        return
+    _write(Path(path), data, FSYNC if fsync is None else fsync)
+
+def append_rows(path: Path, rows, fsync: bool = None):
+    # rows without trailing newlines, like checkpoint.write_rows
+    if rows:
+        append(path, "\n".join(rows) + "\n", fsync)
+
+def _flush(pending):
+    files, pending["files"], pending["size"] = pending["files"], {}, 0
+    for path, chunks in files.items():
+        _write(Path(path), b"".join(chunks), pending["fsync"])
+
+def flush():
+    # commit what the current batch has buffered so far (e.g. before a
+    # checkpoint records output sizes)
+    if _pending is not None:
+        _flush(_pending)
+
+@contextmanager
+def batch(fsync: bool = None):
+    global _pending
+    if _pending is not None:
+        # nested: the outermost batch commits
+        yield
+        return
+    _pending = {"files": {}, "size": 0, "fsync": FSYNC if fsync is None else fsync}
+    try:
+        yield
+    finally:
+        pending, _pending = _pending, None
+        _flush(pending)
+
+def replace(path: Path, data, fsync: bool = None):
+    # atomically swap in new contents (str or bytes) for a rebuilt file
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    flush()
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fsync = FSYNC if fsync is None else fsync
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if fsync:
+            _sync(f)
+    # let an append that is in flight on the old file finish first
+    with locked(path):
+        os.replace(tmp, path)
+
+def replace_rows(path: Path, rows, fsync: bool = None):
+    replace(path, "\n".join(rows) + "\n", fsync)
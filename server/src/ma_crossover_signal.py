@@ -1,17 +1,30 @@
 from pathlib import Path
+import sys
+import settings
+import tail_reader
+import log_writer
+import instrument
 
 EQ_PATH = Path("server/src/equity-curve.log")  # using equity as proxy price
 OUT_PATH = Path("server/src/ma-crossover-signal.log")
 
 SHORT = 5
 LONG = 20
+# averages within this many ulps are equal (NEUTRAL); the sums round, so
+# flat prices rarely give exactly equal SMAs (ma_sweep.states does the same).
+TIE_ULPS = 64
 
+@instrument.instrumented
 def main():
     if not EQ_PATH.exists():
         print("No equity-curve.log.")
         return
 
-    lines = EQ_PATH.read_text(encoding="utf-8").strip().splitlines()
+    short_w = int(settings.analytics("ma_short", SHORT))
+    long_w = int(settings.analytics("ma_long", LONG))
+    # only the last long_w points decide the latest state (see ma_sweep.py
+    # for the state over the whole history)
+    lines = tail_reader.last_lines(EQ_PATH, long_w)
     prices = []
     ts_list = []
     for line in lines:
@@ -21,30 +34,26 @@ def main():
         prices.append(price)
 
     n = len(prices)
-    if n < LONG:
+    if n < long_w:
         print("Not enough data.")
         return
 
-    def sma(window, i):
-        vals = prices[i - window + 1 : i + 1]
+    def sma(window):
+        vals = prices[n - window:]
         return sum(vals) / len(vals)
 
-    states = []
-    for i in range(LONG - 1, n):
-        short = sma(SHORT, i)
-        long = sma(LONG, i)
-        if short > long:
-            states.append("LONG")
-        elif short < long:
-            states.append("FLAT")
-        else:
-            states.append("NEUTRAL")
+    short = sma(short_w)
+    long = sma(long_w)
+    if abs(short - long) <= TIE_ULPS * sys.float_info.epsilon * max(abs(short), abs(long)):
+        last_state = "NEUTRAL"
+    elif short > long:
+        last_state = "LONG"
+    else:
+        last_state = "FLAT"
 
     ts = ts_list[-1]
-    last_state = states[-1]
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},short={SHORT},long={LONG},state={last_state}\n")
+    instrument.rows(parsed=n, emitted=1)
+    log_writer.append(OUT_PATH, f"{ts},short={short_w},long={long_w},state={last_state}\n")
     print("Appended MA crossover state:", last_state)
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+# server/src/ma_sweep.py
+# Parameter sweep for the MA crossover rule in ma_crossover_signal.py over
+# a grid of (short, long) windows and the full history. Every SMA comes from
+# one shared prefix-sum array (O(n) per window, whatever its length) and the
+# grid is split by long window over a process pool. For each pair it
+# reports how often the state changed, the hit rate of the bars held long
+# and the equity of holding while short > long (the signal at bar i is
+# applied to the return into bar i + 1). Results are ranked by equity into
+# ma-sweep.csv; the best pairs are what analytics.ma_short / ma_long in
+# config/settings.yaml are meant to be tuned to.
+#
+#   python server/src/ma_sweep.py [--symbol AAPL] [--top 10]
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import numpy as np
+import daily_returns
+import log_writer
+import price_store
+import settings
+import instrument
+
+EQ_PATH = Path("server/src/equity-curve.log")  # using equity as proxy price
+OUT_PATH = Path("server/src/ma-sweep.csv")
+
+SHORTS = (2, 50, 1)
+LONGS = (10, 250, 10)
+START_CAPITAL = 1000.0
+
+EPS = np.finfo(np.float64).eps
+TIE_ULPS = 64
+
+HEADER = "rank,short,long,state_changes,entries,bars_long,hit_rate,equity"
+
+def grid(spec):
+    lo, hi, step = (int(x) for x in (spec.split(",") if isinstance(spec, str) else spec))
+    return list(range(lo, hi + 1, step))
+
+def prefix(prices):
+    return np.concatenate(([0.0], np.cumsum(prices)))
+
+def sma(c, w):
+    # SMA of the w prices ending at each bar i >= w - 1, from prefix sums c
+    return (c[w:] - c[:-w]) / w
+
+def states(c, short, long, long_sma=None):
+    # +1 LONG, -1 FLAT, 0 NEUTRAL for bars long - 1 .. n - 1. Prefix-sum
+    # SMAs carry rounding of order eps * |c|, so equal averages (flat
+    # prices) rarely cancel exactly; differences within TIE_ULPS of that
+    # are NEUTRAL, as ma_crossover_signal.py sees them.
+    if long_sma is None:
+        long_sma = sma(c, long)
+    diff = sma(c, short)[long - short:] - long_sma
+    tie = np.abs(diff) <= TIE_ULPS * EPS * np.abs(c[long:]) * (1.0 / short + 1.0 / long)
+    return np.sign(np.where(tie, 0.0, diff))
+
+def score(st, rets):
+    # st[k] is the state at bar long - 1 + k; rets holds the return into
+    # each of those bars, so the position taken at st[k] earns rets[k + 1]
+    pos = (st[:-1] > 0)
+    held = rets[1:][pos]
+    changes = int(np.count_nonzero(st[1:] != st[:-1]))
+    entries = int(np.count_nonzero(pos[1:] & ~pos[:-1]) + (1 if len(pos) and pos[0] else 0))
+    hit = float(np.count_nonzero(held > 0)) / len(held) if len(held) else 0.0
+    equity = START_CAPITAL * float(np.prod(1.0 + held))
+    return changes, entries, len(held), hit, equity
+
+_shared = {}
+
+def _init(prices):
+    _shared["c"] = prefix(prices)
+    _shared["rets"] = daily_returns.simple_returns(prices)
+
+def _sweep_long(task):
+    long, shorts = task
+    c, rets = _shared["c"], _shared["rets"]
+    # rets[i - 1] is the return into bar i; keep bars long - 1 .. n - 1
+    r = np.concatenate(([0.0], rets))[long - 1:]
+    long_sma = sma(c, long)
+    return [(s, long) + score(states(c, s, long, long_sma), r) for s in shorts if s < long]
+
+def sweep(prices, shorts, longs, workers=1):
+    prices = np.asarray(prices, dtype=np.float64)
+    tasks = [(l, shorts) for l in longs if l < len(prices)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(prices,)) as pool:
+            parts = list(pool.map(_sweep_long, tasks))
+    else:
+        _init(prices)
+        parts = [_sweep_long(t) for t in tasks]
+    rows = [row for part in parts for row in part]
+    rows.sort(key=lambda row: (-row[6], row[0], row[1]))
+    return rows
+
+def equity_prices():
+    if not EQ_PATH.exists():
+        return None
+    with EQ_PATH.open("r", encoding="utf-8") as f:
+        return np.array([float(l.split("equity=")[1]) for l in f if "equity=" in l])
+
+@instrument.instrumented
+def main(symbol=None, top=10):
+    if symbol:
+        bars = price_store.load(symbol)
+        prices = np.frombuffer(bars.close, dtype=np.float64) if bars is not None else None
+    else:
+        prices = equity_prices()
+    if prices is None or len(prices) < 3:
+        print("Not enough data for an MA sweep.")
+        return
+
+    shorts = grid(settings.analytics("ma_sweep_short", SHORTS))
+    longs = grid(settings.analytics("ma_sweep_long", LONGS))
+    workers = int(settings.analytics("ma_sweep_workers", os.cpu_count() or 1))
+    rows = sweep(prices, shorts, longs, workers)
+    instrument.rows(parsed=len(prices), emitted=len(rows))
+
+    out = [f"{i},{s},{l},{ch},{en},{n},{hit:.4f},{eq:.2f}" for i, (s, l, ch, en, n, hit, eq) in enumerate(rows, 1)]
+    log_writer.replace_rows(OUT_PATH, [HEADER] + out)
+    print(f"Swept {len(rows)} (short, long) pairs over {len(prices)} bars; top {min(top, len(rows))}:")
+    print(HEADER)
+    for line in out[:top]:
+        print(line)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rank MA crossover (short, long) windows over the full history.")
+    ap.add_argument("--symbol", help="sweep a price-store symbol's closes instead of equity-curve.log")
+    ap.add_argument("--top", type=int, default=10, help="pairs to print")
+    args = ap.parse_args()
+    main(args.symbol, args.top)
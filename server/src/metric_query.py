@@ -0,0 +1,245 @@
+# server/src/metric_query.py
+# Time-range queries over the timestamp-sorted metric logs. query() finds
+# the first and last row of [start, end) by binary search over byte offsets,
+# so a one-day window costs a handful of seeks on a multi-year intraday log.
+# Segmented logs (see seglog.py) only open the segments overlapping the
+# range. `python server/src/metric_query.py serve` exposes the same thing
+# over HTTP for the dashboard:
+#   GET /api/metrics                          -> known metric names
+#   GET /api/metrics/<metric>?start=&end=&days=&downsample=
+# start/end are ISO timestamps (end exclusive), days=N means the last N
+# days up to the newest row, downsample=N caps the number of rows returned.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+import argparse
+import bisect
+import json
+import os
+import sys
+import threading
+
+import seglog
+import tail_reader
+
+ROOT = Path("server/src")
+PORT = int(os.getenv("SRM_QUERY_PORT", "5055"))
+
+# metric name -> log file; *.csv logs carry a header row
+LOGS = [
+    "daily-returns.log",
+    "daily-volatility.log",
+    "equity-curve.log",
+    "equity-changes-cumsum.log",
+    "drawdown-table.csv",
+    "max-drawdown.log",
+    "time-since-peak.log",
+    "ma-crossover-signal.log",
+    "rolling-avg-return.log",
+    "rolling-volatility-returns.log",
+    "rolling-median-return.log",
+    "rolling-zscore-returns.log",
+    "up-down-counts.log",
+    "shape-stats.log",
+    "sharpe-ratio.log",
+    "downside-deviation.log",
+    "trend-state.log",
+    "vol-regime.log",
+    "risk-score.log",
+    "signal-conflict.log",
+    "monte-carlo-equity.log",
+]
+METRICS = {name.rsplit(".", 1)[0]: name for name in LOGS}
+
+# below this many bytes the remaining window is scanned line by line
+SCAN_BYTES = 4096
+
+def stamp_of(line: bytes) -> str:
+    return line.split(b",", 1)[0].strip().decode("utf-8")
+
+def bisect_offset(f, lo: int, hi: int, target: str) -> int:
+    # Offset of the first line in [lo, hi) whose timestamp is >= target, or
+    # hi if there is none. lo must be a line start and rows sorted by time.
+    while hi - lo > SCAN_BYTES:
+        mid = (lo + hi) // 2
+        f.seek(mid - 1)
+        f.readline()
+        start = f.tell()
+        if start >= hi:
+            break
+        line = f.readline()
+        while not line.strip() and f.tell() < hi:
+            line = f.readline()
+        if line.strip() and stamp_of(line) < target:
+            lo = f.tell()
+        else:
+            hi = start
+    f.seek(lo)
+    while lo < hi:
+        line = f.readline()
+        if not line:
+            break
+        if stamp_of(line) >= target and line.strip():
+            return lo
+        lo += len(line)
+    return hi
+
+def _range_file(path: Path, start, end, header: bool):
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        return []
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        lo = len(f.readline()) if header else 0
+        # ignore a half-written last line
+        f.seek(max(lo, size - SCAN_BYTES))
+        tail = f.read()
+        hi = size - len(tail) + tail.rfind(b"\n") + 1 if b"\n" in tail else lo
+        if hi <= lo:
+            return []
+        a = bisect_offset(f, lo, hi, start) if start else lo
+        b = bisect_offset(f, a, hi, end) if end else hi
+        f.seek(a)
+        data = f.read(b - a)
+    return [l.strip() for l in data.decode("utf-8").splitlines() if l.strip()]
+
+def _range_segment(path: Path, seg, start, end):
+    if not seg["codec"]:
+        return _range_file(seglog.seg_dir(path) / seg["name"], start, end, False)
+    lines = [l.strip() for l in seglog.read_segment(path, seg).decode("utf-8").splitlines() if l.strip()]
+    stamps = [l.split(",", 1)[0] for l in lines]
+    a = bisect.bisect_left(stamps, start) if start else 0
+    b = bisect.bisect_left(stamps, end) if end else len(lines)
+    return lines[a:b]
+
+def _value(v: str):
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+def parse_rows(lines, columns=None):
+    rows = []
+    for line in lines:
+        if columns:
+            rows.append({k: _value(v) for k, v in zip(columns, line.split(","))})
+        else:
+            ts, fields = tail_reader.parse(line)
+            row = {"ts": ts}
+            row.update((k, _value(v)) for k, v in fields.items())
+            rows.append(row)
+    return rows
+
+def downsample(rows, limit: int):
+    # every k-th row so at most `limit` come back; the newest is always kept
+    if not limit or len(rows) <= limit:
+        return rows
+    step = -(-len(rows) // limit)
+    out = rows[::step]
+    if out[-1] is not rows[-1]:
+        out[-1] = rows[-1]
+    return out
+
+def columns_of(path: Path):
+    if path.suffix != ".csv":
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            head = f.readline().strip().split(",")
+    except FileNotFoundError:
+        return None
+    return ["ts"] + head[1:]
+
+def days_back(metric: str, days: float):
+    # start timestamp for "the last N days" relative to the newest row
+    path = ROOT / METRICS[metric]
+    last = tail_reader.last_line(path)
+    if not last or last.split(",", 1)[0] == "timestamp":
+        return None
+    newest = datetime.fromisoformat(last.split(",", 1)[0].replace("Z", "+00:00"))
+    return (newest.replace(tzinfo=None) - timedelta(days=days)).isoformat()
+
+def query(metric: str, start: str = None, end: str = None, limit: int = None):
+    if metric not in METRICS:
+        raise KeyError(metric)
+    path = ROOT / METRICS[metric]
+    columns = columns_of(path)
+    lines = []
+    for seg in seglog.segments(path, start, end):
+        lines += _range_segment(path, seg, start, end)
+    lines += _range_file(path, start, end, header=columns is not None)
+    return downsample(parse_rows(lines, columns), limit)
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["api", "metrics"]:
+            return self._send(200, {"metrics": sorted(METRICS)})
+        if len(parts) != 3 or parts[:2] != ["api", "metrics"]:
+            return self._send(404, {"error": "not found"})
+        metric = parts[2]
+        if metric not in METRICS:
+            return self._send(404, {"error": f"unknown metric: {metric}"})
+        try:
+            start = q.get("start")
+            if "days" in q:
+                start = days_back(metric, float(q["days"]))
+            limit = int(q["downsample"]) if "downsample" in q else None
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        rows = query(metric, start, q.get("end"), limit)
+        self._send(200, {"metric": metric, "start": start, "end": q.get("end"), "count": len(rows), "rows": rows})
+
+    def log_message(self, fmt, *args):
+        pass
+
+def start(host: str = "127.0.0.1", port: int = 0):
+    # serve on a daemon thread; port 0 picks a free one (see server_address)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query metric logs by time range.")
+    ap.add_argument("metric", help="metric name, or 'serve' to run the HTTP endpoint")
+    ap.add_argument("--start", help="first timestamp (inclusive)")
+    ap.add_argument("--end", help="last timestamp (exclusive)")
+    ap.add_argument("--days", type=float, help="last N days up to the newest row")
+    ap.add_argument("--downsample", type=int, help="return at most this many rows")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=PORT)
+    args = ap.parse_args(argv)
+
+    if args.metric == "serve":
+        server = ThreadingHTTPServer((args.host, args.port), Handler)
+        server.daemon_threads = True
+        print(f"Metric queries on http://{args.host}:{args.port}/api/metrics")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.metric not in METRICS:
+        ap.error(f"unknown metric: {args.metric} (known: {', '.join(sorted(METRICS))})")
+    start = days_back(args.metric, args.days) if args.days else args.start
+    for row in query(args.metric, start, args.end, args.downsample):
+        print(json.dumps(row))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
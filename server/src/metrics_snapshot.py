@@ -0,0 +1,107 @@
+# server/src/metrics_snapshot.py
+# One point-in-time view of the latest metric records. build() reads the
+# last record of every source log once and writes metrics-snapshot.json via
+# a temp file + rename, so readers never see a half-written document. The
+# exporters (dashboard-table, risk-mood row, stats summary, metrics CSV)
+# render from it instead of each reopening the logs, which means they all
+# show records from the same moment; server.js serves it from /api/summary.
+# Each source is fingerprinted (inode, size, mtime, segment index) and the
+# snapshot is only rebuilt when one of them changes.
+
+from pathlib import Path
+from datetime import datetime, timezone
+import json
+import os
+import sys
+import log_writer
+import seglog
+import tail_reader
+import instrument
+
+ROOT = Path("server/src")
+OUT_PATH = ROOT / "metrics-snapshot.json"
+
+SOURCES = {
+    "equity": "equity-curve.log",
+    "sharpe": "sharpe-ratio.log",
+    "max_drawdown": "max-drawdown.log",
+    "profit_factor": "profit-factor.log",
+    "win_rate": "win-rate.log",
+    "trend_state": "trend-state.log",
+    "market_mood": "market-mood.log",
+    "risk_flag": "daily-risk-flag.log",
+    "risk_score": "risk-score.log",
+    "price": "daily-price.log",
+    "ma": "daily-moving-average.log",
+    "vol": "daily-volatility.log",
+}
+
+# a log appended while we read gets re-read; give up after this many passes
+ATTEMPTS = 3
+
+def fingerprint(path: Path):
+    try:
+        st = os.stat(path)
+        own = [st.st_ino, st.st_size, st.st_mtime_ns]
+    except FileNotFoundError:
+        own = None
+    segs = seglog.index_key(path)
+    return [own, list(segs) if segs else None]
+
+def fingerprints():
+    return {name: fingerprint(ROOT / log) for name, log in SOURCES.items()}
+
+def load():
+    try:
+        return json.loads(OUT_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def record(line):
+    if line is None:
+        return None
+    ts, fields = tail_reader.parse(line)
+    return {"ts": ts, "line": line, "fields": fields}
+
+def write(snap):
+    log_writer.replace(OUT_PATH, json.dumps(snap) + "\n")
+
+def build(force=False):
+    # the current snapshot, rebuilt first if any source changed
+    old = load()
+    prints = fingerprints()
+    if not force and old and old.get("fingerprints") == prints:
+        return old
+    for _ in range(ATTEMPTS):
+        metrics = {name: record(tail_reader.last_line(ROOT / log)) for name, log in SOURCES.items()}
+        after = fingerprints()
+        if after == prints:
+            break
+        prints = after
+    snap = {
+        "version": (old or {}).get("version", 0) + 1,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "fingerprints": prints,
+        "metrics": metrics,
+    }
+    write(snap)
+    return snap
+
+def latest_line(snap, name: str):
+    rec = snap["metrics"].get(name)
+    return rec["line"] if rec else None
+
+@instrument.instrumented
+def main(force=False):
+    old = load()
+    snap = build(force)
+    fresh = sum(1 for rec in snap["metrics"].values() if rec)
+    rebuilt = not old or snap["version"] != old["version"]
+    instrument.rows(parsed=fresh if rebuilt else 0, emitted=int(rebuilt))
+    if not rebuilt:
+        print(f"metrics-snapshot.json v{snap['version']} is current")
+    else:
+        print(f"Wrote metrics-snapshot.json v{snap['version']} ({fresh}/{len(SOURCES)} metrics)")
+
+if __name__ == "__main__":
+    main(force="--force" in sys.argv)
@@ -0,0 +1,85 @@
+# server/src/moments.py
+# Mergeable running moments (count, mean and the central sums M2, M3, M4).
+# push() is the one-value update; merge() combines two partial states with
+# the pairwise formulas of Chan et al. / Pebay, so moments computed over
+# chunks, log segments, worker processes or symbols add up to the same
+# result as one pass over everything. of() builds a chunk's state in two
+# vectorized passes.
+
+import math
+
+class Moments:
+    __slots__ = ("n", "mean", "m2", "m3", "m4")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, m3=0.0, m4=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+
+    def push(self, x):
+        n1 = self.n
+        self.n += 1
+        n = self.n
+        d = x - self.mean
+        dn = d / n
+        dn2 = dn * dn
+        t = d * dn * n1
+        self.mean += dn
+        self.m4 += t * dn2 * (n * n - 3 * n + 3) + 6 * dn2 * self.m2 - 4 * dn * self.m3
+        self.m3 += t * dn * (n - 2) - 3 * dn * self.m2
+        self.m2 += t
+
+    def merge(self, other: "Moments") -> "Moments":
+        a, b = self, other
+        if not b.n:
+            return Moments(*a.state())
+        if not a.n:
+            return Moments(*b.state())
+        n = a.n + b.n
+        d = b.mean - a.mean
+        d2 = d * d
+        na, nb = a.n, b.n
+        mean = a.mean + d * nb / n
+        m2 = a.m2 + b.m2 + d2 * na * nb / n
+        m3 = (a.m3 + b.m3 + d * d2 * na * nb * (na - nb) / (n * n)
+              + 3 * d * (na * b.m2 - nb * a.m2) / n)
+        m4 = (a.m4 + b.m4 + d2 * d2 * na * nb * (na * na - na * nb + nb * nb) / (n ** 3)
+              + 6 * d2 * (na * na * b.m2 + nb * nb * a.m2) / (n * n)
+              + 4 * d * (na * b.m3 - nb * a.m3) / n)
+        return Moments(n, mean, m2, m3, m4)
+
+    __add__ = merge
+
+    def variance(self) -> float:
+        # population variance, like the rolling scripts
+        return self.m2 / self.n if self.n else 0.0
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+    def skew(self) -> float:
+        if self.n < 2 or self.m2 <= 0:
+            return 0.0
+        return math.sqrt(self.n) * self.m3 / self.m2 ** 1.5
+
+    def kurtosis(self) -> float:
+        # plain (not excess) kurtosis: 3.0 for a normal distribution
+        if self.n < 2 or self.m2 <= 0:
+            return 0.0
+        return self.n * self.m4 / (self.m2 * self.m2)
+
+    def state(self):
+        return [self.n, self.mean, self.m2, self.m3, self.m4]
+
+def of(values) -> Moments:
+    # exact moments of one chunk: mean first, then the centred power sums
+    import numpy as np
+    x = np.asarray(values, dtype=np.float64)
+    if not len(x):
+        return Moments()
+    mean = float(x.mean())
+    d = x - mean
+    d2 = d * d
+    return Moments(len(x), mean, float(d2.sum()), float((d2 * d).sum()), float((d2 * d2).sum()))
@@ -1,7 +1,12 @@
 from pathlib import Path
-import random
-import statistics
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import os
+import numpy as np
+import returns_cache
+import settings
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/monte-carlo-equity.log")
@@ -9,37 +14,77 @@ OUT_PATH = Path("server/src/monte-carlo-equity.log")
 SIMS = 100
 DAYS = 30
 START = 1000.0
+# Bootstrap indices drawn per batch; keeps memory flat however many paths run.
+CHUNK_CELLS = 4_000_000
 
+_growth = None
+
+def _init_worker(growth):
+    global _growth
+    _growth = growth
+
+def _terminals(job):
+    # one chunk of paths, compounded in log space when every factor is positive
+    paths, days, seed = job
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(_growth), size=(paths, days))
+    if (_growth > 0).all():
+        return np.exp(np.log(_growth)[idx].sum(axis=1))
+    return _growth[idx].prod(axis=1)
+
+def simulate(rets, sims, days, start=START, seed=None, workers=1):
+    # Each chunk gets its own child of one SeedSequence, so a given seed gives
+    # the same terminals whatever the worker count.
+    if sims < 1 or days < 1:
+        raise ValueError(f"need sims >= 1 and days >= 1, got sims={sims}, days={days}")
+    growth = 1.0 + np.asarray(rets, dtype=np.float64)
+    per_chunk = max(1, CHUNK_CELLS // days)
+    sizes = [min(per_chunk, sims - i) for i in range(0, sims, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(n, days, s) for n, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker, initargs=(growth,)) as pool:
+            parts = list(pool.map(_terminals, jobs))
+    else:
+        _init_worker(growth)
+        parts = [_terminals(j) for j in jobs]
+    return start * np.concatenate(parts)
+
+def summarize(terminals):
+    sims = len(terminals)
+    k5, k95 = int(0.05 * sims), int(0.95 * sims)
+    part = np.partition(terminals, [k5, k95])
+    return float(terminals.mean()), float(part[k5]), float(part[k95])
+
+@instrument.instrumented
 def main():
-    if not RET_PATH.exists():
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    rets = [
-        float(l.split("ret=")[1])
-        for l in RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    ]
-    if not rets:
+    rets = np.frombuffer(cols.rets, dtype=np.float64)
+    if not len(rets):
         print("No returns to sample.")
         return
 
-    terminals = []
-    for _ in range(SIMS):
-        eq = START
-        for _ in range(DAYS):
-            r = random.choice(rets)
-            eq *= 1 + r
-        terminals.append(eq)
+    sims = int(settings.analytics("monte_carlo_sims", SIMS))
+    days = int(settings.analytics("monte_carlo_days", DAYS))
+    seed = os.getenv("SRM_MC_SEED") or settings.analytics("monte_carlo_seed")
+    workers = int(settings.analytics("monte_carlo_workers", os.cpu_count() or 1))
+    if sims < 1 or days < 1:
+        print(f"analytics.monte_carlo_sims ({sims}) and monte_carlo_days ({days}) "
+              "in config/settings.yaml must both be at least 1; skipping.")
+        return
 
-    avg = statistics.mean(terminals)
-    p5 = sorted(terminals)[int(0.05 * SIMS)]
-    p95 = sorted(terminals)[int(0.95 * SIMS)]
+    terminals = simulate(rets, sims, days, START, int(seed) if seed is not None else None, workers)
+    avg, p5, p95 = summarize(terminals)
+    instrument.rows(parsed=len(rets), emitted=1)
 
     ts = datetime.utcnow().isoformat()
-    line = f"{ts},sims={SIMS},days={DAYS},mean={avg:.2f},p5={p5:.2f},p95={p95:.2f}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(line)
+    line = f"{ts},sims={sims},days={days},mean={avg:.2f},p5={p5:.2f},p95={p95:.2f}\n"
+    log_writer.append(OUT_PATH, line)
     print("Appended Monte Carlo snapshot:", line.strip())
 
 if __name__ == "__main__":
@@ -1,37 +1,49 @@
 // server/src/moving_average.js
-// Reads server/src/daily-price.log from the earlier script and
-// computes a simple moving average over the last N lines.
+// Reads the last N closes for the watch symbol from the columnar price
+// store (server/src/price-store/<SYMBOL>/) and computes a simple moving average.
 
 const fs = require("fs");
 const path = require("path");
 
-const LOG_PATH = path.join(__dirname, "daily-price.log");
+const SYMBOL = (process.env.SRM_WATCH_SYMBOL || "AAPL").toUpperCase();
+const STORE_DIR = path.join(__dirname, "price-store", SYMBOL);
 const OUT_PATH = path.join(__dirname, "daily-moving-average.log");
 const WINDOW = 5; // last 5 entries
 
-function parseLine(line) {
-  // example line: 2025-01-01T00:00:00Z,symbol=AAPL,raw_keys=...
-  const parts = line.split(",");
-  const ts = parts[0];
-  return { ts, value: line.length }; // use length as a cheap numeric proxy
+function readTail(file, count) {
+  // last `count` 8-byte values of a typed column file, oldest first
+  const p = path.join(STORE_DIR, file);
+  const fd = fs.openSync(p, "r");
+  try {
+    const rows = Math.floor(fs.fstatSync(fd).size / 8);
+    const n = Math.min(count, rows);
+    const buf = Buffer.alloc(n * 8);
+    fs.readSync(fd, buf, 0, n * 8, (rows - n) * 8);
+    return buf;
+  } finally {
+    fs.closeSync(fd);
+  }
 }
 
-if (!fs.existsSync(LOG_PATH)) {
-  console.log("No daily-price.log yet, skipping MA calc.");
+if (!fs.existsSync(path.join(STORE_DIR, "close.f64"))) {
+  console.log(`No price store for ${SYMBOL} yet, skipping MA calc.`);
   process.exit(0);
 }
 
-const lines = fs.readFileSync(LOG_PATH, "utf8").trim().split("\n");
-if (lines.length < WINDOW) {
+const closesBuf = readTail("close.f64", WINDOW);
+const tsBuf = readTail("ts.i64", WINDOW);
+const rows = Math.min(closesBuf.length, tsBuf.length) / 8;
+if (rows < WINDOW) {
   console.log("Not enough data points for moving average yet.");
   process.exit(0);
 }
 
-const last = lines.slice(-WINDOW).map(parseLine);
-const avg =
-  last.reduce((sum, row) => sum + row.value, 0) / last.length;
+let sum = 0;
+for (let i = 0; i < rows; i++) sum += closesBuf.readDoubleLE(i * 8);
+const avg = sum / rows;
 
-const latestTs = last[last.length - 1].ts;
+const latestEpoch = Number(tsBuf.readBigInt64LE((rows - 1) * 8));
+const latestTs = new Date(latestEpoch * 1000).toISOString().slice(0, 19);
 const outLine = `${latestTs},window=${WINDOW},sma=${avg.toFixed(2)}\n`;
 
 fs.appendFileSync(OUT_PATH, outLine, "utf8");
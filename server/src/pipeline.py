@@ -0,0 +1,230 @@
+# server/src/pipeline.py
+# Runs the server/src analytics scripts as one dependency graph inside a
+# single interpreter. Each stage declares the files it reads and writes,
+# the graph is derived from those, and independent branches are fanned out
+# over a process pool.
+
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import argparse
+import os
+import sys
+import time
+
+HERE = Path(__file__).resolve().parent
+
+Stage = namedtuple("Stage", "name script inputs outputs")
+
+# bars for the watch symbol land here via utils/server/src/price_ingest.py
+PRICE_CLOSE = f"price-store/{os.getenv('SRM_WATCH_SYMBOL', 'AAPL').upper()}/close.f64"
+
+# Inputs and outputs are file names under server/src. Files nobody here
+# produces (daily-price.log, the price store, the *.js outputs, ...) are
+# external inputs.
+STAGES = [
+    Stage("daily_metric", "daily_metric.py", ["daily-price.log"], ["daily-metrics.log"]),
+    Stage("daily_returns", "daily_returns.py", [PRICE_CLOSE], ["daily-returns.log"]),
+    Stage("daily_volatility", "daily_volatility.py", [PRICE_CLOSE], ["daily-volatility.log"]),
+    Stage("equity_curve", "equity_curve.py", ["daily-returns.log"], ["equity-curve.log"]),
+    Stage("drawdown_table", "drawdown_table.py", ["equity-curve.log"], ["drawdown-table.csv", "max-drawdown.log", "drawdown-episodes.csv"]),
+    Stage("time_since_peak", "time_since_peak.py", ["max-drawdown.log"], ["time-since-peak.log"]),
+    Stage("equity_changes_cumsum", "equity_changes_cumsum.py", ["equity-curve.log"], ["equity-changes-cumsum.log"]),
+    Stage("ma_crossover_signal", "ma_crossover_signal.py", ["equity-curve.log"], ["ma-crossover-signal.log"]),
+    Stage("rolling_avg_return", "rolling_avg_return.py", ["daily-returns.log"], ["rolling-avg-return.log"]),
+    Stage("trend_state", "trend_state.py", ["rolling-avg-return.log"], ["trend-state.log"]),
+    Stage("rolling_volatility_returns", "rolling_volatility_returns.py", ["daily-returns.log"], ["rolling-volatility-returns.log"]),
+    Stage("vol_regime", "vol_regime.py", ["rolling-volatility-returns.log"], ["vol-regime.log"]),
+    Stage("position_hint", "position_hint.py", ["trend-state.log", "vol-regime.log"], ["position-hint.log"]),
+    Stage("rolling_median_return", "rolling_median_return.py", ["daily-returns.log"], ["rolling-median-return.log"]),
+    Stage("rolling_zscore_returns", "rolling_zscore_returns.py", ["daily-returns.log"], ["rolling-zscore-returns.log"]),
+    Stage("zscore_anomalies", "zscore_anomalies.py", ["rolling-zscore-returns.log"], ["zscore-anomalies.log"]),
+    Stage("return_label", "return_label.py", ["rolling-zscore-returns.log"], ["return-labels.log"]),
+    Stage("up_down_counts", "up_down_counts.py", ["daily-returns.log"], ["up-down-counts.log"]),
+    Stage("up_streak", "up_streak.py", ["daily-returns.log"], ["up-streak.log"]),
+    Stage("down_streak", "down_streak.py", ["daily-returns.log"], ["down-streak.log"]),
+    Stage("market_mood", "market_mood.py", ["up-streak.log", "down-streak.log"], ["market-mood.log"]),
+    Stage("win_rate", "win_rate.py", ["daily-returns.log"], ["win-rate.log"]),
+    Stage("profit_factor", "profit_factor.py", ["daily-returns.log"], ["profit-factor.log"]),
+    Stage("sharpe_ratio", "sharpe_ratio.py", ["daily-returns.log"], ["sharpe-ratio.log", "downside-deviation.log"]),
+    Stage("returns_percentiles", "returns_percentiles.py", ["daily-returns.log"], ["returns-percentiles.log", "returns-percentiles.days.jsonl"]),
+    Stage("monte_carlo_equity", "monte_carlo_equity.py", ["daily-returns.log"], ["monte-carlo-equity.log"]),
+    Stage("mc_sanity_check", "mc_sanity_check.py", ["monte-carlo-equity.log", "equity-curve.log"], ["mc-sanity.log"]),
+    Stage("signal_conflict", "signal_conflict.py", ["ma-crossover-signal.log", "trend-state.log"], ["signal-conflict.log"]),
+    Stage("risk_score", "risk_score.py", ["sharpe-ratio.log", "max-drawdown.log", "rolling-volatility-returns.log"], ["risk-score.log"]),
+    Stage("shape_stats", "shape_stats.py", ["daily-returns.log"], ["shape-stats.log"]),
+    Stage("fat_tail_flag", "fat_tail_flag.py", ["shape-stats.log"], ["fat-tail-flag.log"]),
+    Stage("shape_label", "shape_label.py", ["shape-stats.log"], ["shape-label.log"]),
+    Stage("correlation_snapshot", "correlation_snapshot.py", ["daily-moving-average.log", "daily-volatility.log"], ["correlation-snapshot.log"]),
+    Stage("correlation_matrix", "correlation_matrix.py", ["price-store"], ["correlation-matrix.bin"]),
+    Stage("metrics_snapshot", "metrics_snapshot.py", ["equity-curve.log", "sharpe-ratio.log", "max-drawdown.log", "profit-factor.log", "win-rate.log", "trend-state.log", "market-mood.log", "daily-risk-flag.log", "risk-score.log", "daily-price.log", "daily-moving-average.log", "daily-volatility.log"], ["metrics-snapshot.json"]),
+    Stage("export_metrics_csv", "export_metrics_csv.py  python", ["metrics-snapshot.json"], ["metrics-export.csv"]),
+    Stage("stats_summary", "stats-summary.py", ["metrics-snapshot.json"], ["stats-summary.txt"]),
+    Stage("data_quality_check", "data_quality_check.py", ["daily-price.log", "daily-returns.log", "equity-curve.log", "sharpe-ratio.log"], ["data-quality.log"]),
+    Stage("valuation_note", "valuation_note.py", [], ["valuation-note.txt"]),
+]
+
+_modules = {}
+
+def load_stage(stage: Stage):
+    # Scripts are loaded once per process and their main() re-run on demand.
+    mod = _modules.get(stage.script)
+    if mod is None:
+        if str(HERE) not in sys.path:
+            sys.path.insert(0, str(HERE))
+        name = "srm_stage_" + stage.name
+        path = str(HERE / stage.script)
+        spec = importlib.util.spec_from_file_location(name, path, loader=SourceFileLoader(name, path))
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _modules[stage.script] = mod
+    return mod
+
+def run_stage(stage: Stage):
+    t0 = time.perf_counter()
+    load_stage(stage).main()
+    return stage.name, time.perf_counter() - t0
+
+def dependencies(stages):
+    producers = {}
+    for s in stages:
+        for out in s.outputs:
+            producers[out] = s.name
+    deps = {}
+    for s in stages:
+        deps[s.name] = {producers[i] for i in s.inputs if i in producers and producers[i] != s.name}
+    return deps
+
+def topo_order(stages, deps):
+    remaining = {s.name: set(deps[s.name]) for s in stages}
+    order = []
+    while remaining:
+        ready = [s.name for s in stages if s.name in remaining and not remaining[s.name]]
+        if not ready:
+            raise ValueError(f"dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            order.append(name)
+        for pending in remaining.values():
+            pending.difference_update(ready)
+    return order
+
+def select(stages, names):
+    # The requested stages plus everything downstream of them.
+    if not names:
+        return list(stages)
+    known = {s.name for s in stages}
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(unknown)}")
+    deps = dependencies(stages)
+    wanted = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for s in stages:
+            if s.name not in wanted and deps[s.name] & wanted:
+                wanted.add(s.name)
+                changed = True
+    return [s for s in stages if s.name in wanted]
+
+def critical_path(order, deps, timings):
+    finish = {}
+    prev = {}
+    for name in order:
+        if name not in timings:
+            continue
+        before = [d for d in deps[name] if d in finish]
+        start = max(before, key=lambda d: finish[d]) if before else None
+        finish[name] = timings[name] + (finish[start] if start else 0.0)
+        prev[name] = start
+    if not finish:
+        return [], 0.0
+    node = max(finish, key=finish.get)
+    total = finish[node]
+    path = []
+    while node:
+        path.append(node)
+        node = prev[node]
+    return path[::-1], total
+
+def run(stages, jobs=1):
+    deps = dependencies(stages)
+    order = topo_order(stages, deps)
+    by_name = {s.name: s for s in stages}
+    timings, failed = {}, {}
+
+    if jobs <= 1:
+        for name in order:
+            if deps[name] & failed.keys():
+                failed[name] = "skipped: upstream failed"
+                continue
+            try:
+                timings[name] = run_stage(by_name[name])[1]
+            except Exception as e:
+                failed[name] = f"{type(e).__name__}: {e}"
+        return order, deps, timings, failed
+
+    done = set()
+    started = set()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while True:
+            for name in order:
+                if name in started or not deps[name] <= (done | failed.keys()):
+                    continue
+                started.add(name)
+                if deps[name] & failed.keys():
+                    failed[name] = "skipped: upstream failed"
+                    continue
+                running[pool.submit(run_stage, by_name[name])] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                try:
+                    timings[name] = fut.result()[1]
+                    done.add(name)
+                except Exception as e:
+                    failed[name] = f"{type(e).__name__}: {e}"
+    return order, deps, timings, failed
+
+def report(order, deps, timings, failed, wall):
+    lines = ["", f"{'stage':<28} {'wall_s':>9}"]
+    for name in order:
+        if name in timings:
+            lines.append(f"{name:<28} {timings[name]:>9.4f}")
+        elif name in failed:
+            lines.append(f"{name:<28} {'FAILED':>9}  {failed[name]}")
+    path, total = critical_path(order, deps, timings)
+    lines.append("")
+    lines.append(f"critical path ({total:.4f}s): {' -> '.join(path)}")
+    lines.append(f"pipeline wall: {wall:.4f}s, stage sum: {sum(timings.values()):.4f}s")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the server/src analytics stages as one DAG.")
+    ap.add_argument("stages", nargs="*", help="only run these stages and their downstream")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                    help="worker processes for independent branches (1 = run inline)")
+    ap.add_argument("--list", action="store_true", help="print the stage order and exit")
+    args = ap.parse_args(argv)
+
+    stages = select(STAGES, args.stages)
+    if args.list:
+        deps = dependencies(stages)
+        for name in topo_order(stages, deps):
+            after = ", ".join(sorted(deps[name])) or "-"
+            print(f"{name:<28} after: {after}")
+        return 0
+
+    t0 = time.perf_counter()
+    order, deps, timings, failed = run(stages, args.jobs)
+    print(report(order, deps, timings, failed, time.perf_counter() - t0))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,18 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 ROOT = Path("server/src")
 OUT = ROOT / "position-hint.log"
 
 def last_field(path: Path, key: str):
-    if not path.exists():
+    rec = tail_reader.last_record(path)
+    if rec is None:
         return None
-    line = path.read_text(encoding="utf-8").strip().splitlines()[-1]
-    if key not in line:
-        return None
-    return line.split(key + "=")[1].split(",")[0]
+    return rec[1].get(key)
 
+@instrument.instrumented
 def main():
     trend = last_field(ROOT / "trend-state.log", "state")
     regime = last_field(ROOT / "vol-regime.log", "regime")
@@ -26,11 +28,9 @@ def main():
     else:
         pos = "NEUTRAL"
 
-    ts = last_field(ROOT / "trend-state.log", "state")  # reuse ts via that line context
+    ts = tail_reader.last_record(ROOT / "trend-state.log")[0]
     line = f"{ts},trend={trend},regime={regime},position={pos}\n"
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    with OUT.open("a", encoding="utf-8") as f:
-        f.write(line)
+    log_writer.append(OUT, line)
     print("Appended position hint:", line.strip())
 
 if __name__ == "__main__":
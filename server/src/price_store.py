@@ -0,0 +1,125 @@
+# server/src/price_store.py
+# Columnar store of intraday OHLCV bars, one directory per symbol under
+# server/src/price-store/. Every field is an append-only typed array file
+# (ts.i64 epoch seconds UTC, open/high/low/close.f64, volume.i64); ts doubles
+# as the sorted timestamp index. Readers get memory-mapped memoryviews, so a
+# scan over years of 5-minute bars never goes through text.
+
+from pathlib import Path
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+import fcntl
+import os
+import re
+from returns_cache import map_column
+
+STORE = Path("server/src/price-store")
+
+COLUMNS = (("ts", "q"), ("open", "d"), ("high", "d"), ("low", "d"), ("close", "d"), ("volume", "q"))
+PAYLOAD_KEYS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+# symbols become directory and file names
+SYMBOL_RE = re.compile(r"^[A-Z0-9.\-]+$")
+
+def check_symbol(symbol: str) -> str:
+    symbol = symbol.upper()
+    if not SYMBOL_RE.match(symbol) or symbol in (".", ".."):
+        raise ValueError(f"invalid symbol {symbol!r}")
+    return symbol
+
+def symbol_dir(symbol: str) -> Path:
+    return STORE / check_symbol(symbol)
+
+def column_path(symbol: str, name: str) -> Path:
+    code = dict(COLUMNS)[name]
+    return symbol_dir(symbol) / f"{name}.{'i64' if code == 'q' else 'f64'}"
+
+def _zone(name):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        return timezone.utc
+
+def parse_intraday(payload):
+    # TIME_SERIES_INTRADAY JSON -> [(epoch, open, high, low, close, volume)], oldest first
+    meta = payload.get("Meta Data", {})
+    tz = _zone(meta.get("6. Time Zone", "UTC"))
+    series = next((v for k, v in payload.items() if k.startswith("Time Series")), None)
+    if not isinstance(series, dict):
+        return []
+    bars = []
+    for stamp, bar in series.items():
+        dt = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
+        o, h, l, c, v = (bar.get(k) for k in PAYLOAD_KEYS)
+        bars.append((int(dt.timestamp()), float(o), float(h), float(l), float(c), int(float(v))))
+    bars.sort()
+    return bars
+
+def _rows(symbol: str) -> int:
+    # a crash mid-append can leave columns of different lengths; the shortest wins
+    sizes = []
+    for name, code in COLUMNS:
+        p = column_path(symbol, name)
+        sizes.append(p.stat().st_size // array(code).itemsize if p.exists() else 0)
+    return min(sizes)
+
+def append_bars(symbol: str, bars) -> int:
+    # appends bars newer than the last stored one; returns how many were added
+    d = symbol_dir(symbol)
+    d.mkdir(parents=True, exist_ok=True)
+    with open(d / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        rows = _rows(symbol)
+        last = None
+        if rows:
+            with column_path(symbol, "ts").open("rb") as f:
+                f.seek((rows - 1) * 8)
+                last = array("q", f.read(8))[0]
+        fresh = [b for b in bars if last is None or b[0] > last]
+        if not fresh:
+            return 0
+        for i, (name, code) in enumerate(COLUMNS):
+            with column_path(symbol, name).open("ab") as f:
+                f.truncate(rows * array(code).itemsize)
+                f.seek(0, os.SEEK_END)
+                array(code, (b[i] for b in fresh)).tofile(f)
+        return len(fresh)
+
+class PriceColumns:
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self.rows = _rows(symbol)
+        for name, code in COLUMNS:
+            setattr(self, name, map_column(column_path(symbol, name), code, self.rows))
+
+    def __len__(self):
+        return self.rows
+
+    def index_of(self, epoch: int) -> int:
+        # first row at or after epoch
+        return bisect_left(self.ts, epoch)
+
+    def stamp(self, i: int) -> str:
+        return datetime.fromtimestamp(self.ts[i], timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+_loaded = {}
+
+def load(symbol: str):
+    try:
+        mtime = column_path(symbol, "ts").stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    # reused while no bars were appended (see returns_cache.load)
+    key = (symbol.upper(), _rows(symbol), mtime)
+    hit = _loaded.get(key[0])
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    cols = PriceColumns(symbol)
+    _loaded[key[0]] = (key, cols)
+    return cols
+
+def symbols():
+    if not STORE.exists():
+        return []
+    return sorted(p.name for p in STORE.iterdir() if p.is_dir())
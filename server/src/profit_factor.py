@@ -1,29 +1,36 @@
 from pathlib import Path
+import returns_cache
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/profit-factor.log")
 
+def profit_factor(gross_profit, gross_loss):
+    # gross gains over gross losses (positive); also used by backtest.py
+    return gross_profit / gross_loss if gross_loss > 0 else float("inf")
+
+@instrument.instrumented
 def main():
-    if not RET_PATH.exists():
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < 2:
+    if len(cols) < 2:
         print("Not enough data.")
         return
 
-    rets = [float(l.split("ret=")[1]) for l in lines]
+    rets = cols.rets
     gross_profit = sum(r for r in rets if r > 0)
     gross_loss = -sum(r for r in rets if r < 0)
 
-    pf = gross_profit / gross_loss if gross_loss > 0 else float("inf")
-    ts = lines[-1].split(",")[0]
+    pf = profit_factor(gross_profit, gross_loss)
+    ts = cols.stamp(-1)
+    instrument.rows(parsed=len(cols), emitted=1)
     out = f"{ts},profit_factor={pf:.4f}\n"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(out)
+    log_writer.append(OUT_PATH, out)
     print("Appended profit factor:", out.strip())
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+# server/src/quantile_sketch.py
+# Mergeable quantile sketch (KLL, Karnin-Lang-Liberty). Items sit in levels;
+# an item on level h stands for 2^h inputs. When the sketch is over its
+# budget the lowest full level is sorted and every other item moves up a
+# level, so memory stays O(k log(n / k)) however many values are pushed.
+# Sketches of chunks, days or symbols merge into a sketch of their union.
+#
+# Error bound: the rank of quantile(p) is within EPS * n of p * n, with
+# EPS = 1.7 / k (about 0.85% at the default k = 200; see
+# test_quantile_sketch.py). Below k values nothing is compacted and the
+# answers are exact, with the same linear interpolation as numpy.quantile.
+# Compaction alternates the kept half per level instead of flipping a coin,
+# so feeding the same values in the same order always gives the same sketch
+# and an incremental run matches a rebuild.
+
+import bisect
+
+K = 200
+# normalized rank error bound at the default k
+EPS = 1.7 / K
+
+class KLL:
+    __slots__ = ("k", "n", "levels", "flips", "lo", "hi")
+
+    def __init__(self, k=K):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self.flips = [0]
+        self.lo = None
+        self.hi = None
+
+    def _capacity(self, h: int) -> int:
+        return max(2, int(self.k * (2 / 3) ** (len(self.levels) - 1 - h)))
+
+    def _size(self) -> int:
+        return sum(len(l) for l in self.levels)
+
+    def _budget(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compact(self, h: int):
+        # sort level h and promote every other item; an odd one out stays
+        if h + 1 == len(self.levels):
+            self.levels.append([])
+            self.flips.append(0)
+        items = sorted(self.levels[h])
+        keep = [items.pop()] if len(items) % 2 else []
+        self.levels[h + 1] += items[self.flips[h]::2]
+        self.flips[h] ^= 1
+        self.levels[h] = keep
+
+    def _compress(self):
+        # lazy compaction: only the lowest over-capacity level, only while
+        # the sketch as a whole is over budget
+        while self._size() > self._budget():
+            h = next(h for h, l in enumerate(self.levels) if len(l) >= self._capacity(h))
+            self._compact(h)
+
+    def push(self, x: float):
+        self.extend((x,))
+
+    def extend(self, values):
+        # Level 0 is a buffer of k raw values that is compacted whenever it
+        # fills up. Compactions therefore happen at fixed input counts, and
+        # how the values are batched across calls or runs never changes the
+        # sketch.
+        values = list(values)
+        i = 0
+        while i < len(values):
+            level0 = self.levels[0]
+            chunk = values[i:i + self.k - len(level0)]
+            i += len(chunk)
+            level0 += chunk
+            self.n += len(chunk)
+            lo, hi = min(chunk), max(chunk)
+            self.lo = lo if self.lo is None or lo < self.lo else self.lo
+            self.hi = hi if self.hi is None or hi > self.hi else self.hi
+            if len(level0) >= self.k:
+                self._compact(0)
+                self._compress()
+
+    def merge(self, other: "KLL") -> "KLL":
+        out = KLL(min(self.k, other.k))
+        depth = max(len(self.levels), len(other.levels))
+        out.levels = [[] for _ in range(depth)]
+        out.flips = self.flips + [0] * (depth - len(self.flips))
+        for s in (self, other):
+            for h, items in enumerate(s.levels):
+                out.levels[h] += items
+        out.n = self.n + other.n
+        ends = [v for s in (self, other) for v in (s.lo, s.hi) if v is not None]
+        out.lo, out.hi = (min(ends), max(ends)) if ends else (None, None)
+        out._compress()
+        return out
+
+    __add__ = merge
+
+    def _weighted(self):
+        items = sorted((x, 1 << h) for h, l in enumerate(self.levels) for x in l)
+        cum = []
+        total = 0
+        for _, w in items:
+            total += w
+            cum.append(total)
+        return items, cum
+
+    def quantiles(self, ps):
+        # value at each fraction p in [0, 1]; ranks are interpolated like
+        # numpy's default "linear" method
+        if not self.n:
+            return [0.0 for _ in ps]
+        items, cum = self._weighted()
+        out = []
+        for p in ps:
+            if p <= 0:
+                out.append(self.lo)
+                continue
+            if p >= 1:
+                out.append(self.hi)
+                continue
+            pos = p * (self.n - 1)
+            r = int(pos)
+            i = bisect.bisect_right(cum, r)
+            j = bisect.bisect_right(cum, r + 1) if r + 1 < self.n else i
+            a = items[min(i, len(items) - 1)][0]
+            b = items[min(j, len(items) - 1)][0]
+            out.append(a + (b - a) * (pos - r))
+        return out
+
+    def quantile(self, p: float) -> float:
+        return self.quantiles([p])[0]
+
+    def rank(self, x: float) -> int:
+        # approximate number of inputs <= x
+        return sum(1 << h for h, l in enumerate(self.levels) for v in l if v <= x)
+
+    def state(self):
+        return {"k": self.k, "n": self.n, "levels": self.levels, "flips": self.flips, "lo": self.lo, "hi": self.hi}
+
+    @classmethod
+    def from_state(cls, st) -> "KLL":
+        s = cls(st["k"])
+        s.n = st["n"]
+        s.levels = [list(l) for l in st["levels"]]
+        s.flips = list(st["flips"])
+        s.lo, s.hi = st["lo"], st["hi"]
+        return s
+
+def of(values, k=K) -> KLL:
+    s = KLL(k)
+    s.extend(values)
+    return s
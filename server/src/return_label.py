@@ -1,25 +1,27 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 Z_PATH = Path("server/src/rolling-zscore-returns.log")
 OUT_PATH = Path("server/src/return-labels.log")
 THRESH = 2.0
 
+@instrument.instrumented
 def main():
     if not Z_PATH.exists():
         print("No rolling-zscore-returns.log.")
         return
 
-    lines = Z_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if not lines:
+    rec = tail_reader.last_record(Z_PATH)
+    if rec is None:
         return
 
-    ts, rest = lines[-1].split(",", 1)
-    z = float(rest.split("z=")[1])
+    ts, fields = rec
+    z = float(fields["z"])
     label = "OUTLIER" if abs(z) > THRESH else "NORMAL"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},z={z:.4f},label={label}\n")
+    log_writer.append(OUT_PATH, f"{ts},z={z:.4f},label={label}\n")
     print("Appended return label:", label)
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+# server/src/returns_cache.py
+# Columnar sidecar for daily-returns.log shared by every return consumer.
+#
+# Next to the log we keep three typed column files - .ret (float64 returns),
+# .ts (int64 epoch microseconds) and .off (int64 byte offset of each line) -
+# plus a small .meta JSON recording the log size/mtime they were built from.
+# When the log grows only the appended tail is parsed; if it shrank or was
+# rewritten the columns are rebuilt. Readers get memory-mapped memoryviews,
+# which numpy.frombuffer can wrap without a copy.
+
+from pathlib import Path
+from array import array
+from datetime import datetime, timedelta, timezone
+import fcntl
+import json
+import mmap
+import os
+
+RET_PATH = Path("server/src/daily-returns.log")
+
+VERSION = 1
+COLUMNS = (("ret", "d"), ("ts", "q"), ("off", "q"))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def sidecar(log_path: Path, suffix: str) -> Path:
+    return log_path.with_name(f"{log_path.name}.{suffix}")
+
+def to_epoch_us(stamp: str) -> int:
+    try:
+        dt = datetime.fromisoformat(stamp)
+    except ValueError:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+def read_meta(log_path: Path):
+    try:
+        meta = json.loads(sidecar(log_path, "meta").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == VERSION else None
+
+def parse_tail(log_path: Path, offset: int):
+    # Only complete lines are consumed; a half-written last line is picked
+    # up on the next refresh once its newline lands.
+    with log_path.open("rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    cols = {name: array(code) for name, code in COLUMNS}
+    pos = 0
+    for raw in data[:end].splitlines(keepends=True):
+        line = raw.strip()
+        if line:
+            stamp, rest = line.decode("utf-8").split(",", 1)
+            cols["ret"].append(float(rest.split("ret=")[1]))
+            cols["ts"].append(to_epoch_us(stamp))
+            cols["off"].append(offset + pos)
+        pos += len(raw)
+    return cols, offset + end
+
+def _appendable(log_path: Path, meta, size: int) -> bool:
+    if meta is None or size <= meta["size"]:
+        return False
+    for name, code in COLUMNS:
+        p = sidecar(log_path, name)
+        if not p.exists() or p.stat().st_size < meta["rows"] * array(code).itemsize:
+            return False
+    if meta["offset"] == 0:
+        return True
+    # cheap guard against a rewrite that happened to make the file longer
+    with log_path.open("rb") as f:
+        f.seek(meta["offset"] - 1)
+        return f.read(1) == b"\n"
+
+def refresh(log_path: Path = RET_PATH):
+    st = log_path.stat()
+    meta = read_meta(log_path)
+    if meta and meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns:
+        return meta
+
+    with open(sidecar(log_path, "lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        st = log_path.stat()
+        meta = read_meta(log_path)
+        if meta and meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns:
+            return meta
+
+        if _appendable(log_path, meta, st.st_size):
+            start, rows = meta["offset"], meta["rows"]
+        else:
+            start, rows = 0, 0
+        cols, offset = parse_tail(log_path, start)
+
+        for name, code in COLUMNS:
+            with sidecar(log_path, name).open("r+b" if rows else "wb") as f:
+                f.truncate(rows * array(code).itemsize)
+                f.seek(0, os.SEEK_END)
+                cols[name].tofile(f)
+
+        meta = {
+            "version": VERSION,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "offset": offset,
+            "rows": rows + len(cols["ret"]),
+        }
+        tmp = sidecar(log_path, "meta.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, sidecar(log_path, "meta"))
+        return meta
+
+def map_column(path: Path, code: str, rows: int):
+    if rows == 0:
+        return memoryview(array(code))
+    with path.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm).cast(code)[:rows]
+
+class ReturnColumns:
+    def __init__(self, log_path: Path, meta):
+        self.log_path = log_path
+        self.meta = meta
+        self.rows = meta["rows"]
+        self.end = meta["offset"]
+        self.rets = map_column(sidecar(log_path, "ret"), "d", self.rows)
+        self.ts = map_column(sidecar(log_path, "ts"), "q", self.rows)
+        self.offsets = map_column(sidecar(log_path, "off"), "q", self.rows)
+
+    def __len__(self):
+        return self.rows
+
+    def stamp(self, i: int) -> str:
+        # original timestamp text of row i, read straight from the log
+        with self.log_path.open("rb") as f:
+            f.seek(self.offsets[i])
+            return f.readline().decode("utf-8").strip().split(",", 1)[0]
+
+    def stamps(self, start: int = 0, stop: int = None):
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        if start >= stop:
+            return []
+        end = self.offsets[stop] if stop < self.rows else self.end
+        with self.log_path.open("rb") as f:
+            f.seek(self.offsets[start])
+            data = f.read(end - self.offsets[start]).decode("utf-8")
+        return [l.strip().split(",", 1)[0] for l in data.splitlines() if l.strip()]
+
+_loaded = {}
+
+def load(log_path: Path = RET_PATH):
+    if not log_path.exists():
+        return None
+    meta = refresh(log_path)
+    # long-running callers (analytics_daemon) reuse the mappings until the log changes
+    hit = _loaded.get(str(log_path))
+    if hit is not None and hit.meta == meta:
+        return hit
+    cols = ReturnColumns(log_path, meta)
+    _loaded[str(log_path)] = cols
+    return cols
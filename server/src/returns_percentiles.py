@@ -1,31 +1,109 @@
 from pathlib import Path
+import argparse
+import json
+import checkpoint
+import quantile_sketch
+import returns_cache
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/returns-percentiles.log")
+# one {"day": ..., "sketch": ...} line per finished day, for range queries
+DAYS_PATH = Path("server/src/returns-percentiles.days.jsonl")
 
-def percentile(sorted_vals, p):
-    if not sorted_vals:
-        return 0.0
-    k = int(p * (len(sorted_vals) - 1))
-    return sorted_vals[k]
+QUANTILES = (0.05, 0.50, 0.95)
 
-def main():
-    if not RET_PATH.exists():
+def day_of(ts: str) -> str:
+    return ts[:10]
+
+def days_ok(state) -> bool:
+    try:
+        return DAYS_PATH.stat().st_size == state["days_size"]
+    except FileNotFoundError:
+        return False
+
+def day_sketches(start=None, end=None):
+    # (day, sketch) for each finished day in [start, end], then the open day
+    state = checkpoint.load(OUT_PATH)
+    state = state["state"] if state else None
+    if DAYS_PATH.exists():
+        with DAYS_PATH.open("r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                if (start and rec["day"] < start) or (end and rec["day"] > end):
+                    continue
+                yield rec["day"], quantile_sketch.KLL.from_state(rec["sketch"])
+    if state and state["day"] and (not start or state["day"] >= start) and (not end or state["day"] <= end):
+        yield state["day"], quantile_sketch.KLL.from_state(state["open"])
+
+def range_quantiles(ps, start=None, end=None):
+    # quantiles of all returns from day `start` to day `end` (inclusive)
+    sketch = quantile_sketch.KLL()
+    for _, s in day_sketches(start, end):
+        sketch = sketch.merge(s)
+    return sketch.n, sketch.quantiles(ps)
+
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or not len(cols):
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    vals = sorted(float(l.split("ret=")[1]) for l in lines)
-    p05 = percentile(vals, 0.05)
-    p50 = percentile(vals, 0.50)
-    p95 = percentile(vals, 0.95)
-    ts = lines[-1].split(",")[0]
+    match = {"kind": "kll", "k": quantile_sketch.K}
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, match)
+    if start and not days_ok(state):
+        start, state = 0, None
+    if start == len(cols):
+        print("No new returns for percentiles.")
+        return
+
+    if state:
+        total = quantile_sketch.KLL.from_state(state["all"])
+        today, day = state["day"], quantile_sketch.KLL.from_state(state["open"])
+    else:
+        total, today, day = quantile_sketch.KLL(), None, quantile_sketch.KLL()
+    rets = cols.rets[start:]
+    total.extend(rets)
+
+    # finished days go to the days file; the last one stays open
+    closed = []
+    lo = 0
+    for i, ts in enumerate(cols.stamps(start)):
+        d = day_of(ts)
+        if d != today:
+            if today is not None:
+                day.extend(rets[lo:i])
+                closed.append(json.dumps({"day": today, "sketch": day.state()}))
+                day, lo = quantile_sketch.KLL(), i
+            today = d
+    day.extend(rets[lo:])
+    if closed or start:
+        checkpoint.write_rows(DAYS_PATH, closed, append=start > 0)
+    else:
+        log_writer.replace(DAYS_PATH, "")
+
+    p05, p50, p95 = total.quantiles(QUANTILES)
+    ts = cols.stamp(-1)
+    instrument.rows(parsed=len(rets), emitted=1 + len(closed))
 
     line = f"{ts},p05={p05:.6f},p50={p50:.6f},p95={p95:.6f}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(line)
+    log_writer.append(OUT_PATH, line)
+    checkpoint.save_returns(OUT_PATH, cols, dict(match, all=total.state(), day=today, open=day.state(),
+                                                 days_size=DAYS_PATH.stat().st_size))
     print("Appended returns percentiles:", line.strip())
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Return percentiles from the persisted quantile sketches.")
+    ap.add_argument("--full", action="store_true", help="rebuild the sketches from the whole history")
+    ap.add_argument("--from", dest="start", help="first day (YYYY-MM-DD) of a range query")
+    ap.add_argument("--to", dest="end", help="last day (YYYY-MM-DD, inclusive) of a range query")
+    ap.add_argument("--q", default="0.05,0.5,0.95", help="comma-separated quantiles for a range query")
+    args = ap.parse_args()
+    if args.start or args.end:
+        ps = [float(p) for p in args.q.split(",")]
+        n, qs = range_quantiles(ps, args.start, args.end)
+        print(f"n={n}," + ",".join(f"q{p:g}={v:.6f}" for p, v in zip(ps, qs)))
+    else:
+        main(full=args.full)
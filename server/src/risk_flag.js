@@ -3,14 +3,32 @@
 
 const fs = require("fs");
 const path = require("path");
+const zlib = require("zlib");
 
 const volPath = path.join(__dirname, "daily-volatility.log");
 const sentPath = path.join(__dirname, "daily-news-sentiment.log");
 const outPath = path.join(__dirname, "daily-risk-flag.log");
 
+// Logs compacted by seglog.py keep older rows in <log>.d/ segments; the
+// newest segment is only compressed once it is cold, and seglog.NODE_READ
+// makes that zlib (readable here) for the logs this script reads.
+function lastSegmentLine(p) {
+  const indexPath = `${p}.d/index.json`;
+  if (!fs.existsSync(indexPath)) return null;
+  const segs = JSON.parse(fs.readFileSync(indexPath, "utf8")).segments;
+  if (!segs.length) return null;
+  const seg = segs[segs.length - 1];
+  if (seg.codec && seg.codec !== "zlib") return null;
+  let data = fs.readFileSync(`${p}.d/${seg.name}`);
+  if (seg.codec === "zlib") data = zlib.inflateSync(data);
+  const lines = data.toString("utf8").trim().split("\n");
+  return lines[lines.length - 1];
+}
+
 function lastLine(p) {
-  if (!fs.existsSync(p)) return null;
-  const lines = fs.readFileSync(p, "utf8").trim().split("\n");
+  const text = fs.existsSync(p) ? fs.readFileSync(p, "utf8").trim() : "";
+  if (!text) return lastSegmentLine(p);
+  const lines = text.split("\n");
   return lines[lines.length - 1];
 }
 
@@ -1,16 +1,18 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 ROOT = Path("server/src")
 OUT = ROOT / "risk-score.log"
 
 def last_float(path: Path, key: str):
-    if not path.exists():
+    rec = tail_reader.last_record(path)
+    if rec is None or key not in rec[1]:
         return None
-    line = path.read_text(encoding="utf-8").strip().splitlines()[-1]
-    if key not in line:
-        return None
-    return float(line.split(key + "=")[1].split(",")[0])
+    return float(rec[1][key])
 
+@instrument.instrumented
 def main():
     sharpe = last_float(ROOT / "sharpe-ratio.log", "sharpe_daily")
     mdd = last_float(ROOT / "max-drawdown.log", "max_drawdown")
@@ -22,12 +24,9 @@ def main():
 
     # crude composite: lower is worse
     score = (1 - sharpe) + abs(mdd) + vol
-    ts_line = ROOT.joinpath("sharpe-ratio.log").read_text(encoding="utf-8").strip().splitlines()[-1]
-    ts = ts_line.split(",")[0]
+    ts = tail_reader.last_record(ROOT / "sharpe-ratio.log")[0]
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    with OUT.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},score={score:.4f}\n")
+    log_writer.append(OUT, f"{ts},score={score:.4f}\n")
     print("Appended risk score.")
 
 if __name__ == "__main__":
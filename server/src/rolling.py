@@ -0,0 +1,215 @@
+# server/src/rolling.py
+# Sliding-window statistics that update per bar instead of re-scanning the
+# window: Welford add/remove for mean and variance, monotonic deques for
+# min/max, two lazily-pruned heaps for the median and running counters for
+# up/down bars. Each engine exposes state() so the rolling scripts can keep
+# it in their checkpoint and resume exactly where they stopped.
+
+from collections import deque
+import heapq
+import math
+
+# Moments are re-derived from the buffer this often to stop add/remove
+# round-off from drifting over very long histories.
+RESYNC_EVERY = 10_000
+
+class RollingWindow:
+    kind = "window"
+
+    def __init__(self, window: int, state=None):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.values = deque()
+        self._reset()
+        for x in (state or {}).get("values", []):
+            self.push(x)
+
+    def _reset(self):
+        pass
+
+    def _add(self, x):
+        pass
+
+    def _remove(self, x):
+        pass
+
+    def push(self, x):
+        self.values.append(x)
+        self._add(x)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def state(self):
+        return {"kind": self.kind, "window": self.window, "values": list(self.values)}
+
+class RollingMoments(RollingWindow):
+    # population mean / variance, matching sum((x - mean) ** 2) / n
+    kind = "moments"
+
+    def __init__(self, window: int, state=None):
+        if state and "mean" in state:
+            super().__init__(window)
+            self.values.extend(state["values"])
+            self.n, self.mean, self.m2, self.steps = len(self.values), state["mean"], state["m2"], state["steps"]
+        else:
+            super().__init__(window, state)
+
+    def _reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.steps = 0
+
+    def _add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self, x):
+        self.n -= 1
+        if self.n == 0:
+            self.mean = self.m2 = 0.0
+            return
+        d = x - self.mean
+        self.mean -= d / self.n
+        self.m2 = max(self.m2 - d * (x - self.mean), 0.0)
+
+    def push(self, x):
+        super().push(x)
+        self.steps += 1
+        if self.steps % RESYNC_EVERY == 0:
+            self.mean = sum(self.values) / self.n
+            self.m2 = sum((v - self.mean) ** 2 for v in self.values)
+
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+    def state(self):
+        st = super().state()
+        st.update(mean=self.mean, m2=self.m2, steps=self.steps)
+        return st
+
+class RollingExtrema(RollingWindow):
+    # monotonic deques of (index, value); the front is the current min / max
+    kind = "extrema"
+
+    def _reset(self):
+        self.i = 0
+        self._min = deque()
+        self._max = deque()
+
+    def _add(self, x):
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._min.append((self.i, x))
+        self._max.append((self.i, x))
+        self.i += 1
+
+    def _remove(self, x):
+        oldest = self.i - self.window - 1
+        if self._min[0][0] == oldest:
+            self._min.popleft()
+        if self._max[0][0] == oldest:
+            self._max.popleft()
+
+    def min(self):
+        return self._min[0][1]
+
+    def max(self):
+        return self._max[0][1]
+
+class RollingMedian(RollingWindow):
+    # max-heap of the lower half, min-heap of the upper half; removed values
+    # are counted in `delayed` and only popped once they surface at a top
+    kind = "median"
+
+    def _reset(self):
+        self.low = []
+        self.high = []
+        self.delayed = {}
+        self.low_size = 0
+        self.high_size = 0
+
+    def _prune(self, heap, sign):
+        while heap:
+            x = sign * heap[0]
+            if not self.delayed.get(x):
+                break
+            self.delayed[x] -= 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.low_size += 1
+            self.high_size -= 1
+            self._prune(self.high, 1)
+
+    def _add(self, x):
+        if not self.low or x <= -self.low[0]:
+            heapq.heappush(self.low, -x)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, x)
+            self.high_size += 1
+        self._rebalance()
+
+    def _remove(self, x):
+        self.delayed[x] = self.delayed.get(x, 0) + 1
+        if x <= -self.low[0]:
+            self.low_size -= 1
+            if x == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and x == self.high[0]:
+                self._prune(self.high, 1)
+        self._rebalance()
+        if len(self.low) + len(self.high) > 4 * self.window:
+            self._compact()
+
+    def _compact(self):
+        # drop stale entries buried below the heap tops
+        live = sorted(self.values)
+        k = (len(live) + 1) // 2
+        self.low = [-x for x in live[:k]]
+        heapq.heapify(self.low)
+        self.high = live[k:]
+        heapq.heapify(self.high)
+        self.low_size, self.high_size = k, len(live) - k
+        self.delayed = {}
+
+    def median(self) -> float:
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+class RollingSignCount(RollingWindow):
+    kind = "signs"
+
+    def _reset(self):
+        self.ups = 0
+        self.downs = 0
+
+    def _add(self, x):
+        self.ups += x > 0
+        self.downs += x < 0
+
+    def _remove(self, x):
+        self.ups -= x > 0
+        self.downs -= x < 0
@@ -1,31 +1,40 @@
 from pathlib import Path
+import sys
+import checkpoint
+import rolling
+import returns_cache
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/rolling-avg-return.log")
 WINDOW = 3
 
-def main():
-    if not RET_PATH.exists():
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < WINDOW:
+    if len(cols) < WINDOW:
         print("Not enough data.")
         return
 
-    vals = [float(l.split("ret=")[1]) for l in lines]
-    ts_list = [l.split(",")[0] for l in lines]
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, {"kind": rolling.RollingMoments.kind, "window": WINDOW})
+    window = rolling.RollingMoments(WINDOW, state)
     out_lines = []
 
-    for i in range(WINDOW - 1, len(vals)):
-        window_vals = vals[i - WINDOW + 1 : i + 1]
-        avg = sum(window_vals) / WINDOW
-        out_lines.append(f"{ts_list[i]},window={WINDOW},avg_ret={avg:.6f}")
+    for ts, v in zip(cols.stamps(start), cols.rets[start:]):
+        window.push(v)
+        if not window.full():
+            continue
+        avg = window.mean
+        out_lines.append(f"{ts},window={WINDOW},avg_ret={avg:.6f}")
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    instrument.rows(parsed=len(cols) - start, emitted=len(out_lines))
+    checkpoint.write_rows(OUT_PATH, out_lines, append=start > 0)
+    checkpoint.save_returns(OUT_PATH, cols, window.state())
     print("Updated rolling-avg-return.log with", len(out_lines), "rows")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
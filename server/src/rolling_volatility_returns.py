@@ -1,34 +1,40 @@
 from pathlib import Path
-import math
+import sys
+import checkpoint
+import rolling
+import returns_cache
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/rolling-volatility-returns.log")
 WINDOW = 5
 
-def main():
-    if not RET_PATH.exists():
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < WINDOW:
+    if len(cols) < WINDOW:
         print("Not enough data.")
         return
 
-    rets = [float(l.split("ret=")[1]) for l in lines]
-    ts_list = [l.split(",")[0] for l in lines]
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, {"kind": rolling.RollingMoments.kind, "window": WINDOW})
+    window = rolling.RollingMoments(WINDOW, state)
     out_lines = []
 
-    for i in range(WINDOW - 1, len(rets)):
-        window = rets[i - WINDOW + 1 : i + 1]
-        mean = sum(window) / WINDOW
-        var = sum((x - mean) ** 2 for x in window) / WINDOW
-        std = math.sqrt(var)
-        out_lines.append(f"{ts_list[i]},window={WINDOW},vol={std:.6f}")
+    for ts, r in zip(cols.stamps(start), cols.rets[start:]):
+        window.push(r)
+        if not window.full():
+            continue
+        std = window.std()
+        out_lines.append(f"{ts},window={WINDOW},vol={std:.6f}")
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    instrument.rows(parsed=len(cols) - start, emitted=len(out_lines))
+    checkpoint.write_rows(OUT_PATH, out_lines, append=start > 0)
+    checkpoint.save_returns(OUT_PATH, cols, window.state())
     print("Updated rolling-volatility-returns.log")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
@@ -1,34 +1,41 @@
 from pathlib import Path
-import math
+import sys
+import checkpoint
+import rolling
+import returns_cache
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/rolling-zscore-returns.log")
 WINDOW = 20
 
-def main():
-    if not RET_PATH.exists():
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < WINDOW:
+    if len(cols) < WINDOW:
         print("Not enough data.")
         return
 
-    vals = [float(l.split("ret=")[1]) for l in lines]
-    ts = [l.split(",")[0] for l in lines]
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, {"kind": rolling.RollingMoments.kind, "window": WINDOW})
+    w = rolling.RollingMoments(WINDOW, state)
     out = []
 
-    for i in range(WINDOW - 1, len(vals)):
-        w = vals[i - WINDOW + 1 : i + 1]
-        mean = sum(w) / WINDOW
-        var = sum((x - mean) ** 2 for x in w) / WINDOW
-        std = math.sqrt(var) or 1e-9
-        z = (vals[i] - mean) / std
-        out.append(f"{ts[i]},window={WINDOW},z={z:.4f}")
+    for ts, v in zip(cols.stamps(start), cols.rets[start:]):
+        w.push(v)
+        if not w.full():
+            continue
+        std = w.std() or 1e-9
+        z = (v - w.mean) / std
+        out.append(f"{ts},window={WINDOW},z={z:.4f}")
 
-    OUT_PATH.write_text("\n".join(out) + "\n", encoding="utf-8")
+    instrument.rows(parsed=len(cols) - start, emitted=len(out))
+    checkpoint.write_rows(OUT_PATH, out, append=start > 0)
+    checkpoint.save_returns(OUT_PATH, cols, w.state())
     print("Updated rolling-zscore-returns.log")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
@@ -0,0 +1,323 @@
+# server/src/seglog.py
+# Segmented storage for the append-only metric logs.
+#
+# Writers keep appending to the plain file (e.g. vol-regime.log). compact()
+# seals whatever it holds into immutable segments under vol-regime.log.d/,
+# rolled by size or by day, and compresses segments that have gone cold with
+# zlib or lzma. index.json lists every segment with its first and last
+# timestamp, row count and logical byte offset, so tail reads, date-range
+# scans and backups only open the segments they need. Readers see one log:
+# read_lines() / scan() here, and tail_reader falls back to the segments when
+# the active file is short.
+
+from pathlib import Path
+from datetime import datetime, timedelta
+import argparse
+import fcntl
+import json
+import lzma
+import os
+import shutil
+import sys
+import zlib
+
+import log_writer
+
+ROOT = Path("server/src")
+
+# audit.log is left out: it is the audit-run script itself and appends to
+# its own file.
+SEGMENTED = [
+    "daily-volatility.log",
+    "monte-carlo-equity.log",
+    "vol-regime.log",
+    "trend-state.log",
+    "risk-score.log",
+    "signal-conflict.log",
+    "run-metrics.log",
+]
+
+VERSION = 1
+MAX_BYTES = 16 * 1024 * 1024
+COLD_DAYS = 7
+CODECS = {
+    "zlib": (".z", lambda b: zlib.compress(b, 9), zlib.decompress),
+    "lzma": (".xz", lzma.compress, lzma.decompress),
+}
+SEALING = "sealing.tmp"
+DEFAULT_CODEC = "lzma"
+# logs the Node scripts read back (risk_flag.js); Node's zlib can inflate
+# zlib segments but has no lzma, so these are always compressed with zlib
+NODE_READ = {"daily-volatility.log"}
+
+def codec_for(path: Path, codec: str = None) -> str:
+    return "zlib" if Path(path).name in NODE_READ else codec or DEFAULT_CODEC
+
+def seg_dir(path: Path) -> Path:
+    return Path(f"{path}.d")
+
+def index_path(path: Path) -> Path:
+    return seg_dir(path) / "index.json"
+
+def read_index(path: Path):
+    try:
+        index = json.loads(index_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": VERSION, "next": 1, "segments": []}
+    return index
+
+def index_key(path: Path):
+    # changes whenever the segment set changes; None if never compacted
+    try:
+        st = os.stat(index_path(path))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+def _write_index(path: Path, index):
+    tmp = seg_dir(path) / "index.json.tmp"
+    tmp.write_text(json.dumps(index, indent=1), encoding="utf-8")
+    os.replace(tmp, index_path(path))
+
+def stamp_of(line: str) -> str:
+    return line.split(",", 1)[0]
+
+def read_segment(path: Path, seg) -> bytes:
+    d = seg_dir(path)
+    try:
+        data = (d / seg["name"]).read_bytes()
+    except FileNotFoundError:
+        # compressed by a concurrent compact() after we read the index
+        for ext, _, decompress in CODECS.values():
+            p = d / (seg["name"] + ext)
+            if p.exists():
+                return decompress(p.read_bytes())
+        raise
+    codec = seg.get("codec")
+    return CODECS[codec][2](data) if codec else data
+
+def _pieces(data: bytes, by: str, max_bytes: int):
+    # split sealed data at line boundaries: one piece per day, or pieces of
+    # at most max_bytes (a single longer line still gets its own piece)
+    lines = data.splitlines(keepends=True)
+    piece, size, day = [], 0, None
+    for raw in lines:
+        if not raw.strip():
+            continue
+        if not raw.endswith(b"\n"):
+            raw += b"\n"
+        key = raw[:10] if by == "day" else None
+        if piece and ((by == "day" and key != day) or (by == "size" and size + len(raw) > max_bytes)):
+            yield b"".join(piece)
+            piece, size = [], 0
+        piece.append(raw)
+        size += len(raw)
+        day = key
+    if piece:
+        yield b"".join(piece)
+
+def _due(path: Path, by: str, max_bytes: int) -> bool:
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return False
+    if by == "size":
+        return size >= max_bytes
+    with path.open("rb") as f:
+        first = f.readline()
+    today = datetime.utcnow().date().isoformat().encode()
+    return bool(first.strip()) and first[:10] < today
+
+def roll(path: Path, by: str = "size", max_bytes: int = MAX_BYTES, force: bool = False) -> int:
+    # Seal the active file into new segments; returns how many were written.
+    # The active file is renamed away first, so writers (log_writer.append)
+    # simply start a fresh one.
+    d = seg_dir(path)
+    d.mkdir(parents=True, exist_ok=True)
+    with open(d / "lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sealing = d / SEALING
+        if not sealing.exists():
+            if not (force or _due(path, by, max_bytes)):
+                return 0
+            try:
+                # wait out an append in flight; later writers see the inode
+                # change and start a fresh active file
+                with log_writer.locked(path, create=False):
+                    os.replace(path, sealing)
+            except FileNotFoundError:
+                return 0
+        data = sealing.read_bytes()
+
+        index = read_index(path)
+        # the index records what its last roll sealed; if the sealing file
+        # is still that data, the roll died after publishing the index and
+        # only the cleanup is left (sealing it again would duplicate rows)
+        sealed = {"size": len(data), "crc32": zlib.crc32(data)}
+        if index.get("sealed") == sealed:
+            sealing.unlink()
+            return 0
+        segs = index["segments"]
+        offset = segs[-1]["offset"] + segs[-1]["size"] if segs else 0
+        written = 0
+        for piece in _pieces(data, by, max_bytes):
+            lines = piece.decode("utf-8").splitlines()
+            name = f"{index['next']:08d}.seg"
+            tmp = d / (name + ".tmp")
+            tmp.write_bytes(piece)
+            os.replace(tmp, d / name)
+            segs.append({
+                "name": name,
+                "first": stamp_of(lines[0]),
+                "last": stamp_of(lines[-1]),
+                "rows": len(lines),
+                "offset": offset,
+                "size": len(piece),
+                "stored": len(piece),
+                "codec": None,
+            })
+            index["next"] += 1
+            offset += len(piece)
+            written += 1
+        index["sealed"] = sealed
+        _write_index(path, index)
+        sealing.unlink()
+        return written
+
+def compress_cold(path: Path, codec: str = None, cold_days: int = COLD_DAYS, now: datetime = None) -> int:
+    # Compress plain segments whose last row is older than cold_days.
+    d = seg_dir(path)
+    if not d.exists():
+        return 0
+    codec = codec_for(path, codec)
+    ext, compress, _ = CODECS[codec]
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=cold_days)).isoformat()
+    done = 0
+    with open(d / "lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        index = read_index(path)
+        stale = []
+        for seg in index["segments"]:
+            if seg["codec"] or seg["last"] >= cutoff:
+                continue
+            plain = d / seg["name"]
+            packed = compress(plain.read_bytes())
+            tmp = d / (seg["name"] + ext + ".tmp")
+            tmp.write_bytes(packed)
+            os.replace(tmp, d / (seg["name"] + ext))
+            stale.append(plain)
+            seg.update(name=seg["name"] + ext, codec=codec, stored=len(packed))
+            done += 1
+        if done:
+            _write_index(path, index)
+            for p in stale:
+                p.unlink()
+    return done
+
+def compact(path: Path, by: str = "size", max_bytes: int = MAX_BYTES, codec: str = None,
+            cold_days: int = COLD_DAYS, force: bool = False):
+    return roll(path, by, max_bytes, force), compress_cold(path, codec, cold_days)
+
+def segments(path: Path, start: str = None, end: str = None):
+    # index entries overlapping [start, end), oldest first
+    out = []
+    for seg in read_index(path)["segments"]:
+        if start is not None and seg["last"] < start:
+            continue
+        if end is not None and seg["first"] >= end:
+            continue
+        out.append(seg)
+    return out
+
+def _active_lines(path: Path):
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return []
+    return [l.strip() for l in text.splitlines() if l.strip()]
+
+def scan(path: Path, start: str = None, end: str = None):
+    # rows with start <= timestamp < end across segments and the active
+    # file, oldest first; None leaves that side open
+    for seg in segments(path, start, end):
+        inside = (start is None or seg["first"] >= start) and (end is None or seg["last"] < end)
+        for line in read_segment(path, seg).decode("utf-8").splitlines():
+            line = line.strip()
+            if line and (inside or _within(stamp_of(line), start, end)):
+                yield line
+    for line in _active_lines(path):
+        if _within(stamp_of(line), start, end):
+            yield line
+
+def _within(ts: str, start, end) -> bool:
+    return (start is None or ts >= start) and (end is None or ts < end)
+
+def read_lines(path: Path, start: str = None, end: str = None):
+    # the whole logical log (or a time range of it) as non-empty lines
+    return list(scan(path, start, end))
+
+def tail_lines(path: Path, n: int):
+    # last n lines held in segments, oldest first
+    out = []
+    for seg in reversed(read_index(path)["segments"]):
+        if len(out) >= n:
+            break
+        lines = [l.strip() for l in read_segment(path, seg).decode("utf-8").splitlines() if l.strip()]
+        out = lines + out
+    return out[-n:] if n else []
+
+def backup(path: Path, dest: Path) -> int:
+    # Copy the log into dest/<name> and dest/<name>.d. Segments are
+    # immutable, so only ones the backup does not have yet are copied.
+    target = dest / path.name
+    target_dir = seg_dir(target)
+    copied = 0
+    index = read_index(path)
+    if index["segments"]:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        keep = {seg["name"] for seg in index["segments"]}
+        for seg in index["segments"]:
+            if not (target_dir / seg["name"]).exists():
+                shutil.copy2(seg_dir(path) / seg["name"], target_dir / seg["name"])
+                copied += 1
+        for old in target_dir.glob("*.seg*"):
+            if old.name not in keep:
+                old.unlink()
+        shutil.copy2(index_path(path), target_dir / "index.json")
+    if path.exists():
+        dest.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target)
+        copied += 1
+    return copied
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Segment, compress and back up the append-only metric logs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compact", help="roll active logs into segments and compress cold ones")
+    c.add_argument("--by", choices=["size", "day"], default="size")
+    c.add_argument("--max-bytes", type=int, default=MAX_BYTES)
+    c.add_argument("--codec", choices=sorted(CODECS), help=f"default {DEFAULT_CODEC}; logs read from Node always use zlib")
+    c.add_argument("--cold-days", type=int, default=COLD_DAYS)
+    c.add_argument("--force", action="store_true", help="seal the active file even if it is not due")
+    b = sub.add_parser("backup", help="copy logs and any new segments to DEST")
+    b.add_argument("dest")
+    l = sub.add_parser("ls", help="list segments")
+    for p in (c, b, l):
+        p.add_argument("logs", nargs="*", help=f"log names under {ROOT} (default: all segmented logs)")
+    args = ap.parse_args(argv)
+
+    for name in args.logs or SEGMENTED:
+        path = ROOT / name
+        if args.cmd == "compact":
+            rolled, packed = compact(path, args.by, args.max_bytes, args.codec, args.cold_days, args.force)
+            print(f"{name}: {rolled} new segment(s), {packed} compressed")
+        elif args.cmd == "backup":
+            print(f"{name}: {backup(path, Path(args.dest))} file(s) copied")
+        else:
+            for seg in read_index(path)["segments"]:
+                print(f"{name} {seg['name']:<16} {seg['first']} .. {seg['last']} rows={seg['rows']} "
+                      f"size={seg['size']} stored={seg['stored']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
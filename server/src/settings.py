@@ -0,0 +1,23 @@
+# server/src/settings.py
+# Reads the analytics section of config/settings.yaml for the Python scripts.
+# A missing or unparsable file just means "use the script defaults".
+
+from pathlib import Path
+
+CFG = Path("config/settings.yaml")
+
+def load():
+    if not CFG.exists():
+        return {}
+    import yaml
+    try:
+        data = yaml.safe_load(CFG.read_text(encoding="utf-8"))
+    except yaml.YAMLError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def analytics(key: str, default=None):
+    section = load().get("analytics")
+    if not isinstance(section, dict):
+        return default
+    return section.get(key, default)
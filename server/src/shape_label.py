@@ -1,36 +1,39 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 SHAPE_PATH = Path("server/src/shape-stats.log")
 OUT_PATH = Path("server/src/shape-label.log")
 
-def parse(line, key):
-    for part in line.split(","):
-        if part.startswith(key + "="):
-            return float(part.split("=")[1])
-    return 0.0
+# |skew| above SKEW is skewed; kurtosis above FAT (normal = 3) is fat-tailed
+SKEW = 0.5
+FAT = 3.0
 
+def parse(fields, key):
+    return float(fields[key]) if key in fields else 0.0
+
+@instrument.instrumented
 def main():
-    if not SHAPE_PATH.exists():
+    rec = tail_reader.last_record(SHAPE_PATH)
+    if rec is None:
         print("No shape-stats.log.")
         return
 
-    line = SHAPE_PATH.read_text(encoding="utf-8").strip().splitlines()[-1]
-    ts = line.split(",")[0]
-    s = parse(line, "skew")
-    k = parse(line, "kurtosis")
+    ts, fields = rec
+    s = parse(fields, "skew")
+    k = parse(fields, "kurtosis")
 
-    if s > 0.5:
+    if s > SKEW:
         skew_label = "RIGHT_SKEW"
-    elif s < -0.5:
+    elif s < -SKEW:
         skew_label = "LEFT_SKEW"
     else:
         skew_label = "NEAR_SYMM"
 
-    tail_label = "FAT_TAILS" if k > 3 else "NORMAL_TAILS"
+    tail_label = "FAT_TAILS" if k > FAT else "NORMAL_TAILS"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},skew_label={skew_label},tail_label={tail_label}\n")
+    log_writer.append(OUT_PATH, f"{ts},skew_label={skew_label},tail_label={tail_label}\n")
     print("Appended shape label.")
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+import sys
+import numpy as np
+import checkpoint
+import moments
+import returns_cache
+import settings
+import log_writer
+import instrument
+
+RET_PATH = Path("server/src/daily-returns.log")
+OUT_PATH = Path("server/src/shape-stats.log")
+
+# 0 = moments of the whole history; N = of the last N returns
+WINDOW = 0
+CHUNK = 1_000_000
+
+def _chunk_moments(span):
+    # runs in a worker: map the returns itself instead of pickling them
+    start, stop = span
+    cols = returns_cache.load(RET_PATH)
+    return moments.of(np.frombuffer(cols.rets, dtype=np.float64)[start:stop])
+
+def history_moments(rets, start, stop, workers=1):
+    spans = [(i, min(i + CHUNK, stop)) for i in range(start, stop, CHUNK)]
+    if workers > 1 and len(spans) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_chunk_moments, spans))
+    else:
+        parts = [moments.of(rets[a:b]) for a, b in spans]
+    return reduce(moments.Moments.merge, parts, moments.Moments())
+
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or not len(cols):
+        print("No daily-returns.log yet.")
+        return
+
+    window = int(settings.analytics("shape_window", WINDOW) or 0)
+    workers = int(settings.analytics("shape_workers", 1))
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, {"kind": "shape", "window": window})
+    if start == len(cols):
+        print("No new returns for shape stats.")
+        return
+
+    rets = np.frombuffer(cols.rets, dtype=np.float64)
+    if window:
+        m = moments.of(rets[-window:])
+    else:
+        prev = moments.Moments(*state["moments"]) if state else moments.Moments()
+        m = prev.merge(history_moments(rets, start, len(cols), workers))
+    instrument.rows(parsed=len(cols) - start if not window else min(window, len(cols)), emitted=1)
+
+    ts = cols.stamp(-1)
+    line = (f"{ts},n={m.n},window={window or 'all'},mean={m.mean:.6f},std={m.std():.6f},"
+            f"skew={m.skew():.4f},kurtosis={m.kurtosis():.4f}\n")
+    log_writer.append(OUT_PATH, line)
+    checkpoint.save_returns(OUT_PATH, cols, {"kind": "shape", "window": window, "moments": m.state()})
+    print("Appended shape stats:", line.strip())
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
@@ -0,0 +1,127 @@
+# server/src/sharpe_ratio.py
+# Risk-adjusted return for several windows in one pass. Prefix sums of r,
+# r^2, min(r, 0) and min(r, 0)^2 give every window's mean, volatility and
+# downside deviation by subtraction, so each extra window or metric is O(n)
+# rather than O(n * w). Writes one rolling-sharpe-<w>.log row per bar and
+# window, and per run a summary line to sharpe-ratio.log (full-history
+# sharpe_daily / sortino_daily plus the latest value of each window) and to
+# downside-deviation.log. Running totals are checkpointed.
+
+from pathlib import Path
+import sys
+import numpy as np
+import checkpoint
+import returns_cache
+import settings
+import log_writer
+import instrument
+
+RET_PATH = Path("server/src/daily-returns.log")
+OUT_PATH = Path("server/src/sharpe-ratio.log")
+DOWNSIDE_PATH = Path("server/src/downside-deviation.log")
+
+WINDOWS = (20, 60, 250)
+
+def window_path(w: int) -> Path:
+    return OUT_PATH.with_name(f"rolling-sharpe-{w}.log")
+
+def configured_windows():
+    ws = settings.analytics("sharpe_windows", WINDOWS)
+    if isinstance(ws, str):
+        ws = ws.split(",")
+    return sorted({int(w) for w in ws if int(w) > 1})
+
+def ratios(s1, s2, n1, n2, n):
+    # population mean / std of r and of min(r, 0), like the rolling scripts
+    mean = s1 / n
+    std = np.sqrt(np.maximum(s2 / n - mean * mean, 0.0))
+    dmean = n1 / n
+    down = np.sqrt(np.maximum(n2 / n - dmean * dmean, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / np.where(std > 0, std, 1.0), 0.0)
+        sortino = np.where(down > 0, mean / np.where(down > 0, down, 1.0), 0.0)
+    return sharpe, sortino, down
+
+def prefix(r):
+    neg = np.minimum(r, 0.0)
+    z = np.zeros(1)
+    return (np.concatenate((z, np.cumsum(r))), np.concatenate((z, np.cumsum(r * r))),
+            np.concatenate((z, np.cumsum(neg))), np.concatenate((z, np.cumsum(neg * neg))))
+
+def rolling(r, lo, start, w):
+    # (row indices, sharpe, sortino, downside dev) for windows ending at rows
+    # start.. of r, where r[lo:] is what the prefix sums were built over
+    first = max(start, lo + w - 1)
+    if first >= len(r):
+        return np.arange(0), None, None, None
+    c1, c2, c3, c4 = prefix(r[lo:])
+    hi = np.arange(first, len(r)) - lo + 1
+    sl = hi - w
+    sharpe, sortino, down = ratios(c1[hi] - c1[sl], c2[hi] - c2[sl], c3[hi] - c3[sl], c4[hi] - c4[sl], w)
+    return np.arange(first, len(r)), sharpe, sortino, down
+
+def totals_of(r):
+    # full-history totals: count, sum r, sum r^2, sum min(r,0), sum min(r,0)^2
+    neg = np.minimum(r, 0.0)
+    return [len(r), float(r.sum()), float((r * r).sum()), float(neg.sum()), float((neg * neg).sum())]
+
+def sizes_ok(state, windows) -> bool:
+    for w in windows:
+        p = window_path(w)
+        if not p.exists() or p.stat().st_size != state["sizes"].get(str(w)):
+            return False
+    return True
+
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or not len(cols):
+        print("No daily-returns.log yet.")
+        return
+
+    windows = configured_windows()
+    match = {"kind": "sharpe", "windows": windows}
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, match)
+    if start and not sizes_ok(state, windows):
+        start, state = 0, None
+    if start == len(cols):
+        print("No new returns for Sharpe ratios.")
+        return
+
+    r = np.frombuffer(cols.rets, dtype=np.float64)
+    lo = max(0, start - max(windows) + 1)
+    stamps = cols.stamps(start)
+    sizes = {}
+    latest = []
+    emitted = 0
+    for w in windows:
+        idx, sharpe, sortino, down = rolling(r, lo, start, w)
+        rows = []
+        if len(idx):
+            rows = [f"{stamps[i - start]},window={w},sharpe={a:.6f},sortino={b:.6f},downside_dev={d:.6f}"
+                    for i, a, b, d in zip(idx.tolist(), sharpe.tolist(), sortino.tolist(), down.tolist())]
+            latest.append(f"sharpe_{w}={sharpe[-1]:.6f},sortino_{w}={sortino[-1]:.6f}")
+        if rows or start:
+            checkpoint.write_rows(window_path(w), rows, append=start > 0)
+        else:
+            log_writer.replace(window_path(w), "")
+        sizes[str(w)] = window_path(w).stat().st_size
+        emitted += len(rows)
+
+    new = r[start:]
+    add = totals_of(new)
+    totals = [a + b for a, b in zip(state["totals"], add)] if state else add
+    sharpe, sortino, down = (float(x) for x in ratios(*totals[1:], totals[0]))
+    instrument.rows(parsed=len(new), emitted=emitted + 2)
+
+    ts = cols.stamp(-1)
+    line = f"{ts},sharpe_daily={sharpe:.6f},sortino_daily={sortino:.6f},downside_dev={down:.6f}"
+    line = ",".join([line] + latest) + "\n"
+    with log_writer.batch():
+        log_writer.append(OUT_PATH, line)
+        log_writer.append(DOWNSIDE_PATH, f"{ts},downside_dev={down:.6f}\n")
+    checkpoint.save_returns(OUT_PATH, cols, dict(match, totals=totals, sizes=sizes))
+    print("Appended Sharpe ratios:", line.strip())
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv)
@@ -0,0 +1,249 @@
+# server/src/signal_table.py
+# Full-history signal table. The label scripts (trend_state, vol_regime,
+# position_hint, market_mood, signal_conflict, return_label,
+# zscore_anomalies, shape_label) each label the latest upstream row; this
+# applies the same thresholds (the constants in those scripts) to every bar
+# at once and joins the results on timestamp into signal-table.csv, one row
+# per bar of daily-returns.log and one column per input and label. After a
+# threshold change one run relabels the whole history, and --emit rewrites
+# the per-script logs from the table in their usual line format.
+#
+# Inputs are the full-history upstream logs (rolling-avg-return,
+# rolling-volatility-returns, rolling-zscore-returns, equity-curve), read
+# from their binlog .bin copy when that is current. The series that only
+# exist as "latest" rows upstream (up / down streaks, MA crossover state,
+# shape stats) are recomputed per bar from the returns and the equity curve.
+#
+#   python server/src/signal_table.py [--emit all | trend-state.log,...]
+
+from pathlib import Path
+import argparse
+import operator
+import re
+import numpy as np
+import binlog
+import log_writer
+import ma_crossover_signal
+import ma_sweep
+import market_mood
+import return_label
+import returns_cache
+import settings
+import shape_label
+import shape_stats
+import trend_state
+import vol_regime
+import zscore_anomalies
+import instrument
+
+ROOT = Path("server/src")
+RET_PATH = ROOT / "daily-returns.log"
+OUT_PATH = ROOT / "signal-table.csv"
+
+INPUTS = {
+    "avg_ret": ("rolling-avg-return.log", "avg_ret"),
+    "vol": ("rolling-volatility-returns.log", "vol"),
+    "z": ("rolling-zscore-returns.log", "z"),
+    "equity": ("equity-curve.log", "equity"),
+}
+
+COLUMNS = ["timestamp", "avg_ret", "trend", "vol", "regime", "position", "up", "down", "mood",
+           "ma_state", "conflict", "z", "return_label", "anomaly", "skew", "kurtosis",
+           "skew_label", "tail_label"]
+
+# per-script log -> (line format over the table's columns, columns a row needs)
+EMIT = {
+    "trend-state.log": ("{timestamp},avg_ret={avg_ret},state={trend}", ["trend"]),
+    "vol-regime.log": ("{timestamp},vol={vol},regime={regime}", ["regime"]),
+    "position-hint.log": ("{timestamp},trend={trend},regime={regime},position={position}", ["position"]),
+    "market-mood.log": ("{timestamp},up={up},down={down},mood={mood}", ["mood"]),
+    "signal-conflict.log": ("{timestamp},ma_state={ma_state},trend_state={trend},conflict={conflict}", ["conflict"]),
+    "return-labels.log": ("{timestamp},z={z},label={return_label}", ["return_label"]),
+    "zscore-anomalies.log": ("{timestamp},z={z},anomaly={anomaly}", ["anomaly"]),
+    "shape-label.log": ("{timestamp},skew_label={skew_label},tail_label={tail_label}", ["skew_label"]),
+}
+
+def column(log: Path, key: str, index):
+    # (epoch-us timestamps, values) of one field over the whole log; index
+    # maps the spine's stamp text to epoch-us so text logs skip date parsing
+    packed = binlog.bin_path(log)
+    if packed.exists() and (not log.exists() or packed.stat().st_mtime_ns >= log.stat().st_mtime_ns):
+        with binlog.Records(packed) as recs:
+            a = recs.array()
+            return np.array(a["ts"]), np.array(a[key], dtype=np.float64)
+    if not log.exists():
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    ts, vals = [], []
+    with log.open("r", encoding="utf-8") as f:
+        for line in f:
+            if key + "=" in line:
+                stamp = line.split(",", 1)[0]
+                ts.append(index.get(stamp) or returns_cache.to_epoch_us(stamp))
+                vals.append(float(line.split(key + "=")[1].split(",")[0]))
+    return np.array(ts, dtype=np.int64), np.array(vals)
+
+def join(spine, ts, vals):
+    # vals placed on the spine's rows by exact timestamp, NaN where absent
+    out = np.full(len(spine), np.nan)
+    if len(ts):
+        idx = np.minimum(np.searchsorted(spine, ts), len(spine) - 1)
+        hit = spine[idx] == ts
+        out[idx[hit]] = vals[hit]
+    return out
+
+def streaks(r):
+    # bars in the current run of up (r > 0) / down (r < 0) returns, per bar
+    i = np.arange(len(r))
+    out = []
+    for moving in (r > 0, r < 0):
+        last_break = np.maximum.accumulate(np.where(moving, -1, i))
+        out.append(i - last_break)
+    return out
+
+def shape(r, window):
+    # skew and kurtosis as shape_stats.py logs them, for the history up to
+    # each bar (window 0) or its last `window` returns
+    i = np.arange(len(r))
+    start = np.maximum(i + 1 - window, 0) if window else np.zeros(len(r), dtype=np.int64)
+    n = (i + 1 - start).astype(np.float64)
+    s1, s2, s3, s4 = (ma_sweep.prefix(r ** p) for p in (1, 2, 3, 4))
+    s1, s2, s3, s4 = (c[i + 1] - c[start] for c in (s1, s2, s3, s4))
+    mean = s1 / n
+    m2 = s2 - n * mean ** 2
+    m3 = s3 - 3 * mean * s2 + 2 * n * mean ** 3
+    m4 = s4 - 4 * mean * s3 + 6 * mean ** 2 * s2 - 3 * n * mean ** 4
+    ok = (n >= 2) & (m2 > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = np.where(ok, np.sqrt(n) * m3 / m2 ** 1.5, 0.0)
+        kurt = np.where(ok, n * m4 / (m2 * m2), 0.0)
+    # the label script sees the values rounded as logged
+    return np.round(skew, 4), np.round(kurt, 4)
+
+def ma_states(ts, equity):
+    # ma_crossover_signal's state at every equity bar, +1 LONG / -1 FLAT / 0 NEUTRAL
+    short = int(settings.analytics("ma_short", ma_crossover_signal.SHORT))
+    long = int(settings.analytics("ma_long", ma_crossover_signal.LONG))
+    out = np.full(len(equity), np.nan)
+    if len(equity) >= long:
+        out[long - 1:] = ma_sweep.states(ma_sweep.prefix(equity), short, long)
+    return ts, out
+
+def missing(*xs):
+    return np.logical_or.reduce([np.isnan(x) for x in xs])
+
+def labels(codes, names):
+    # float codes (NaN = no label) -> label strings ("" = none)
+    table = np.array(list(names) + [""], dtype=object)
+    idx = np.where(np.isnan(codes), len(names), codes).astype(np.int64)
+    return table[idx].tolist()
+
+def text(vals, spec):
+    return ["" if v != v else format(v, spec) for v in vals.tolist()]
+
+def build(cols):
+    spine = np.frombuffer(cols.ts, dtype=np.int64)
+    r = np.frombuffer(cols.rets, dtype=np.float64)
+    stamps = cols.stamps(0)
+    index = dict(zip(stamps, spine.tolist()))
+    series = {name: column(ROOT / log, key, index) for name, (log, key) in INPUTS.items()}
+    avg_ret = join(spine, *series["avg_ret"])
+    vol = join(spine, *series["vol"])
+    z = join(spine, *series["z"])
+    ma = join(spine, *ma_states(*series["equity"]))
+
+    trend = np.where(avg_ret > trend_state.UP, 0.0, np.where(avg_ret < trend_state.DOWN, 1.0, 2.0))
+    trend[np.isnan(avg_ret)] = np.nan
+    regime = np.where(vol < vol_regime.CALM, 0.0, np.where(vol < vol_regime.VOLATILE, 1.0, 2.0))
+    regime[np.isnan(vol)] = np.nan
+    position = np.where((trend == 0) & (regime < 2), 0.0, np.where((trend == 1) & (regime == 2), 2.0, 1.0))
+    position[missing(trend, regime)] = np.nan
+
+    up, down = streaks(r)
+    mood = np.where((up >= market_mood.STREAK) & (down == 0), 0.0,
+                    np.where((down >= market_mood.STREAK) & (up == 0), 1.0, 2.0))
+
+    # signal_conflict compares the two labels as text, so any MA state
+    # differs from any trend state
+    conflict = np.where(missing(ma, trend), 0.0, 1.0)
+    conflict[missing(ma) & missing(trend)] = np.nan
+
+    outlier = np.where(np.abs(z) > return_label.THRESH, 1.0, 0.0)
+    outlier[np.isnan(z)] = np.nan
+    anomaly = np.where(np.abs(z) > zscore_anomalies.THRESH, 1.0, 0.0)
+    anomaly[np.isnan(z)] = np.nan
+
+    window = int(settings.analytics("shape_window", shape_stats.WINDOW) or 0)
+    skew, kurt = shape(r, window)
+    skew_l = np.where(skew > shape_label.SKEW, 0.0, np.where(skew < -shape_label.SKEW, 1.0, 2.0))
+    tail_l = np.where(kurt > shape_label.FAT, 0.0, 1.0)
+
+    return {
+        "timestamp": stamps,
+        "avg_ret": text(avg_ret, ".6f"),
+        "trend": labels(trend, ("UPTREND", "DOWNTREND", "SIDEWAYS")),
+        "vol": text(vol, ".6f"),
+        "regime": labels(regime, ("CALM", "NORMAL", "VOLATILE")),
+        "position": labels(position, ("OVERWEIGHT", "NEUTRAL", "UNDERWEIGHT")),
+        "up": up.tolist(),
+        "down": down.tolist(),
+        "mood": labels(mood, ("BULLISH", "BEARISH", "MIXED")),
+        "ma_state": labels(np.where(np.isnan(ma), np.nan, 1.0 - ma), ("LONG", "NEUTRAL", "FLAT")),
+        "conflict": labels(conflict, ("False", "True")),
+        "z": text(z, ".4f"),
+        "return_label": labels(outlier, ("NORMAL", "OUTLIER")),
+        "anomaly": labels(anomaly, ("False", "True")),
+        "skew": text(skew, ".4f"),
+        "kurtosis": text(kurt, ".4f"),
+        "skew_label": labels(skew_l, ("RIGHT_SKEW", "LEFT_SKEW", "NEAR_SYMM")),
+        "tail_label": labels(tail_l, ("FAT_TAILS", "NORMAL_TAILS")),
+    }
+
+def read_table(path: Path = OUT_PATH):
+    # (header, rows) of a written table, each row its list of cells
+    with path.open("r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return lines[0].split(","), [l.split(",") for l in lines[1:]]
+
+def emit(header, rows, names):
+    # rewrite per-script logs from the table; returns {log: lines written}
+    written = {}
+    for name in names:
+        fmt, need = EMIT[name]
+        pick = operator.itemgetter(*(header.index(k) for k in re.findall(r"{(\w+)}", fmt)))
+        line = re.sub(r"{\w+}", "{}", fmt) + "\n"
+        have = [header.index(c) for c in need]
+        # signal_conflict logs a missing state as None
+        out = [line.format(*[v or "None" for v in pick(row)]) for row in rows if all(row[i] for i in have)]
+        log_writer.replace(ROOT / name, "".join(out))
+        written[name] = len(out)
+    return written
+
+@instrument.instrumented
+def main(emit_logs=None):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None or not len(cols):
+        print("No daily-returns.log yet.")
+        return
+
+    names = []
+    if emit_logs:
+        names = list(EMIT) if emit_logs == "all" else emit_logs.split(",")
+        unknown = [n for n in names if n not in EMIT]
+        if unknown:
+            raise SystemExit(f"unknown log(s) {', '.join(unknown)}; choose from {', '.join(EMIT)}")
+
+    table = build(cols)
+    rows = [",".join(map(str, vals)) for vals in zip(*(table[c] for c in COLUMNS))]
+    log_writer.replace_rows(OUT_PATH, [",".join(COLUMNS)] + rows)
+    instrument.rows(parsed=len(cols), emitted=len(rows))
+    print(f"Wrote {OUT_PATH.name}: {len(rows)} bars x {len(COLUMNS) - 1} signals")
+
+    if names:
+        for name, n in emit(*read_table(), names).items():
+            print(f"Regenerated {name}: {n} rows")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Label the full history in one pass into signal-table.csv.")
+    ap.add_argument("--emit", help="also rewrite these per-script logs from the table (comma list or 'all')")
+    args = ap.parse_args()
+    main(args.emit)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# server/src/srm_analytics.py
+# One entry point for the analytics scripts: `srm_analytics.py <command>
+# [args]` runs the registered script exactly as `python <script> [args]`
+# would. The registry below is plain data, so --help and dispatch import
+# nothing but the one script asked for; numpy, yaml and requests only load
+# when that script needs them.
+
+from collections import namedtuple
+from pathlib import Path
+import sys
+
+HERE = Path(__file__).resolve().parent
+UTILS = HERE.parents[1] / "utils" / "server" / "src"
+
+Command = namedtuple("Command", "name path help")
+
+COMMANDS = {}
+
+def command(name: str, path: Path, help: str):
+    COMMANDS[name] = Command(name, path, help)
+
+# per-bar stages
+command("daily-price-log", UTILS / "daily_price_log.py", "fetch the watch symbol's intraday bars")
+command("ingest", UTILS / "price_ingest.py", "fetch a whole watchlist into the price store")
+command("stub-feed", UTILS / "stub_feed.py", "serve canned intraday payloads locally")
+command("daily-metric", HERE / "daily_metric.py", "daily metric row from daily-price.log")
+command("daily-returns", HERE / "daily_returns.py", "bar returns from the price store")
+command("daily-volatility", HERE / "daily_volatility.py", "volatility of the last closes")
+command("equity-curve", HERE / "equity_curve.py", "compound returns into equity-curve.log")
+command("drawdown-table", HERE / "drawdown_table.py", "underwater table, max drawdown and drawdown episodes")
+command("time-since-peak", HERE / "time_since_peak.py", "bars since the last equity peak")
+command("equity-changes-cumsum", HERE / "equity_changes_cumsum.py", "cumulative equity changes")
+command("ma-crossover-signal", HERE / "ma_crossover_signal.py", "moving-average crossover state")
+command("rolling-avg-return", HERE / "rolling_avg_return.py", "rolling mean return")
+command("rolling-volatility-returns", HERE / "rolling_volatility_returns.py", "rolling return volatility")
+command("rolling-median-return", HERE / "rolling_median_return.py", "rolling median return")
+command("rolling-zscore-returns", HERE / "rolling_zscore_returns.py", "rolling return z-scores")
+command("up-down-counts", HERE / "up_down_counts.py", "rolling up / down bar counts")
+command("up-streak", HERE / "up_streak.py", "current run of up bars")
+command("down-streak", HERE / "down_streak.py", "current run of down bars")
+command("win-rate", HERE / "win_rate.py", "share of positive returns")
+command("profit-factor", HERE / "profit_factor.py", "gross gains over gross losses")
+command("sharpe-ratio", HERE / "sharpe_ratio.py", "rolling Sharpe, Sortino and downside deviation")
+command("downside-deviation", HERE / "downside_deviation.py", "downside-deviation.log only (sharpe-ratio writes it too)")
+command("returns-percentiles", HERE / "returns_percentiles.py", "p05 / p50 / p95 of returns from quantile sketches (--from/--to for a day range)")
+command("shape-stats", HERE / "shape_stats.py", "mean, std, skew and kurtosis of returns")
+command("monte-carlo-equity", HERE / "monte_carlo_equity.py", "bootstrap equity paths")
+command("mc-sanity-check", HERE / "mc_sanity_check.py", "Monte Carlo mean vs actual equity")
+command("correlation-snapshot", HERE / "correlation_snapshot.py", "moving average vs volatility correlation")
+command("correlation-matrix", HERE / "correlation_matrix.py", "rolling N x N correlation over the universe")
+# labels read off the latest rows
+command("trend-state", HERE / "trend_state.py", "trend label from the rolling mean")
+command("vol-regime", HERE / "vol_regime.py", "volatility regime label")
+command("position-hint", HERE / "position_hint.py", "position hint from trend and regime")
+command("zscore-anomalies", HERE / "zscore_anomalies.py", "flag large return z-scores")
+command("return-label", HERE / "return_label.py", "label the latest return z-score")
+command("market-mood", HERE / "market_mood.py", "mood from up / down streaks")
+command("signal-conflict", HERE / "signal_conflict.py", "MA signal vs trend disagreement")
+command("risk-score", HERE / "risk_score.py", "risk score from Sharpe, drawdown and volatility")
+command("fat-tail-flag", HERE / "fat_tail_flag.py", "flag fat-tailed return distributions")
+command("shape-label", HERE / "shape_label.py", "label the return distribution shape")
+command("valuation-note", HERE / "valuation_note.py", "write the valuation note")
+# reports
+command("metrics-snapshot", HERE / "metrics_snapshot.py", "latest record of every metric as one JSON snapshot")
+command("stats-summary", HERE / "stats-summary.py", "plain-text stats summary")
+command("export-metrics-csv", HERE / "export_metrics_csv.py  python", "latest metrics as CSV")
+command("dashboard-table", HERE / "dashboard-table.csv", "latest metrics table as CSV")
+command("risk-mood-row", HERE / "risk_mood_row.csv", "risk / mood CSV row")
+command("config-snapshot", HERE / "config_snapshot.log", "snapshot the analytics config")
+command("data-quality-check", HERE / "data_quality_check.py", "log counts and slowest stages")
+# tools
+command("pipeline", HERE / "pipeline.py", "run the stages as one dependency graph")
+command("daemon", HERE / "analytics_daemon.py", "resident worker that recomputes on input changes")
+command("seglog", HERE / "seglog.py", "segment, compress and back up metric logs")
+command("query", HERE / "metric_query.py", "time-range queries over metric logs (or `query serve`)")
+command("binlog", HERE / "binlog.py", "convert metric logs to / from fixed-width binary records")
+command("ma-sweep", HERE / "ma_sweep.py", "rank MA crossover (short, long) windows over the full history")
+command("backtest", HERE / "backtest.py", "full-history backtest of the signal rules")
+command("signal-table", HERE / "signal_table.py", "relabel the full history into signal-table.csv (--emit to rewrite the label logs)")
+command("benchmark", HERE / "benchmark.py", "scaling benchmark on synthetic logs")
+
+def usage() -> str:
+    lines = ["usage: srm_analytics.py <command> [args...]", "", "commands:"]
+    width = max(len(n) for n in COMMANDS)
+    lines += [f"  {c.name:<{width}}  {c.help}" for c in COMMANDS.values()]
+    lines += ["", "`srm_analytics.py <command> --help` works for commands that take options."]
+    return "\n".join(lines)
+
+def run(name: str, args):
+    import runpy
+    cmd = COMMANDS[name]
+    # what `python <script> args...` would see
+    sys.argv = [str(cmd.path), *args]
+    sys.path.insert(0, str(cmd.path.parent))
+    runpy.run_path(str(cmd.path), run_name="__main__")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    name, args = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"srm_analytics.py: unknown command '{name}'\n\n{usage()}", file=sys.stderr)
+        return 2
+    run(name, args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
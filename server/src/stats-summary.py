@@ -1,27 +1,28 @@
 from pathlib import Path
 from datetime import datetime
+import metrics_snapshot
+import log_writer
+import instrument
 
 ROOT = Path("server/src")
 OUT = ROOT / "stats-summary.txt"
 
+# label -> metrics_snapshot name
 files = {
-    "equity_curve": ROOT / "equity-curve.log",
-    "sharpe": ROOT / "sharpe-ratio.log",
-    "risk_flag": ROOT / "daily-risk-flag.log",
+    "equity_curve": "equity",
+    "sharpe": "sharpe",
+    "risk_flag": "risk_flag",
 }
 
-def last_line(p: Path):
-    if not p.exists():
-        return "no data"
-    return p.read_text(encoding="utf-8").strip().splitlines()[-1]
-
+@instrument.instrumented
 def main():
+    snap = metrics_snapshot.build()
     now = datetime.utcnow().isoformat()
     lines = [f"SRM Stats Summary at {now}", ""]
-    for name, path in files.items():
-        lines.append(f"{name}: {last_line(path)}")
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    for label, name in files.items():
+        line = metrics_snapshot.latest_line(snap, name)
+        lines.append(f"{label}: {'no data' if line is None else line}")
+    log_writer.replace(OUT, "\n".join(lines) + "\n")
     print("Updated stats-summary.txt")
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+# server/src/tail_reader.py
+# Reads the last records of an append-only log by seeking backwards from EOF,
+# so "latest value" scripts cost the same on day 1 and day 1000. Results are
+# cached in-process on (inode, size, mtime) for callers that ask repeatedly.
+
+from pathlib import Path
+import os
+import seglog
+
+BLOCK = 8192
+
+_cache = {}
+
+def _read_tail(path: Path, n: int):
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0:
+            step = min(BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            # the first piece may be a partial line until we reach offset 0
+            if buf.count(b"\n") > n and sum(1 for l in buf.split(b"\n")[1:] if l.strip()) >= n:
+                break
+    lines = buf.split(b"\n")
+    if pos > 0:
+        lines = lines[1:]
+    lines = [l.decode("utf-8").strip() for l in lines]
+    return [l for l in lines if l][-n:]
+
+def last_lines(path: Path, n: int = 1, use_cache: bool = True):
+    # up to n last non-empty lines, oldest first; [] if the file is missing.
+    # Logs compacted by seglog continue into their sealed segments.
+    try:
+        st = os.stat(path)
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        key = None
+    segs = seglog.index_key(path)
+    if key is None and segs is None:
+        return []
+    key = (key, segs)
+    hit = _cache.get(str(path)) if use_cache else None
+    if hit and hit[0] == key and hit[1] >= n:
+        return hit[2][-n:]
+    lines = _read_tail(Path(path), n) if key[0] else []
+    if len(lines) < n and segs:
+        lines = seglog.tail_lines(Path(path), n - len(lines)) + lines
+    if use_cache:
+        _cache[str(path)] = (key, n, lines)
+    return lines
+
+def last_line(path: Path, use_cache: bool = True):
+    lines = last_lines(path, 1, use_cache)
+    return lines[-1] if lines else None
+
+def parse(line: str):
+    # "ts,k=v,k=v" -> (ts, {k: v}); pieces without "=" belong to the
+    # previous value (e.g. raw_keys=['Meta Data', 'Time Series (5min)'])
+    parts = line.split(",")
+    fields = {}
+    key = None
+    for part in parts[1:]:
+        if "=" in part:
+            key, value = part.split("=", 1)
+            fields[key] = value
+        elif key is not None:
+            fields[key] += "," + part
+    return parts[0], fields
+
+def last_records(path: Path, n: int = 1, use_cache: bool = True):
+    return [parse(l) for l in last_lines(path, n, use_cache)]
+
+def last_record(path: Path, use_cache: bool = True):
+    line = last_line(path, use_cache)
+    return parse(line) if line is not None else None
@@ -0,0 +1,85 @@
+# server/src/test_binlog.py
+# binlog's text <-> binary conversion must give back the original log byte
+# for byte (pinned, inferred and csv schemas), refuse lines it could not
+# reproduce, and keep zero-copy views usable across Records.close().
+
+from pathlib import Path
+import gc
+import tempfile
+import unittest
+
+import binlog
+
+RETURNS = ["2024-01-01T00:05:00,ret=-0.014532", "2024-01-01T00:10:00,ret=0.000000",
+           "2024-01-01T00:15:00,ret=-0.000000", "2024-01-01T00:20:00.250000,ret=0.021537"]
+DRAWDOWN = ["2024-01-01T00:05:00,max_drawdown=0.0000,current_drawdown=0.0000,peak_ts=,trough_ts=,bars_since_peak=0",
+            "2024-01-01T00:10:00,max_drawdown=-0.0145,current_drawdown=-0.0145,peak_ts=2024-01-01T00:05:00,"
+            "trough_ts=2024-01-01T00:10:00,bars_since_peak=1"]
+INFERRED = ["2024-01-01T00:05:00,n=3,window=all,mean=0.000529,skew=-0.0153,fat=False",
+            "2024-01-01T00:10:00,n=4,window=all,mean=-0.001200,skew=0.2100,fat=True"]
+TABLE = ["timestamp,equity,peak,drawdown", "2024-01-01T00:05:00,985.47,985.47,0.0000",
+         "2024-01-01T00:10:00,990.10,990.10,0.0000", "2024-01-01T00:15:00,970.00,990.10,-0.0203"]
+
+class Binlog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, lines):
+        path = self.dir / name
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+    def round_trip(self, name, lines):
+        log = self.write(name, lines)
+        n = binlog.to_binary(log)
+        out = self.dir / (name + ".out")
+        self.assertEqual(binlog.to_text(binlog.bin_path(log), out), n)
+        self.assertEqual(out.read_bytes(), log.read_bytes())
+        return binlog.bin_path(log)
+
+    def test_round_trip(self):
+        self.round_trip("daily-returns.log", RETURNS)
+        self.round_trip("max-drawdown.log", DRAWDOWN)
+        self.round_trip("shape-stats.log", INFERRED)
+        self.round_trip("drawdown-table.csv", TABLE)
+
+    def test_random_access(self):
+        path = self.round_trip("daily-returns.log", RETURNS)
+        with binlog.Records(path) as recs:
+            self.assertEqual(len(recs), len(RETURNS))
+            self.assertEqual(recs.line(-1), RETURNS[-1])
+            self.assertEqual(recs.row(0)[1], -0.014532)
+            with self.assertRaises(IndexError):
+                recs.row(len(RETURNS))
+
+    def test_refuses_lines_that_do_not_round_trip(self):
+        for lines in (RETURNS + ["2024-01-01T00:25:00,ret=0.01"],
+                      ["2024-01-01T00:05:00,avg_ret=0.001000,state=FLAT"]):
+            log = self.write("trend-state.log" if "state" in lines[-1] else "daily-returns.log", lines)
+            with self.assertRaises(ValueError):
+                binlog.to_binary(log)
+
+    def test_close_with_live_array(self):
+        path = self.round_trip("daily-returns.log", RETURNS)
+        with binlog.Records(path) as recs:
+            col = recs.column("ret")
+            arr = recs.array()
+        self.assertEqual(col.tolist(), [-0.014532, 0.0, -0.0, 0.021537])
+        self.assertEqual(arr["ts"][0], binlog.stamp_us("2024-01-01T00:05:00"))
+        del col, arr
+        gc.collect()
+
+    def test_appended_records(self):
+        path = self.dir / "trend-state.log.bin"
+        binlog.create(path, "trend-state.log")
+        binlog.append(path, [(binlog.stamp_us("2024-01-01T00:05:00"), 0.0123456789, 1)])
+        with binlog.Records(path) as recs:
+            self.assertEqual(recs.row(0)[1], 0.0123456789)
+            self.assertEqual(recs.lines(), ["2024-01-01T00:05:00,avg_ret=0.012346,state=DOWNTREND"])
+
+if __name__ == "__main__":
+    unittest.main()
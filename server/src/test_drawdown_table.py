@@ -0,0 +1,100 @@
+# server/src/test_drawdown_table.py
+# drawdown_table.scan() carries the running peak and the open episode
+# between runs; scanning the equity curve in chunks must give the same
+# episodes, table rows and max drawdown as one pass over all of it, and
+# main() run after every append must leave the same files as --full.
+
+from pathlib import Path
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+import drawdown_table
+
+def stamps(n):
+    return [f"t{i:04d}" for i in range(n)]
+
+def scan_chunks(eq, cuts):
+    ts = stamps(len(eq))
+    state = drawdown_table.new_state()
+    rows, done = [], []
+    for a, b in zip([0] + cuts, cuts + [len(eq)]):
+        r, d, state = drawdown_table.scan(ts[a:b], np.array(eq[a:b], dtype=np.float64), state)
+        rows += r
+        done += d
+    return rows, done, state
+
+class ChunkedScan(unittest.TestCase):
+    def check(self, eq, cuts):
+        full_rows, full_done, full = scan_chunks(eq, [])
+        rows, done, state = scan_chunks(eq, cuts)
+        self.assertEqual(done, full_done, f"cuts {cuts}")
+        self.assertEqual(rows, full_rows)
+        for key in ("peak", "peak_idx", "max_dd", "max_peak_ts", "max_trough_ts", "open"):
+            self.assertEqual(state[key], full[key], key)
+
+    def test_recovery_on_first_row_of_chunk(self):
+        eq = [100, 90, 95, 101, 99, 102, 103, 104]
+        self.assertEqual(len(scan_chunks(eq, [])[1]), 2)
+        for cut in range(1, len(eq)):
+            self.check(eq, [cut])
+
+    def test_one_bar_appends(self):
+        rng = random.Random(7)
+        eq = [100.0]
+        for _ in range(400):
+            eq.append(round(eq[-1] * (1 + rng.gauss(0, 0.01)), 2))
+        self.check(eq, list(range(1, len(eq))))
+        for _ in range(20):
+            self.check(eq, sorted(rng.sample(range(1, len(eq)), rng.randint(1, 30))))
+
+class IncrementalMain(unittest.TestCase):
+    OUTPUTS = ("drawdown-table.csv", "drawdown-episodes.csv")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("server/src")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def run_main(self, full=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            drawdown_table.main(full=full)
+
+    def read(self, name):
+        return Path("server/src", name).read_text(encoding="utf-8")
+
+    def test_matches_full_rebuild(self):
+        rng = random.Random(11)
+        eq = [100.0]
+        for _ in range(300):
+            eq.append(round(eq[-1] * (1 + rng.gauss(-0.002, 0.01)), 2))
+        lines = [f"{t},equity={v:.2f}\n" for t, v in zip(stamps(len(eq)), eq)]
+        cuts = sorted(rng.sample(range(1, len(lines)), 12)) + [len(lines)]
+        log = Path("server/src/equity-curve.log")
+        a = 0
+        for b in cuts:
+            with log.open("a", encoding="utf-8") as f:
+                f.writelines(lines[a:b])
+            self.run_main()
+            a = b
+        incremental = {name: self.read(name) for name in self.OUTPUTS}
+        self.assertEqual(incremental["drawdown-episodes.csv"].count(",,"), 1, "one open episode row")
+
+        for name in self.OUTPUTS:
+            os.remove(Path("server/src", name))
+        self.run_main(full=True)
+        for name in self.OUTPUTS:
+            self.assertEqual(incremental[name], self.read(name), name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# server/src/test_quantile_sketch.py
+# The KLL sketch behind returns_percentiles.py: exact below k values, within
+# the documented rank error (quantile_sketch.EPS) above it, also after
+# merging per-day sketches, and independent of how the input is batched.
+
+import bisect
+import random
+import unittest
+
+import quantile_sketch
+
+PS = [i / 100 for i in range(1, 100)]
+
+def exact(sorted_vals, p):
+    # numpy's default "linear" quantile
+    pos = p * (len(sorted_vals) - 1)
+    r = int(pos)
+    b = sorted_vals[min(r + 1, len(sorted_vals) - 1)]
+    return sorted_vals[r] + (b - sorted_vals[r]) * (pos - r)
+
+def rank_error(sorted_vals, sketch):
+    n = len(sorted_vals)
+    return max(abs(bisect.bisect_right(sorted_vals, q) / n - p) for p, q in zip(PS, sketch.quantiles(PS)))
+
+def returns(n, seed):
+    rng = random.Random(seed)
+    # fat-tailed mix, like intraday returns
+    return [rng.gauss(0, 0.01) if rng.random() < 0.9 else rng.gauss(0, 0.04) for _ in range(n)]
+
+class QuantileSketch(unittest.TestCase):
+    def test_exact_below_k(self):
+        vals = returns(quantile_sketch.K - 1, 1)
+        s = quantile_sketch.of(vals)
+        srt = sorted(vals)
+        for p in [0.0, 0.05, 0.5, 0.95, 1.0] + PS:
+            self.assertAlmostEqual(s.quantile(p), exact(srt, p), places=12)
+
+    def test_rank_error_within_bound(self):
+        for seed, order in ((2, None), (3, "sorted"), (4, "reversed")):
+            vals = returns(200_000, seed)
+            if order:
+                vals.sort(reverse=order == "reversed")
+            s = quantile_sketch.of(vals)
+            self.assertEqual(s.n, len(vals))
+            self.assertLessEqual(rank_error(sorted(vals), s), quantile_sketch.EPS)
+
+    def test_merged_days_answer_a_range(self):
+        days = [returns(288, seed) for seed in range(100, 160)]
+        sketches = [quantile_sketch.of(d) for d in days]
+        for a, b in ((0, 60), (10, 25), (40, 41)):
+            merged = quantile_sketch.KLL()
+            for s in sketches[a:b]:
+                merged = merged.merge(s)
+            vals = sorted(v for d in days[a:b] for v in d)
+            self.assertEqual(merged.n, len(vals))
+            self.assertLessEqual(rank_error(vals, merged), quantile_sketch.EPS)
+            self.assertEqual(merged.quantile(0.0), vals[0])
+            self.assertEqual(merged.quantile(1.0), vals[-1])
+
+    def test_batching_does_not_change_the_sketch(self):
+        vals = returns(50_000, 5)
+        whole = quantile_sketch.of(vals)
+        rng = random.Random(6)
+        parts = quantile_sketch.KLL()
+        i = 0
+        while i < len(vals):
+            step = rng.randint(1, 3000)
+            parts = quantile_sketch.KLL.from_state(parts.state())
+            parts.extend(vals[i:i + step])
+            i += step
+        self.assertEqual(parts.state(), whole.state())
+
+if __name__ == "__main__":
+    unittest.main()
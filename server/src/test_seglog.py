@@ -0,0 +1,60 @@
+# server/src/test_seglog.py
+# roll() renames the active log to sealing.tmp, writes segments, publishes
+# index.json and only then removes sealing.tmp. A roll that dies between
+# the last two steps must not seal the same rows again on the next run.
+
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+import seglog
+
+class RollCrash(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = Path(self.tmp.name) / "vol-regime.log"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, day, n):
+        with self.log.open("a", encoding="utf-8") as f:
+            for i in range(n):
+                f.write(f"2026-01-{day:02d}T00:{i:02d}:00,vol=0.01,regime=CALM\n")
+
+    def test_crash_after_index_published(self):
+        self.append(1, 5)
+        real = seglog._write_index
+
+        def publish_then_die(path, index):
+            real(path, index)
+            raise KeyboardInterrupt
+
+        with mock.patch.object(seglog, "_write_index", publish_then_die):
+            with self.assertRaises(KeyboardInterrupt):
+                seglog.roll(self.log, force=True)
+        self.assertTrue((seglog.seg_dir(self.log) / seglog.SEALING).exists())
+
+        self.assertEqual(seglog.roll(self.log, force=True), 0)
+        self.assertFalse((seglog.seg_dir(self.log) / seglog.SEALING).exists())
+        self.assertEqual(len(seglog.read_lines(self.log)), 5)
+
+        self.append(2, 3)
+        self.assertEqual(seglog.roll(self.log, force=True), 1)
+        lines = seglog.read_lines(self.log)
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(len(set(lines)), 8)
+
+    def test_crash_before_index_published(self):
+        self.append(1, 5)
+        with mock.patch.object(seglog, "_write_index", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                seglog.roll(self.log, force=True)
+        self.assertEqual(seglog.read_lines(self.log), [])
+
+        self.assertEqual(seglog.roll(self.log, force=True), 1)
+        self.assertEqual(len(seglog.read_lines(self.log)), 5)
+
+if __name__ == "__main__":
+    unittest.main()
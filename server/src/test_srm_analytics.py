@@ -0,0 +1,68 @@
+# server/src/test_srm_analytics.py
+# The scheduler starts srm_analytics.py many times per bar, so --help and
+# the cheap label commands must stay fast and must not drag in numpy, yaml
+# or requests.
+
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+CLI = Path(__file__).resolve().parent / "srm_analytics.py"
+HEAVY = ("numpy", "yaml", "requests")
+# seconds on top of a bare interpreter start
+BUDGET = 0.15
+REPEAT = 5
+
+def best_wall(args, cwd):
+    best = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=cwd, check=True, capture_output=True)
+        wall = time.perf_counter() - t0
+        best = wall if best is None else min(best, wall)
+    return best
+
+def imported_modules(args, cwd):
+    # top-level module names imported while running the CLI (-X importtime)
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(CLI), *args],
+                          cwd=cwd, check=True, capture_output=True, text=True)
+    names = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            names.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return names
+
+class StartupBudget(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = self.tmp.name
+        self.base = best_wall(["-c", "pass"], self.cwd)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check(self, *args):
+        heavy = imported_modules(args, self.cwd) & set(HEAVY)
+        self.assertFalse(heavy, f"{' '.join(args)} imported {sorted(heavy)}")
+        overhead = best_wall([str(CLI), *args], self.cwd) - self.base
+        self.assertLess(overhead, BUDGET, f"{' '.join(args)} took {overhead * 1000:.0f} ms over a bare interpreter")
+
+    def test_help(self):
+        self.check("--help")
+
+    def test_vol_regime(self):
+        self.check("vol-regime")
+
+    def test_trend_state(self):
+        self.check("trend-state")
+
+    def test_unknown_command(self):
+        proc = subprocess.run([sys.executable, str(CLI), "no-such-command"], cwd=self.cwd, capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("unknown command", proc.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
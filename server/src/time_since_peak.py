@@ -1,30 +1,24 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
-DD_PATH = Path("server/src/drawdown-table.csv")
+MDD_PATH = Path("server/src/max-drawdown.log")
 OUT_PATH = Path("server/src/time-since-peak.log")
 
+# drawdown_table.py tracks the running peak; this just republishes the count
+@instrument.instrumented
 def main():
-    if not DD_PATH.exists():
-        print("No drawdown-table.csv.")
+    rec = tail_reader.last_record(MDD_PATH)
+    if rec is None or "bars_since_peak" not in rec[1]:
+        print("No max-drawdown.log.")
         return
 
-    lines = DD_PATH.read_text(encoding="utf-8").strip().splitlines()[1:]
-    if not lines:
-        return
-
-    last_peak_idx = 0
-    result_line = ""
-    for idx, row in enumerate(lines):
-        ts, _, _, dd = row.split(",")
-        if float(dd) == 0.0:
-            last_peak_idx = idx
-        if idx == len(lines) - 1:
-            days = idx - last_peak_idx
-            result_line = f"{ts},days_since_peak={days}\n"
+    ts, fields = rec
+    result_line = f"{ts},days_since_peak={int(fields['bars_since_peak'])}\n"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(result_line)
+    instrument.rows(parsed=1, emitted=1)
+    log_writer.append(OUT_PATH, result_line)
     print("Appended time-since-peak:", result_line.strip())
 
 if __name__ == "__main__":
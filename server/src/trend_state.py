@@ -1,28 +1,34 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 ROLL_PATH = Path("server/src/rolling-avg-return.log")
 OUT_PATH = Path("server/src/trend-state.log")
 
+# rolling mean return above UP / below DOWN
+UP = 0.002
+DOWN = -0.002
+
+@instrument.instrumented
 def main():
-    if not ROLL_PATH.exists():
+    rec = tail_reader.last_record(ROLL_PATH)
+    if rec is None:
         print("No rolling-avg-return.log.")
         return
 
-    line = ROLL_PATH.read_text(encoding="utf-8").strip().splitlines()[-1]
-    ts, rest = line.split(",", 1)
-    avg_ret = float(rest.split("avg_ret=")[1])
+    ts, fields = rec
+    avg_ret = float(fields["avg_ret"])
 
-    if avg_ret > 0.002:
+    if avg_ret > UP:
         state = "UPTREND"
-    elif avg_ret < -0.002:
+    elif avg_ret < DOWN:
         state = "DOWNTREND"
     else:
         state = "SIDEWAYS"
 
     out = f"{ts},avg_ret={avg_ret:.6f},state={state}\n"
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(out)
+    log_writer.append(OUT_PATH, out)
     print("Appended trend state:", out.strip())
 
 if __name__ == "__main__":
@@ -1,31 +1,39 @@
 from pathlib import Path
+import sys
+import checkpoint
+import rolling
+import returns_cache
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/up-down-counts.log")
 WINDOW = 10
 
-def main():
-    if not RET_PATH.exists():
+@instrument.instrumented
+def main(full=False):
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if len(lines) < WINDOW:
+    if len(cols) < WINDOW:
         print("Not enough data.")
         return
 
-    rets = [float(l.split("ret=")[1]) for l in lines]
-    ts_list = [l.split(",")[0] for l in lines]
+    start, state = checkpoint.resume_returns(OUT_PATH, cols, full, {"kind": rolling.RollingSignCount.kind, "window": WINDOW})
+    w = rolling.RollingSignCount(WINDOW, state)
 
     out_lines = []
-    for i in range(WINDOW - 1, len(rets)):
-        w = rets[i - WINDOW + 1 : i + 1]
-        ups = sum(1 for r in w if r > 0)
-        downs = sum(1 for r in w if r < 0)
-        out_lines.append(f"{ts_list[i]},window={WINDOW},ups={ups},downs={downs}")
+    for ts, r in zip(cols.stamps(start), cols.rets[start:]):
+        w.push(r)
+        if not w.full():
+            continue
+        out_lines.append(f"{ts},window={WINDOW},ups={w.ups},downs={w.downs}")
 
-    OUT_PATH.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    instrument.rows(parsed=len(cols) - start, emitted=len(out_lines))
+    checkpoint.write_rows(OUT_PATH, out_lines, append=start > 0)
+    checkpoint.save_returns(OUT_PATH, cols, w.state())
     print("Updated up-down-counts.log")
 
 if __name__ == "__main__":
-    main()
+    main(full="--full" in sys.argv)
@@ -1,8 +1,11 @@
 from pathlib import Path
 from datetime import datetime
+import log_writer
+import instrument
 
 OUT = Path("server/src/valuation-note.txt")
 
+@instrument.instrumented
 def main():
     now = datetime.utcnow().isoformat()
     note = [
@@ -11,8 +14,7 @@ def main():
         "- This is a placeholder note for SRM Financial.",
         "- Hook this up later to real valuation ratios (P/E, P/B, etc.).",
     ]
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text("\n".join(note) + "\n", encoding="utf-8")
+    log_writer.replace(OUT, "\n".join(note) + "\n")
     print("Updated valuation-note.txt")
 
 if __name__ == "__main__":
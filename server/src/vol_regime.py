@@ -1,27 +1,33 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 VOL_PATH = Path("server/src/rolling-volatility-returns.log")
 OUT_PATH = Path("server/src/vol-regime.log")
 
+# rolling volatility below CALM is calm, from VOLATILE up volatile
+CALM = 0.005
+VOLATILE = 0.02
+
+@instrument.instrumented
 def main():
-    if not VOL_PATH.exists():
+    rec = tail_reader.last_record(VOL_PATH)
+    if rec is None:
         print("No rolling-volatility-returns.log.")
         return
 
-    line = VOL_PATH.read_text(encoding="utf-8").strip().splitlines()[-1]
-    ts, rest = line.split(",", 1)
-    vol = float(rest.split("vol=")[1])
+    ts, fields = rec
+    vol = float(fields["vol"])
 
-    if vol < 0.005:
+    if vol < CALM:
         regime = "CALM"
-    elif vol < 0.02:
+    elif vol < VOLATILE:
         regime = "NORMAL"
     else:
         regime = "VOLATILE"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},vol={vol:.6f},regime={regime}\n")
+    log_writer.append(OUT_PATH, f"{ts},vol={vol:.6f},regime={regime}\n")
     print("Appended vol regime:", regime)
 
 if __name__ == "__main__":
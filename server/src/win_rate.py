@@ -1,26 +1,33 @@
 from pathlib import Path
+import returns_cache
+import log_writer
+import instrument
 
 RET_PATH = Path("server/src/daily-returns.log")
 OUT_PATH = Path("server/src/win-rate.log")
 
+def win_rate(wins, trades):
+    # share of positive returns; also used by backtest.py
+    return wins / trades if trades else 0.0
+
+@instrument.instrumented
 def main():
-    if not RET_PATH.exists():
+    cols = returns_cache.load(RET_PATH)
+    if cols is None:
         print("No daily-returns.log.")
         return
 
-    lines = RET_PATH.read_text(encoding="utf-8").strip().splitlines()
-    rets = [float(l.split("ret=")[1]) for l in lines]
+    rets = cols.rets
     if not rets:
         return
 
     wins = sum(1 for r in rets if r > 0)
-    win_rate = wins / len(rets)
-    ts = lines[-1].split(",")[0]
-    out = f"{ts},trades={len(rets)},win_rate={win_rate:.4f}\n"
+    rate = win_rate(wins, len(rets))
+    ts = cols.stamp(-1)
+    instrument.rows(parsed=len(cols), emitted=1)
+    out = f"{ts},trades={len(rets)},win_rate={rate:.4f}\n"
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(out)
+    log_writer.append(OUT_PATH, out)
     print("Appended win rate:", out.strip())
 
 if __name__ == "__main__":
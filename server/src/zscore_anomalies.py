@@ -1,25 +1,26 @@
 from pathlib import Path
+import tail_reader
+import log_writer
+import instrument
 
 Z_PATH = Path("server/src/rolling-zscore-returns.log")
 OUT_PATH = Path("server/src/zscore-anomalies.log")
 THRESH = 2.0
 
+@instrument.instrumented
 def main():
     if not Z_PATH.exists():
         print("No rolling-zscore-returns.log.")
         return
 
-    lines = Z_PATH.read_text(encoding="utf-8").strip().splitlines()
-    if not lines:
+    rec = tail_reader.last_record(Z_PATH)
+    if rec is None:
         return
 
-    last = lines[-1]
-    ts, rest = last.split(",", 1)
-    z = float(rest.split("z=")[1])
+    ts, fields = rec
+    z = float(fields["z"])
     is_anom = abs(z) > THRESH
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("a", encoding="utf-8") as f:
-        f.write(f"{ts},z={z:.4f},anomaly={is_anom}\n")
+    log_writer.append(OUT_PATH, f"{ts},z={z:.4f},anomaly={is_anom}\n")
     print("Appended z-score anomaly row.")
 
 if __name__ == "__main__":
@@ -1,23 +1,25 @@
 # server/src/daily_price_log.py
-import requests
 from datetime import datetime
 import os
+import price_ingest  # puts server/src on sys.path
+import log_writer
+import price_store
 
-API_KEY = os.getenv("ALPHA_VANTAGE_KEY")
 SYMBOL = os.getenv("SRM_WATCH_SYMBOL", "AAPL")
 
-url = (
-    "https://www.alphavantage.co/query"
-    f"?function=TIME_SERIES_INTRADAY&symbol={SYMBOL}&interval=5min&apikey={API_KEY}"
-)
-r = requests.get(url)
-data = r.json()
+log_path = "server/src/daily-price.log"
 
-now = datetime.utcnow().isoformat()
-line = f"{now},symbol={SYMBOL},raw_keys={list(data.keys())[:3]}\n"
+def main():
+  session = price_ingest.make_session(1)
+  data = price_ingest.fetch(session, SYMBOL)
 
-log_path = "server/src/daily-price.log"
-with open(log_path, "a", encoding="utf-8") as f:
-  f.write(line)
+  now = datetime.utcnow().isoformat()
+  line = f"{now},symbol={SYMBOL},raw_keys={list(data.keys())[:3]}\n"
+
+  log_writer.append(log_path, line)
+  added = price_store.append_bars(SYMBOL, price_store.parse_intraday(data))
+
+  print("Logged daily price metadata line,", added, "new bars stored.")
 
-print("Logged daily price metadata line.")
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,167 @@
+# server/src/price_ingest.py
+# Fetches TIME_SERIES_INTRADAY for a whole watchlist at once: a bounded
+# thread pool shares one pooled HTTP session, a token bucket keeps us inside
+# the provider's requests-per-minute budget, and every symbol gets its own
+# log under server/src/prices/ plus its OHLCV bars in the columnar price
+# store. Run with --stub to ingest from the bundled local feed (stub_feed.py)
+# for offline load tests.
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "server" / "src"))
+import log_writer
+import price_store
+
+API_URL = os.getenv("SRM_PRICE_API_URL", "https://www.alphavantage.co/query")
+API_KEY = os.getenv("ALPHA_VANTAGE_KEY")
+INTERVAL = os.getenv("SRM_PRICE_INTERVAL", "5min")
+RPM = float(os.getenv("SRM_INGEST_RPM", "75"))
+WORKERS = int(os.getenv("SRM_INGEST_WORKERS", "16"))
+TIMEOUT = (3.05, 15)  # connect, read
+RETRIES = 3
+
+OUT_DIR = Path("server/src/prices")
+
+# top-level keys of an HTTP 200 payload that carries no data: a bad symbol
+# or key, or the provider's rate-limit notice
+PROVIDER_ERRORS = ("Error Message", "Note", "Information")
+
+class ProviderError(RuntimeError):
+    pass
+
+class TokenBucket:
+    # `rate` tokens per minute, at most `burst` saved up
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate / 60.0
+        self.capacity = burst if burst is not None else max(1.0, min(rate, 10.0))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def make_session(pool_size: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=RETRIES, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch(session, symbol: str, url: str = None, bucket: TokenBucket = None):
+    if bucket is not None:
+        bucket.acquire()
+    params = {"function": "TIME_SERIES_INTRADAY", "symbol": symbol, "interval": INTERVAL, "apikey": API_KEY}
+    r = session.get(url or API_URL, params=params, timeout=TIMEOUT)
+    r.raise_for_status()
+    data = r.json()
+    for key in PROVIDER_ERRORS:
+        if key in data:
+            raise ProviderError(f"{key}: {data[key]}")
+    return data
+
+def log_line(symbol: str, data) -> str:
+    now = datetime.utcnow().isoformat()
+    return f"{now},symbol={symbol},raw_keys={list(data.keys())[:3]}\n"
+
+def symbol_log(symbol: str) -> Path:
+    return OUT_DIR / f"{price_store.check_symbol(symbol)}.log"
+
+def ingest_one(session, symbol: str, url: str, bucket: TokenBucket):
+    data = fetch(session, symbol, url, bucket)
+    log_writer.append(symbol_log(symbol), log_line(symbol, data))
+    price_store.append_bars(symbol, price_store.parse_intraday(data))
+    return symbol, data
+
+def ingest(symbols, url: str = None, rpm: float = RPM, workers: int = WORKERS, on_payload=None):
+    # returns {symbol: error message} for the symbols that failed
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    bucket = TokenBucket(rpm)
+    session = make_session(workers)
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_one, session, s, url, bucket): s for s in symbols}
+        for fut in as_completed(futures):
+            try:
+                symbol, data = fut.result()
+            except Exception as e:
+                failed[futures[fut]] = f"{type(e).__name__}: {e}"
+                continue
+            if on_payload is not None:
+                on_payload(symbol, data)
+    session.close()
+    return failed
+
+def load_watchlist(path: str = None, symbols: str = None):
+    if symbols:
+        names = symbols.split(",")
+    elif path:
+        names = [l.split("#", 1)[0] for l in Path(path).read_text(encoding="utf-8").splitlines()]
+    else:
+        names = os.getenv("SRM_WATCHLIST", os.getenv("SRM_WATCH_SYMBOL", "AAPL")).split(",")
+    seen = []
+    for n in names:
+        n = n.strip().upper()
+        if n and n not in seen:
+            seen.append(n)
+    bad = [n for n in seen if not price_store.SYMBOL_RE.match(n) or n in (".", "..")]
+    if bad:
+        raise ValueError(f"invalid symbol(s) in watchlist: {', '.join(bad)}")
+    return seen
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingest intraday prices for a watchlist.")
+    ap.add_argument("--watchlist", help="file with one symbol per line")
+    ap.add_argument("--symbols", help="comma-separated symbols (overrides --watchlist)")
+    ap.add_argument("--rpm", type=float, default=RPM, help="requests-per-minute budget")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--stub", action="store_true", help="serve canned payloads from a local stub feed")
+    args = ap.parse_args(argv)
+
+    try:
+        symbols = load_watchlist(args.watchlist, args.symbols)
+    except ValueError as e:
+        ap.error(str(e))
+    url = None
+    server = None
+    if args.stub:
+        import stub_feed
+        server = stub_feed.start("127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/query"
+
+    t0 = time.perf_counter()
+    failed = ingest(symbols, url, args.rpm, args.workers)
+    elapsed = time.perf_counter() - t0
+    if server is not None:
+        server.shutdown()
+
+    for symbol, err in sorted(failed.items()):
+        print(f"{symbol}: FAILED {err}")
+    ok = len(symbols) - len(failed)
+    print(f"Ingested {ok}/{len(symbols)} symbols in {elapsed:.2f}s ({ok / elapsed if elapsed else 0:.1f}/s)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
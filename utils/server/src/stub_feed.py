@@ -0,0 +1,97 @@
+# server/src/stub_feed.py
+# Local stand-in for the Alpha Vantage TIME_SERIES_INTRADAY endpoint. Bars are
+# generated deterministically from the symbol name, so repeated load tests
+# see the same payloads without network access or an API key.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+
+BARS = 100
+LATENCY = 0.0  # seconds added to every response
+
+def intraday_payload(symbol: str, interval: str = "5min", bars: int = BARS):
+    rng = random.Random(zlib.crc32(symbol.encode("utf-8")))
+    step = timedelta(minutes=int(interval.rstrip("min") or 5))
+    end = datetime(2025, 1, 2, 16, 0)
+    price = rng.uniform(20, 500)
+    series = {}
+    for i in range(bars, 0, -1):
+        ts = end - step * (i - 1)
+        o = price
+        c = max(0.01, o * (1 + rng.gauss(0, 0.002)))
+        h = max(o, c) * (1 + abs(rng.gauss(0, 0.001)))
+        l = min(o, c) * (1 - abs(rng.gauss(0, 0.001)))
+        series[ts.strftime("%Y-%m-%d %H:%M:%S")] = {
+            "1. open": f"{o:.4f}",
+            "2. high": f"{h:.4f}",
+            "3. low": f"{l:.4f}",
+            "4. close": f"{c:.4f}",
+            "5. volume": str(rng.randint(1_000, 500_000)),
+        }
+        price = c
+    newest_first = dict(reversed(list(series.items())))
+    return {
+        "Meta Data": {
+            "1. Information": "Intraday (5min) open, high, low, close prices and volume",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": next(iter(newest_first)),
+            "4. Interval": interval,
+            "5. Output Size": "Compact",
+            "6. Time Zone": "US/Eastern",
+        },
+        f"Time Series ({interval})": newest_first,
+    }
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path != "/query" or q.get("function") != "TIME_SERIES_INTRADAY" or "symbol" not in q:
+            body = {"Error Message": "Invalid API call."}
+        else:
+            body = intraday_payload(q["symbol"].upper(), q.get("interval", "5min"))
+        if LATENCY:
+            time.sleep(LATENCY)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def start(host: str = "127.0.0.1", port: int = 0):
+    # serve on a daemon thread; port 0 picks a free one (see server_address)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    global LATENCY
+    ap = argparse.ArgumentParser(description="Serve canned TIME_SERIES_INTRADAY payloads.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    args = ap.parse_args(argv)
+    LATENCY = args.latency_ms / 1000.0
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Stub price feed on http://{args.host}:{args.port}/query")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()